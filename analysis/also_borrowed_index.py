@@ -0,0 +1,107 @@
+import hashlib
+import os
+import numpy as np
+
+# Read side of the "readers also borrowed" index built by build_also_borrowed_index.py.
+# Only numpy is needed: every array is a .npy file opened with mmap_mode='r', so a
+# lookup touches a handful of pages and many processes share one page-cached copy.
+#
+# The association rules are mined on titles, so the index is keyed on titles
+# too: a masterId is resolved to its title and the consequents are titles.
+# Masters sharing a title share its entry; the rules say nothing about which
+# of those copies were borrowed together.
+#
+# Layout (all in INDEX_DIR):
+#   table_hashes.npy  uint64[capacity]   open-addressing table of antecedent key hashes (0 = empty)
+#   table_entries.npy int64[capacity]    entry number stored in each table slot
+#   antecedents.npy   int32[n, 2]        title indices of each entry's antecedent (-1 = unused)
+#   offsets.npy       int64[n + 1]       consequent range of each entry
+#   consequents.npy   int32[m]           title index of each consequent, best first
+#   lift.npy          float32[m]
+#   confidence.npy    float32[m]
+#   titles.npy        S[n_titles]        title strings (utf-8)
+#   master_ids.npy    S[n_masters]       masterId strings, sorted
+#   master_titles.npy int32[n_masters]   title index of each masterId
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_DIR = os.path.join(SCRIPT_DIR, "output", "also_borrowed_index")
+
+def key_hash(titles):
+    # Order-independent 64-bit key for a single title or a pair of titles
+    key = "|".join(sorted(titles)).encode("utf-8")
+    value = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+    # 0 marks an empty slot
+    return value or 1
+
+def table_capacity(n_keys):
+    # Power of two with load factor <= 0.5 keeps linear probe chains short
+    capacity = 1
+    while capacity < 2 * max(n_keys, 1):
+        capacity <<= 1
+    return capacity
+
+class AlsoBorrowedIndex:
+    def __init__(self, index_dir=INDEX_DIR):
+        def load(name):
+            return np.load(os.path.join(index_dir, name), mmap_mode='r')
+
+        self.table_hashes = load("table_hashes.npy")
+        self.table_entries = load("table_entries.npy")
+        self.antecedents = load("antecedents.npy")
+        self.offsets = load("offsets.npy")
+        self.consequents = load("consequents.npy")
+        self.lift = load("lift.npy")
+        self.confidence = load("confidence.npy")
+        self.titles = load("titles.npy")
+        self.master_ids = load("master_ids.npy")
+        self.master_titles = load("master_titles.npy")
+        self.mask = len(self.table_hashes) - 1
+
+    def title_of(self, master_id):
+        # Binary search in the sorted masterIds; None for unknown masters
+        key = master_id.encode("utf-8")
+        position = int(np.searchsorted(self.master_ids, key))
+        if position == len(self.master_ids) or self.master_ids[position] != key:
+            return None
+        return self.titles[self.master_titles[position]].decode("utf-8")
+
+    def _find_entry(self, titles):
+        wanted = key_hash(titles)
+        expected = sorted(titles)
+        slot = wanted & self.mask
+        while True:
+            stored = int(self.table_hashes[slot])
+            if stored == 0:
+                return None
+            if stored == wanted:
+                entry = int(self.table_entries[slot])
+                # Guard against 64-bit hash collisions
+                found = sorted(self.titles[i].decode("utf-8") for i in self.antecedents[entry] if i >= 0)
+                if found == expected:
+                    return entry
+            slot = (slot + 1) & self.mask
+
+    def lookup(self, *master_ids, k=None):
+        # "Readers who borrowed <master_ids> also borrowed ..." as [(title, lift, confidence)]
+        if not 1 <= len(master_ids) <= 2:
+            raise ValueError("Antecedent must be one or two masterIds")
+        titles = [self.title_of(master_id) for master_id in master_ids]
+        if None in titles:
+            return []
+        return self.lookup_titles(*titles, k=k)
+
+    def lookup_titles(self, *titles, k=None):
+        # Same lookup keyed directly by one or two titles
+        titles = sorted(set(titles))
+        if not 1 <= len(titles) <= 2:
+            raise ValueError("Antecedent must be one or two titles")
+        entry = self._find_entry(titles)
+        if entry is None:
+            return []
+        start, end = int(self.offsets[entry]), int(self.offsets[entry + 1])
+        if k is not None:
+            end = min(end, start + k)
+        return [
+            (self.titles[self.consequents[i]].decode("utf-8"), float(self.lift[i]), float(self.confidence[i]))
+            for i in range(start, end)
+        ]
@@ -1,34 +1,73 @@
 import pandas as pd
 import os
-import itertools
-from collections import Counter
+from association_mining import BOOK_ITEMSET_FILES, mine_association_rules, itemset_rows
+from incidence_matrix import load_incidence_matrix
+from rule_metrics import evaluate_rules
+from schema import load_tables
+from duplicate_masters import merge_duplicate_masters, canonical_labels
+from output_io import write_output
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DATASET_DIR = os.path.join(SCRIPT_DIR, "../dataset")
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
 OUTPUT_FILE = "association_analysis.csv"
 
 # Minimum Support Threshold (e.g., 0.01%)
 MIN_SUPPORT = 0.0001
 
+# Rule constraints (frequent_itemsets.csv always lists every frequent itemset)
+MIN_CONFIDENCE = 0.0  # e.g. 0.1
+MIN_LIFT = 0.0        # e.g. 1.0
+MAX_RULES = None      # Keep only the top-K rules by lift (None = all)
+
+# False skips the itemset output so the rule constraints can prune triplet
+# counting (its 3-itemsets would only be the ones that yield a rule)
+WRITE_ITEMSETS = True
+
+# Significance filter: keep rules whose Benjamini-Hochberg adjusted Fisher
+# p-value is at most this (None = keep all, metrics are still reported)
+MAX_Q_VALUE = None
+
+# Read baskets from build_incidence_matrix.py output when it exists
+USE_INCIDENCE_MATRIX = True
+
+# Count copies of duplicate masters (find_duplicate_masters.py) under their canonical master
+MERGE_DUPLICATE_MASTERS = True
+
+# SON partition mining: > 1 splits the baskets into shards mined in a process pool
+# (identical results to serial mining); PARALLEL_WORKERS = None uses every core
+SON_PARTITIONS = 1
+PARALLEL_WORKERS = None
+
+# Itemset output: 'all', 'closed' (lossless, no redundant subsets) or 'maximal'
+ITEMSET_MODE = "all"
+
 def load_data():
     print("Loading data...")
     try:
         # Load necessary files
-        transactions = pd.read_csv(os.path.join(DATASET_DIR, "borrow_transactions.csv"))
-        details = pd.read_csv(os.path.join(DATASET_DIR, "borrow_details.csv"))
-        items = pd.read_csv(os.path.join(DATASET_DIR, "book_items.csv"))
-        masters = pd.read_csv(os.path.join(DATASET_DIR, "book_masters.csv"))
-        return transactions, details, items, masters
+        details, items, masters = load_tables('analyze_book_association')
+        return details, items, masters
     except FileNotFoundError as e:
         print(f"Error loading files: {e}")
-        return None, None, None, None
-
-def analyze_association():
-    transactions_df, details, items, masters = load_data()
-    if transactions_df is None:
-        return
+        return None, None, None
+
+def load_baskets():
+    # Transaction -> sorted list of book titles
+    if USE_INCIDENCE_MATRIX:
+        incidence = load_incidence_matrix()
+        if incidence is not None:
+            print("Loading baskets from the persisted incidence matrix...")
+            titles = incidence.master_titles
+            if MERGE_DUPLICATE_MASTERS:
+                titles = canonical_labels(incidence.master_ids.astype(str), titles)
+            return pd.Series(incidence.baskets(titles), index=incidence.transaction_ids.astype(str))
+
+    details, items, masters = load_data()
+    if details is None:
+        return None
+    if MERGE_DUPLICATE_MASTERS:
+        items, masters = merge_duplicate_masters(items, masters)
 
     print("Processing data...")
 
@@ -42,7 +81,12 @@ def analyze_association():
     transactions_books = df.groupby('borrowId')['title'].apply(lambda x: sorted(list(set(x))))
     
     # Filter transactions with at least 1 book
-    transactions_books = transactions_books[transactions_books.apply(len) >= 1]
+    return transactions_books[transactions_books.apply(len) >= 1]
+
+def analyze_association():
+    transactions_books = load_baskets()
+    if transactions_books is None:
+        return
     
     total_transactions = len(transactions_books)
     print(f"Total transactions for analysis: {total_transactions}")
@@ -51,191 +95,40 @@ def analyze_association():
         print("Not enough data for association analysis.")
         return
 
-    # --- Phase 1: 1-Itemset Generation ---
-    print("\n[Phase 1] Top 1-Itemsets (Single Items)")
-    
-    c1_counts = Counter()
-    for books in transactions_books:
-        for book in books:
-            c1_counts[book] += 1
-            
-    l1_frequent = {}
-    for book, count in c1_counts.items():
-        support = count / total_transactions
-        if support >= MIN_SUPPORT:
-            l1_frequent[book] = support
-            
-    print(f"Found {len(l1_frequent)} frequent 1-itemsets (Min Support: {MIN_SUPPORT})")
-    
-    frequent_items_list = sorted(list(l1_frequent.keys()))
-
-    # --- Phase 2: 2-Itemset Generation ---
-    print("\n[Phase 2] Top 2-Itemsets (Item Pairs)")
-    
-    c2_counts = Counter()
-    
-    # Count 2-itemsets
-    for books in transactions_books:
-        frequent_books_in_tx = [b for b in books if b in l1_frequent]
-        for pair in itertools.combinations(sorted(frequent_books_in_tx), 2):
-            c2_counts[pair] += 1
-            
-    l2_frequent = {}
-    l2_counts_filtered = {}
-    
-    for pair, count in c2_counts.items():
-        support = count / total_transactions
-        if support >= MIN_SUPPORT:
-            l2_frequent[pair] = support
-            l2_counts_filtered[pair] = count
-            
-    print(f"Found {len(l2_frequent)} frequent 2-itemsets (Min Support: {MIN_SUPPORT})")
-
-    # --- Phase 3: 3-Itemset Generation ---
-    print("\n[Phase 3] Top 3-Itemsets (Item Triplets)")
-    
-    c3_counts = Counter()
-    
-    # Simple generation: iterate transactions and find triplets of frequent items
-    # Optimization: A triplet is candidate only if all its pairs are in L2 (Apriori Property)
-    # But for simplicity and speed on small data, we can just checking combos in transactions directly 
-    # and strictly filtering by min_support is efficient enough here.
-    
-    for books in transactions_books:
-        # We only care about books that are involved in at least one frequent pair (L2)
-        # Or simpler: books that are in L1.
-        frequent_books_in_tx = [b for b in books if b in l1_frequent]
-        
-        # We need at least 3 items to form a triplet
-        if len(frequent_books_in_tx) < 3:
-            continue
-            
-        for triplet in itertools.combinations(sorted(frequent_books_in_tx), 3):
-            # Optimization check: logic check, are all subsets frequent?
-            # subset_pairs = itertools.combinations(triplet, 2)
-            # if all(pair in l2_frequent for pair in subset_pairs):
-            c3_counts[triplet] += 1
-
-    l3_frequent = {}
-    l3_counts_filtered = {}
-    
-    for triplet, count in c3_counts.items():
-        support = count / total_transactions
-        if support >= MIN_SUPPORT:
-            l3_frequent[triplet] = support
-            l3_counts_filtered[triplet] = count
-            
-    print(f"Found {len(l3_frequent)} frequent 3-itemsets (Min Support: {MIN_SUPPORT})")
+    itemset_counts, results, candidates = mine_association_rules(
+        transactions_books.tolist(),
+        MIN_SUPPORT,
+        min_confidence=MIN_CONFIDENCE,
+        min_lift=MIN_LIFT,
+        max_rules=MAX_RULES,
+        itemset_mode=ITEMSET_MODE,
+        n_partitions=SON_PARTITIONS,
+        n_workers=PARALLEL_WORKERS,
+        complete_itemsets=WRITE_ITEMSETS,
+        with_candidates=True
+    )
 
     # --- Save Frequent Itemsets to CSV ---
-    itemset_rows = []
-
-    # L1
-    for item, support in l1_frequent.items():
-        itemset_rows.append({
-            'Itemset': item,
-            'Itemset_Size': 1,
-            'Count': int(support * total_transactions),
-            'Support': round(support, 4)
-        })
-
-    # L2
-    for pair, support in l2_frequent.items():
-        itemset_rows.append({
-            'Itemset': ' | '.join(pair),
-            'Itemset_Size': 2,
-            'Count': l2_counts_filtered[pair],
-            'Support': round(support, 4)
-        })
-
-    # L3
-    for triplet, support in l3_frequent.items():
-        itemset_rows.append({
-            'Itemset': ' | '.join(triplet),
-            'Itemset_Size': 3,
-            'Count': l3_counts_filtered[triplet],
-            'Support': round(support, 4)
-        })
-
-    itemsets_df = pd.DataFrame(itemset_rows)
-    itemsets_df = itemsets_df.sort_values(by=['Itemset_Size', 'Support'], ascending=[True, False])
-    
-    itemset_output_path = os.path.join(OUTPUT_DIR, "frequent_itemsets.csv")
-    itemsets_df.to_csv(itemset_output_path, index=False)
-    print(f"Frequent itemsets saved to {itemset_output_path}")
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    if WRITE_ITEMSETS:
+        itemsets_df = pd.DataFrame(itemset_rows(itemset_counts, total_transactions))
+        itemsets_df = itemsets_df.sort_values(by=['Itemset_Size', 'Support'], ascending=[True, False])
+
+        itemset_output_path = write_output(itemsets_df, BOOK_ITEMSET_FILES[ITEMSET_MODE])
+        print(f"Frequent itemsets saved to {itemset_output_path}")
     
-    # --- Generate Association Rules ---
     print("\n[Phase 4] Generating Association Rules")
-    
-    results = []
-    
-    # Rules from L2: {A} -> {B}
-    for pair, support_ab in l2_frequent.items():
-        book_a, book_b = pair
-        count = l2_counts_filtered[pair]
-        
-        support_a = l1_frequent[book_a]
-        support_b = l1_frequent[book_b]
-        
-        # A -> B
-        results.append({
-            'Antecedent': book_a,
-            'Consequent': book_b,
-            'Support': round(support_ab, 4),
-            'Confidence': round(support_ab / support_a, 4),
-            'Lift': round(support_ab / (support_a * support_b), 4),
-            'Count': count
-        })
-        
-        # B -> A
-        results.append({
-            'Antecedent': book_b,
-            'Consequent': book_a,
-            'Support': round(support_ab, 4),
-            'Confidence': round(support_ab / support_b, 4),
-            'Lift': round(support_ab / (support_a * support_b), 4),
-            'Count': count
-        })
-
-    # Rules from L3: {A, B} -> {C}
-    for triplet, support_abc in l3_frequent.items():
-        count = l3_counts_filtered[triplet]
-        
-        # For a triplet {A, B, C}, potential rules are:
-        # {A, B} -> C
-        # {A, C} -> B
-        # {B, C} -> A
-        
-        for consequent in triplet:
-            antecedent_tuple = tuple(sorted(x for x in triplet if x != consequent))
-            
-            # Use L2 support for antecedent
-            support_antecedent = l2_frequent.get(antecedent_tuple)
-            support_consequent = l1_frequent[consequent]
-            
-            if support_antecedent:
-                confidence = support_abc / support_antecedent
-                lift = support_abc / (support_antecedent * support_consequent)
-                
-                results.append({
-                    'Antecedent': ' | '.join(antecedent_tuple),
-                    'Consequent': consequent,
-                    'Support': round(support_abc, 4),
-                    'Confidence': round(confidence, 4),
-                    'Lift': round(lift, 4),
-                    'Count': count
-                })
-
-    results_df = pd.DataFrame(results)
+    print(f"Generated {len(results)} rules (Min Confidence: {MIN_CONFIDENCE}, Min Lift: {MIN_LIFT}, Max Rules: {MAX_RULES})")
+
+    # Fisher_Q is adjusted over every candidate rule, not just the ones the constraints kept
+    results_df = evaluate_rules(pd.DataFrame(results), total_transactions, MAX_Q_VALUE, pd.DataFrame(candidates))
     
     if not results_df.empty:
         results_df = results_df.sort_values(by=['Lift', 'Confidence'], ascending=[False, False])
         
-        if not os.path.exists(OUTPUT_DIR):
-            os.makedirs(OUTPUT_DIR)
-            
-        output_path = os.path.join(OUTPUT_DIR, OUTPUT_FILE)
-        results_df.to_csv(output_path, index=False)
+        output_path = write_output(results_df, OUTPUT_FILE)
         print(f"Association analysis saved to {output_path}")
         
         print("\nTop 10 Association Rules:")
@@ -244,4 +137,10 @@ def analyze_association():
         print("No association rules found meeting the criteria.")
 
 if __name__ == "__main__":
-    analyze_association()
+    # --sample [FRACTION]: fast estimate with error bounds (preview_analysis.py)
+    from preview_analysis import parse_sample_fraction, run_preview
+    sample_fraction = parse_sample_fraction()
+    if sample_fraction is not None:
+        run_preview(sample_fraction, ['association'])
+    else:
+        analyze_association()
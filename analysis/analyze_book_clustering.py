@@ -5,38 +5,50 @@ import seaborn as sns
 import os
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
+from incidence_matrix import load_incidence_matrix
+from schema import SCRIPT_COLUMNS, read_table
+from output_io import write_output
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DATASET_DIR = os.path.join(SCRIPT_DIR, "../dataset")
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
 VIS_DIR = os.path.join(SCRIPT_DIR, "visualizations")
 
-def load_data():
+def load_data(incidence=None):
+    # Borrow details and items are only read when there is no current incidence matrix
     print("Loading data...")
+    tables = SCRIPT_COLUMNS['analyze_book_clustering']
+    if incidence is not None:
+        tables = {name: columns for name, columns in tables.items() if name not in ('borrow_details', 'book_items')}
     try:
-        details = pd.read_csv(os.path.join(DATASET_DIR, "borrow_details.csv"))
-        items = pd.read_csv(os.path.join(DATASET_DIR, "book_items.csv"))
-        masters = pd.read_csv(os.path.join(DATASET_DIR, "book_masters.csv"))
-        categories = pd.read_csv(os.path.join(DATASET_DIR, "categorys.csv"))
-        return details, items, masters, categories
+        loaded = {name: read_table(name, columns) for name, columns in tables.items()}
     except FileNotFoundError as e:
         print(f"Error loading files: {e}")
         return None, None, None, None
+    return loaded.get('borrow_details'), loaded.get('book_items'), loaded['book_masters'], loaded['categorys']
 
 def analyze_clustering():
-    details, items, masters, categories = load_data()
-    if details is None:
+    incidence = load_incidence_matrix()
+    details, items, masters, categories = load_data(incidence)
+    if masters is None:
         return
 
     print("Preprocessing data for Clustering...")
 
     # 1. Feature Engineering: Borrow Frequency
-    # Merge details -> items -> masters to get borrow count per masterId
-    merged = details.merge(items[['id', 'masterId']], left_on='bookItemId', right_on='id', how='left')
-    
-    # Count borrows per book master
-    borrow_counts = merged.groupby('masterId').size().reset_index(name='BorrowCount')
+    if incidence is not None:
+        # Column sums of the persisted incidence matrix (no rebuild needed)
+        borrow_counts = pd.DataFrame({
+            'masterId': incidence.master_ids.astype(str),
+            'BorrowCount': incidence.borrow_counts()
+        })
+        borrow_counts = borrow_counts[borrow_counts['BorrowCount'] > 0]
+    else:
+        # Merge details -> items -> masters to get borrow count per masterId
+        merged = details.merge(items[['id', 'masterId']], left_on='bookItemId', right_on='id', how='left')
+        
+        # Count borrows per book master
+        borrow_counts = merged.groupby('masterId').size().reset_index(name='BorrowCount')
     
     # Merge with Masters to get other features (Year, Category)
     book_features = masters.merge(borrow_counts, left_on='id', right_on='masterId', how='left')
@@ -99,8 +111,7 @@ def analyze_clustering():
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
     
-    output_path = os.path.join(OUTPUT_DIR, "book_clustering.csv")
-    df_model.to_csv(output_path, index=False)
+    output_path = write_output(df_model, "book_clustering.csv")
     print(f"Clustering results saved to {output_path}")
     
     # 5. Visualizations
@@ -1,20 +1,23 @@
 import pandas as pd
 import os
 import datetime
+from output_io import write_output
+from schema import load_tables
+from duplicate_masters import merge_duplicate_masters
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DATASET_DIR = os.path.join(SCRIPT_DIR, "../dataset")
 OUTPUT_FILE = "book_analysis.csv"
 CURRENT_YEAR = datetime.datetime.now().year
 NEW_BOOK_THRESHOLD_YEARS = 3 # Books published in the last 3 years are "New"
 
+# Count copies of duplicate masters (find_duplicate_masters.py) under their canonical master
+MERGE_DUPLICATE_MASTERS = True
+
 def load_data():
     print("Loading data...")
     try:
-        books = pd.read_csv(os.path.join(DATASET_DIR, "book_masters.csv"))
-        items = pd.read_csv(os.path.join(DATASET_DIR, "book_items.csv"))
-        borrows = pd.read_csv(os.path.join(DATASET_DIR, "borrow_details.csv"))
+        books, items, borrows = load_tables('analyze_book_popularity')
         return books, items, borrows
     except FileNotFoundError as e:
         print(f"Error loading files: {e}")
@@ -24,6 +27,8 @@ def analyze_books():
     books, items, borrows = load_data()
     if books is None:
         return
+    if MERGE_DUPLICATE_MASTERS:
+        items, books = merge_duplicate_masters(items, books)
 
     print("Processing data...")
 
@@ -96,9 +101,8 @@ def analyze_books():
     # Select columns for output
     output_df = books_analysis[['id', 'title', 'author', 'year', 'borrow_count', 'category']]
     
-    # Save to CSV
-    output_path = os.path.join(SCRIPT_DIR, "output", OUTPUT_FILE)
-    output_df.to_csv(output_path, index=False)
+    # Save
+    output_path = write_output(output_df, OUTPUT_FILE)
     print(f"Analysis saved to {output_path}")
     
     # Print summary
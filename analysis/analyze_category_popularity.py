@@ -1,18 +1,16 @@
 import pandas as pd
 import os
+from schema import load_tables
+from output_io import write_output
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DATASET_DIR = os.path.join(SCRIPT_DIR, "../dataset")
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
 
 def load_data():
     print("Loading data...")
     try:
-        details = pd.read_csv(os.path.join(DATASET_DIR, "borrow_details.csv"))
-        items = pd.read_csv(os.path.join(DATASET_DIR, "book_items.csv"))
-        masters = pd.read_csv(os.path.join(DATASET_DIR, "book_masters.csv"))
-        categories = pd.read_csv(os.path.join(DATASET_DIR, "categorys.csv"))
+        details, items, masters, categories = load_tables('analyze_category_popularity')
         return details, items, masters, categories
     except FileNotFoundError as e:
         print(f"Error loading files: {e}")
@@ -50,9 +48,14 @@ def analyze_category_popularity():
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
 
-    popularity_path = os.path.join(OUTPUT_DIR, "category_popularity.csv")
-    category_counts.to_csv(popularity_path, index=False)
+    popularity_path = write_output(category_counts, "category_popularity.csv")
     print(f"Category popularity saved to {popularity_path}")
 
 if __name__ == "__main__":
-    analyze_category_popularity()
+    # --sample [FRACTION]: fast estimate with error bounds (preview_analysis.py)
+    from preview_analysis import parse_sample_fraction, run_preview
+    sample_fraction = parse_sample_fraction()
+    if sample_fraction is not None:
+        run_preview(sample_fraction, ['category_popularity'])
+    else:
+        analyze_category_popularity()
@@ -0,0 +1,189 @@
+import pandas as pd
+import numpy as np
+import os
+from item_loans import CONDITIONS, load_item_loans
+from inventory_state import to_epoch_seconds
+from schema import load_tables
+from duplicate_masters import merge_duplicate_masters
+from output_io import write_output
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+TRANSITIONS_FILE = "condition_transitions.csv"
+OUTPUT_FILE = "condition_forecast.csv"
+
+# Usage level of a copy by loans per year in the collection
+USAGE_BINS = [0, 2, 6, np.inf]
+USAGE_LEVELS = ['low', 'medium', 'high']
+
+# Pseudo-counts pulling sparse (category, usage) rows towards the pooled matrix
+PRIOR_STRENGTH = 5.0
+# Loans simulated when summing survival probabilities; copies that are still
+# unlikely to reach Poor after this many loans (e.g. every observed return was
+# Good) get no estimate and poor_reachable = False in the forecast
+MAX_LOANS = 1000
+CENSOR_PROBABILITY = 0.01
+
+# Count copies of duplicate masters (find_duplicate_masters.py) under their canonical master
+MERGE_DUPLICATE_MASTERS = True
+
+SECONDS_PER_DAY = 86400
+POOR = CONDITIONS.index('Poor')
+
+def load_data():
+    print("Loading data...")
+    try:
+        items, masters = load_tables('analyze_condition_degradation')
+        if MERGE_DUPLICATE_MASTERS:
+            items, masters = merge_duplicate_masters(items, masters)
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None, None, None
+    loans = load_item_loans()
+    if loans is None:
+        return None, None, None
+    return items, masters, loans
+
+def condition_codes(values):
+    return pd.Categorical(values, categories=list(CONDITIONS)).codes.astype(np.int64)
+
+def transition_probabilities(counts, prior_strength=PRIOR_STRENGTH):
+    # Row-normalised transition matrices with a Dirichlet prior from the pooled
+    # counts; every row, Poor included (repairs), is estimated from the data and
+    # unseen states stay put
+    n_states = counts.shape[-1]
+    pooled = counts.reshape(-1, n_states, n_states).sum(axis=0)
+    pooled_rows = pooled.sum(axis=1, keepdims=True)
+    pooled_probability = np.where(pooled_rows > 0, pooled / np.maximum(pooled_rows, 1), np.eye(n_states))
+    smoothed = counts + prior_strength * pooled_probability
+    return smoothed / smoothed.sum(axis=-1, keepdims=True)
+
+def expected_loans_to_poor(probability, max_loans=MAX_LOANS, censor_probability=CENSOR_PROBABILITY):
+    # Expected number of loans until a copy first reaches Poor, for every matrix
+    # and starting condition: sum over n of P(not yet Poor after n loans), computed
+    # for all (category, usage) matrices at once with batched matrix products.
+    # A first-passage time only involves the non-Poor rows, so what happens to a
+    # copy after it reaches Poor does not matter here
+    transient = [state for state in range(probability.shape[-1]) if state != POOR]
+    q = probability[..., transient, :][..., :, transient]
+    survival = np.ones(q.shape[:-1])
+    expected = np.zeros(q.shape[:-1])
+    for _ in range(max_loans):
+        expected += survival
+        survival = np.einsum('...ij,...j->...i', q, survival)
+    expected = np.where(survival > censor_probability, np.inf, expected)
+    # Poor itself needs zero loans
+    result = np.zeros(probability.shape[:-1])
+    result[..., transient] = expected
+    return result
+
+def analyze_condition_degradation():
+    items, masters, loans = load_data()
+    if items is None:
+        return
+
+    print("Counting condition transitions...")
+    items = items.merge(masters[['id', 'categoryId']], left_on='masterId', right_on='id', how='left', suffixes=('', '_master'))
+    category_ids = np.array(sorted(items['categoryId'].dropna().unique()))
+    item_category = pd.Index(category_ids).get_indexer(items['categoryId'])
+
+    # Usage level: loans per year since the copy entered the collection (or its first loan)
+    loan_items = pd.Index(items['id']).get_indexer(loans['bookItemId'])
+    loans, loan_items = loans[loan_items >= 0], loan_items[loan_items >= 0]
+    borrowed_at = to_epoch_seconds(loans['borrowedAt'])
+    history_end = int(borrowed_at.max())
+    acquired = items['createdAt'].to_numpy()
+    first_loan = np.full(len(items), np.iinfo(np.int64).max)
+    np.minimum.at(first_loan, loan_items, borrowed_at)
+    acquired = np.minimum(acquired, first_loan)
+    years = np.maximum(history_end - acquired, SECONDS_PER_DAY) / (365 * SECONDS_PER_DAY)
+    item_loans = np.bincount(loan_items, minlength=len(items))
+    loans_per_year = item_loans / years
+    item_usage = np.digitize(loans_per_year, USAGE_BINS[1:-1], right=False)
+
+    # One transition per completed loan: conditionAtBorrow -> conditionAtReturn
+    source = condition_codes(loans['conditionAtBorrow'])
+    target = condition_codes(loans['conditionAtReturn'])
+    valid = (source >= 0) & (target >= 0) & (item_category[loan_items] >= 0)
+    n_states = len(CONDITIONS)
+    counts = np.zeros((len(category_ids), len(USAGE_LEVELS), n_states, n_states))
+    np.add.at(counts, (item_category[loan_items][valid], item_usage[loan_items][valid], source[valid], target[valid]), 1.0)
+
+    probability = transition_probabilities(counts)
+    expected_loans = expected_loans_to_poor(probability)
+
+    # Without a single observed loan that took a copy into Poor the model has
+    # no degradation signal (e.g. every return recorded as Good)
+    pooled = counts.sum(axis=(0, 1))
+    transient = [state for state in range(n_states) if state != POOR]
+    if pooled[transient, POOR].sum() == 0:
+        print(f"Warning: none of the {int(pooled.sum())} recorded returns took a copy into Poor "
+              f"(returns by condition: {dict(zip(CONDITIONS, pooled.sum(axis=0).astype(int)))}); "
+              "no copy gets a days-to-Poor estimate and the DSS replacement signal is skipped")
+
+    category_index, usage_index, from_index, to_index = np.indices(counts.shape).reshape(4, -1)
+    transitions = pd.DataFrame({
+        'categoryId': category_ids[category_index],
+        'usage_level': np.array(USAGE_LEVELS)[usage_index],
+        'from_condition': np.array(CONDITIONS)[from_index],
+        'to_condition': np.array(CONDITIONS)[to_index],
+        'count': counts.ravel().astype(int),
+        'probability': probability.ravel().round(4),
+    })
+
+    # Per-copy forecast from its current condition, category and usage level
+    current = condition_codes(items['condition'])
+    known = (current >= 0) & (item_category >= 0)
+    copy_loans = np.full(len(items), np.nan)
+    copy_loans[known] = expected_loans[item_category[known], item_usage[known], current[known]]
+    # Days per loan from the copy's own rate, or the category average when it was never lent
+    days_per_loan = np.where(item_loans > 0, years * 365 / np.maximum(item_loans, 1), np.nan)
+    # Copies without a catalogued category (item_category -1) take no part in the averages
+    has_category = item_category >= 0
+    category_days = pd.Series(days_per_loan[has_category]).groupby(item_category[has_category]).mean()
+    category_days = pd.Series(item_category).map(category_days).to_numpy(dtype=np.float64)
+    days_per_loan = np.where(np.isnan(days_per_loan), category_days, days_per_loan)
+    with np.errstate(invalid='ignore'):
+        copy_days = np.where(copy_loans == 0, 0.0, copy_loans * days_per_loan)
+    # No observed degradation path: NaN estimates plus an explicit flag, instead of inf
+    poor_reachable = pd.array(np.isfinite(copy_loans), dtype='boolean')
+    poor_reachable[np.isnan(copy_loans)] = pd.NA
+    censored = np.isinf(copy_loans)
+    copy_loans[censored] = np.nan
+    copy_days[censored] = np.nan
+
+    forecast = pd.DataFrame({
+        'bookItemId': items['id'],
+        'masterId': items['masterId'],
+        'categoryId': items['categoryId'],
+        'usage_level': np.array(USAGE_LEVELS)[item_usage],
+        'loans_per_year': loans_per_year.round(3),
+        'condition': items['condition'],
+        'expected_loans_to_poor': np.round(copy_loans, 2),
+        'expected_days_to_poor': np.round(copy_days, 1),
+        'poor_reachable': poor_reachable,
+    })
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    transitions_path = write_output(transitions, TRANSITIONS_FILE)
+    print(f"Condition transition probabilities saved to {transitions_path}")
+
+    output_path = write_output(forecast, OUTPUT_FILE)
+    print(f"Condition forecast saved to {output_path}")
+
+    print("\nPooled Transition Counts (rows: condition at borrow, columns: at return):")
+    print(pd.DataFrame(counts.sum(axis=(0, 1)).astype(int), index=CONDITIONS, columns=CONDITIONS))
+    print("\nExpected Loans until Poor by Current Condition:")
+    print(forecast.groupby('condition').agg(
+        copies=('bookItemId', 'size'),
+        poor_reachable=('poor_reachable', 'sum'),
+        median=('expected_loans_to_poor', 'median'),
+        min=('expected_loans_to_poor', 'min'),
+        max=('expected_loans_to_poor', 'max'),
+    ))
+
+if __name__ == "__main__":
+    analyze_condition_degradation()
@@ -0,0 +1,125 @@
+import pandas as pd
+import numpy as np
+import os
+from item_loans import load_item_loans
+from inventory_state import to_epoch_seconds
+from schema import load_tables
+from duplicate_masters import merge_duplicate_masters, canonicalize_master_ids
+from output_io import write_output
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+OUTPUT_FILE = "copy_utilization.csv"
+
+SECONDS_PER_DAY = 86400
+
+# Count copies of duplicate masters (find_duplicate_masters.py) under their canonical master
+MERGE_DUPLICATE_MASTERS = True
+
+def load_data():
+    print("Loading data...")
+    try:
+        items, masters = load_tables('analyze_copy_utilization')
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None, None, None
+    loans = load_item_loans()
+    if loans is None:
+        return None, None, None
+    if MERGE_DUPLICATE_MASTERS:
+        items, masters = merge_duplicate_masters(items, masters)
+        loans = loans.assign(masterId=canonicalize_master_ids(loans['masterId']).to_numpy())
+    return items, masters, loans
+
+def concurrency_sweep(masters, starts, ends, n_masters):
+    # Sort-and-sweep over +1 (borrow) / -1 (return) events, grouped by master.
+    # Every loan is closed, so each master's block of the global cumulative sum
+    # starts and ends at zero and the running total is its concurrent loans.
+    # Returns the sorted (master, time, concurrent) arrays and the peak per master.
+    event_masters = np.concatenate([masters, masters])
+    times = np.concatenate([starts, ends])
+    deltas = np.concatenate([np.ones(len(starts), dtype=np.int64), -np.ones(len(ends), dtype=np.int64)])
+    # Returns sort before borrows at the same instant
+    order = np.lexsort((deltas, times, event_masters))
+    event_masters, times, deltas = event_masters[order], times[order], deltas[order]
+    concurrent = np.cumsum(deltas)
+
+    peak = np.zeros(n_masters, dtype=np.int64)
+    if len(times):
+        block_starts = np.flatnonzero(np.r_[True, event_masters[1:] != event_masters[:-1]])
+        peak[event_masters[block_starts]] = np.maximum.reduceat(concurrent, block_starts)
+    return event_masters, times, concurrent, peak
+
+def analyze_copy_utilization():
+    items, masters, loans = load_data()
+    if items is None:
+        return
+
+    print("Computing copy utilization...")
+    n_masters = len(masters)
+    # Loans and copies of masters missing from the catalog are left out before
+    # any per-master aggregation (np.bincount needs valid indices)
+    master_ids = pd.Index(masters['id'])
+    loan_masters = master_ids.get_indexer(loans['masterId'])
+    item_masters = master_ids.get_indexer(items['masterId'])
+    if (loan_masters < 0).any() or (item_masters < 0).any():
+        print(f"Skipping {int((loan_masters < 0).sum())} loans and {int((item_masters < 0).sum())} copies "
+              "whose masterId is not in book_masters")
+    loans, loan_masters = loans[loan_masters >= 0], loan_masters[loan_masters >= 0]
+    items, item_masters = items[item_masters >= 0], item_masters[item_masters >= 0]
+
+    # Observation window: first borrow to last recorded event; open loans run to the end
+    starts = to_epoch_seconds(loans['borrowedAt'])
+    returned_at = to_epoch_seconds(loans['returnedAt'].fillna(loans['borrowedAt']))
+    window_end = int(max(starts.max(), returned_at.max()))
+    window_start = int(starts.min())
+    ends = np.where(loans['returnedAt'].notna().to_numpy(), returned_at, window_end)
+
+    # Copy exposure: time each copy has been in the collection during the window.
+    # A copy lent out before its createdAt counts from its first loan.
+    acquired = items['createdAt'].to_numpy()
+    first_loan = pd.Series(starts).groupby(loans['bookItemId'].to_numpy()).min()
+    acquired = np.minimum(acquired, items['id'].map(first_loan).fillna(np.iinfo(np.int64).max).to_numpy(dtype=np.int64))
+    exposure = np.clip(window_end - np.maximum(acquired, window_start), 0, None)
+    copy_seconds = np.bincount(item_masters, weights=exposure, minlength=n_masters)
+    total_copies = np.bincount(item_masters, minlength=n_masters)
+    first_acquired = np.full(n_masters, window_end, dtype=np.int64)
+    np.minimum.at(first_acquired, item_masters, np.maximum(acquired, window_start))
+
+    loan_seconds = np.bincount(loan_masters, weights=ends - starts, minlength=n_masters)
+
+    event_masters, times, concurrent, peak = concurrency_sweep(loan_masters, starts, ends, n_masters)
+
+    # Stock-out time: intervals during which every copy of the master is on loan
+    durations = np.zeros(len(times), dtype=np.int64)
+    same_master = event_masters[1:] == event_masters[:-1]
+    durations[:-1] = np.where(same_master, times[1:] - times[:-1], 0)
+    stocked_out = (concurrent >= total_copies[event_masters]) & (concurrent > 0)
+    stockout_seconds = np.bincount(event_masters[stocked_out], weights=durations[stocked_out], minlength=n_masters)
+    master_window = np.maximum(window_end - first_acquired, 1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        utilization = np.where(copy_seconds > 0, loan_seconds / copy_seconds, 0.0)
+
+    result = masters[['id', 'title']].rename(columns={'id': 'masterId'})
+    result['total_copies'] = total_copies
+    result['loans'] = np.bincount(loan_masters, minlength=n_masters)
+    result['loan_days'] = (loan_seconds / SECONDS_PER_DAY).round(2)
+    result['utilization'] = np.clip(utilization, 0.0, 1.0).round(4)
+    result['peak_concurrent_loans'] = peak
+    result['stockout_fraction'] = np.where(total_copies > 0, stockout_seconds / master_window, 0.0).round(4)
+    result = result.sort_values(by=['utilization', 'peak_concurrent_loans'], ascending=[False, False])
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    output_path = write_output(result, OUTPUT_FILE)
+    window_days = (window_end - window_start) / SECONDS_PER_DAY
+    print(f"Copy utilization over {window_days:.0f} days saved to {output_path}")
+
+    print("\nMost Utilized Books:")
+    print(result.head(10))
+
+if __name__ == "__main__":
+    analyze_copy_utilization()
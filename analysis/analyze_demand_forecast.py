@@ -0,0 +1,100 @@
+import pandas as pd
+import numpy as np
+import os
+from item_loans import load_item_loans
+from forecasting import forecast_demand
+from schema import load_tables
+from duplicate_masters import merge_duplicate_masters
+from output_io import write_output
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+OUTPUT_FILE = "demand_forecast.csv"
+
+FORECAST_HORIZON = 3  # Months ahead
+SEASON_LENGTH = 12    # Seasonal indices are only used with >= 2 full years of history
+
+# Count copies of duplicate masters (find_duplicate_masters.py) under their canonical master
+MERGE_DUPLICATE_MASTERS = True
+
+def load_data():
+    print("Loading data...")
+    try:
+        masters, categories = load_tables('analyze_demand_forecast')
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None, None, None
+    loans = load_item_loans()
+    if loans is None:
+        return None, None, None
+    if MERGE_DUPLICATE_MASTERS:
+        # Loans carry the masterId of their copy, so they are re-pointed like copies
+        loans, masters = merge_duplicate_masters(loans, masters)
+    return masters, categories, loans
+
+def monthly_matrix(codes, months, n_series, n_months):
+    # (n_series, n_months) borrow counts built with one scatter-add
+    matrix = np.zeros((n_series, n_months), dtype=np.float64)
+    valid = codes >= 0
+    np.add.at(matrix, (codes[valid], months[valid]), 1.0)
+    return matrix
+
+def forecast_frame(level, ids, names, history, result):
+    return pd.DataFrame({
+        'level': level,
+        'id': ids,
+        'name': names,
+        'history_total': history.sum(axis=1).astype(int),
+        'last_month': history[:, -1].astype(int),
+        'method': result['method'],
+        'alpha': result['alpha'],
+        'adi': np.round(result['adi'], 2),
+        'forecast_next_month': np.round(result['forecast'][:, 0], 3),
+        'forecast_horizon_total': np.round(result['forecast'].sum(axis=1), 3),
+    })
+
+def analyze_demand_forecast():
+    masters, categories, loans = load_data()
+    if masters is None:
+        return
+
+    print("Building monthly borrow series...")
+    borrowed_at = loans['borrowedAt']
+    month_ordinals = (borrowed_at.dt.year * 12 + borrowed_at.dt.month - 1).to_numpy()
+    month_codes = month_ordinals - month_ordinals.min()
+    month_range = pd.period_range(borrowed_at.min().to_period('M'), borrowed_at.max().to_period('M'), freq='M')
+    n_months = len(month_range)
+
+    master_codes = pd.Index(masters['id']).get_indexer(loans['masterId'])
+    master_history = monthly_matrix(master_codes, month_codes, len(masters), n_months)
+
+    # Category series are sums of their masters' rows
+    category_codes = pd.Index(categories['id']).get_indexer(masters['categoryId'])
+    category_history = np.zeros((len(categories), n_months))
+    known = category_codes >= 0
+    np.add.at(category_history, category_codes[known], master_history[known])
+
+    print(f"Forecasting {len(masters)} master and {len(categories)} category series "
+          f"over {n_months} months ({month_range[0]} to {month_range[-1]})...")
+    master_result = forecast_demand(master_history, FORECAST_HORIZON, SEASON_LENGTH)
+    category_result = forecast_demand(category_history, FORECAST_HORIZON, SEASON_LENGTH)
+
+    forecast = pd.concat([
+        forecast_frame('master', masters['id'], masters['title'], master_history, master_result),
+        forecast_frame('category', categories['id'], categories['name'], category_history, category_result),
+    ], ignore_index=True)
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    output_path = write_output(forecast, OUTPUT_FILE)
+    print(f"Demand forecast saved to {output_path}")
+
+    print("\nForecast methods used:")
+    print(forecast.groupby('level')['method'].value_counts())
+    print("\nCategory Forecasts:")
+    print(forecast[forecast['level'] == 'category'].sort_values('forecast_next_month', ascending=False).head(10))
+
+if __name__ == "__main__":
+    analyze_demand_forecast()
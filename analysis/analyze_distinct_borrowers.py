@@ -0,0 +1,131 @@
+import pandas as pd
+import numpy as np
+import os
+from sketches import HyperLogLog
+from schema import load_tables
+from duplicate_masters import merge_duplicate_masters
+from output_io import write_output
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+OUTPUT_FILE = "distinct_borrowers.csv"
+SKETCH_FILE = "distinct_borrower_sketches.npz"
+
+# 2^12 registers -> ~1.6% standard error; sparse storage keeps small groups cheap
+HLL_PRECISION = 12
+
+# Count copies of duplicate masters (find_duplicate_masters.py) under their canonical master
+MERGE_DUPLICATE_MASTERS = True
+
+def load_data():
+    print("Loading data...")
+    try:
+        transactions, details, items, masters, categories = load_tables('analyze_distinct_borrowers')
+        if MERGE_DUPLICATE_MASTERS:
+            items, masters = merge_duplicate_masters(items, masters)
+        return transactions, details, items, masters, categories
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None, None, None, None, None
+
+def build_partition_sketch(keys, months, students):
+    # One sketch per (key, month) partition; returns the sketch and its labels
+    partition = pd.MultiIndex.from_arrays([keys, months])
+    codes, labels = pd.factorize(partition)
+    sketch = HyperLogLog(HLL_PRECISION)
+    sketch.add(students, codes)
+    return sketch, labels.get_level_values(0).to_numpy(), labels.get_level_values(1).to_numpy()
+
+def merge_partitions(sketch, partition_keys, partition_months, months=None):
+    # Merge month partitions into one sketch per key, optionally restricted to some months
+    if months is not None:
+        selected = np.isin(partition_months, months)
+        subset = HyperLogLog(sketch.precision)
+        keep = selected[sketch.groups]
+        subset.groups = sketch.groups[keep]
+        subset.registers = sketch.registers[keep]
+        subset.ranks = sketch.ranks[keep]
+        sketch = subset
+    key_codes, key_labels = pd.factorize(partition_keys)
+    merged = sketch.regroup(key_codes)
+    return pd.Series(merged.estimate(len(key_labels)), index=key_labels)
+
+def clip_to_borrows(estimates, borrow_counts):
+    # A group cannot have more distinct borrowers than loans; HLL noise on small
+    # groups can overshoot, so estimates are capped at the exact borrow count
+    return np.minimum(np.asarray(estimates).round().astype(int), np.asarray(borrow_counts))
+
+def load_partition_sketches(kind, months=None):
+    # kind is 'master' or 'category'; months e.g. ['2025-01', '2025-02']
+    path = os.path.join(OUTPUT_DIR, f"{kind}_{SKETCH_FILE}")
+    sketch, labels = HyperLogLog.load(path)
+    return merge_partitions(sketch, labels['keys'], labels['months'], months)
+
+def analyze_distinct_borrowers():
+    transactions, details, items, masters, categories = load_data()
+    if transactions is None:
+        return
+
+    print("Processing data for Distinct Borrowers...")
+
+    # Borrow Details -> Transactions (student, month) -> Items -> Masters
+    merged = details[['borrowId', 'bookItemId']].merge(
+        transactions[['id', 'studentId', 'borrowedAt']], left_on='borrowId', right_on='id', how='inner')
+    merged = merged.merge(items[['id', 'masterId']], left_on='bookItemId', right_on='id', how='left', suffixes=('', '_item'))
+    merged = merged.merge(masters[['id', 'categoryId']], left_on='masterId', right_on='id', how='left', suffixes=('', '_master'))
+    merged = merged.dropna(subset=['masterId', 'categoryId'])
+    merged['month'] = pd.to_datetime(merged['borrowedAt'], unit='s').dt.strftime('%Y-%m')
+
+    students = merged['studentId'].to_numpy()
+    months = merged['month'].to_numpy()
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    # Per (master, month) and (category, month) partition sketches, persisted for later merges
+    results = {}
+    for kind, column in [('master', 'masterId'), ('category', 'categoryId')]:
+        sketch, keys, partition_months = build_partition_sketch(merged[column].to_numpy(), months, students)
+        sketch.save(os.path.join(OUTPUT_DIR, f"{kind}_{SKETCH_FILE}"), keys=keys.astype(str), months=partition_months.astype(str))
+        results[kind] = merge_partitions(sketch, keys, partition_months)
+        print(f"{kind.capitalize()} sketches: {len(keys)} partitions, {len(sketch.ranks)} stored registers")
+
+    # Per month distinct borrowers across the whole library
+    month_sketch = HyperLogLog(HLL_PRECISION)
+    month_codes, month_labels = pd.factorize(months)
+    month_sketch.add(students, month_codes)
+    monthly = pd.DataFrame({'month': month_labels, 'distinct_borrowers': month_sketch.estimate(len(month_labels))})
+    monthly = monthly.merge(merged.groupby('month').size().reset_index(name='borrow_count'), on='month')
+    monthly['distinct_borrowers'] = clip_to_borrows(monthly['distinct_borrowers'], monthly['borrow_count'])
+    monthly = monthly.sort_values('month')[['month', 'borrow_count', 'distinct_borrowers']]
+
+    # Books: borrow counts kept alongside distinct borrower estimates
+    book_counts = merged.groupby('masterId').size().reset_index(name='borrow_count')
+    book_counts['distinct_borrowers'] = clip_to_borrows(
+        results['master'].reindex(book_counts['masterId']), book_counts['borrow_count'])
+    book_counts = book_counts.merge(masters[['id', 'title']].rename(columns={'id': 'masterId'}), on='masterId', how='left')
+    book_counts = book_counts[['masterId', 'title', 'borrow_count', 'distinct_borrowers']]
+    book_counts = book_counts.sort_values(by=['distinct_borrowers', 'borrow_count'], ascending=False)
+
+    category_counts = merged.groupby('categoryId').size().reset_index(name='borrow_count')
+    category_counts['distinct_borrowers'] = clip_to_borrows(
+        results['category'].reindex(category_counts['categoryId']), category_counts['borrow_count'])
+    category_counts = category_counts.merge(
+        categories[['id', 'name']].rename(columns={'id': 'categoryId', 'name': 'category'}), on='categoryId', how='left')
+    category_counts = category_counts[['categoryId', 'category', 'borrow_count', 'distinct_borrowers']]
+    category_counts = category_counts.sort_values(by='distinct_borrowers', ascending=False)
+
+    output_path = write_output(book_counts, OUTPUT_FILE)
+    write_output(category_counts, "category_distinct_borrowers.csv")
+    write_output(monthly, "monthly_distinct_borrowers.csv")
+    print(f"Distinct borrower analysis saved to {output_path}")
+    print(f"HyperLogLog relative standard error: {month_sketch.relative_error:.2%}")
+
+    print("\nTop 10 Books by Distinct Borrowers:")
+    print(book_counts.head(10))
+    print("\nCategories by Distinct Borrowers:")
+    print(category_counts)
+
+if __name__ == "__main__":
+    analyze_distinct_borrowers()
@@ -2,6 +2,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+from partitioned_tables import load_tables_in_range, month_bounds
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -9,6 +10,11 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 DATA_DIR = os.path.join(PROJECT_ROOT, "dataset")
 VIS_DIR = os.path.join(SCRIPT_DIR, "visualizations")
 
+# Borrowings to check, inclusive 'YYYY-MM' (None = open-ended). Returns are read
+# from START_MONTH onward since none can precede its borrowing.
+START_MONTH = None
+END_MONTH = None
+
 if not os.path.exists(VIS_DIR):
     os.makedirs(VIS_DIR)
 
@@ -24,20 +30,16 @@ def analyze_late_returns():
         print(f"Error: Required files not found.")
         return
 
-    df_borrow = pd.read_csv(borrow_path)
-    df_return = pd.read_csv(return_path)
-    df_students = pd.read_csv(students_path)
+    start, end = month_bounds(START_MONTH, END_MONTH)
+    df_borrow, df_return, df_students = load_tables_in_range(
+        'analyze_late_returns', start, end, ranges={'return_transactions': (start, None)})
     
     # Merge borrow and return transactions
     # borrow_transactions.id linked to return_transactions.borrowId
     df_merged = pd.merge(df_borrow, df_return, left_on='id', right_on='borrowId', how='inner', suffixes=('_borrow', '_return'))
     
-    # Convert dates to datetime
-    df_merged['dueDate'] = pd.to_datetime(df_merged['dueDate'])
-    df_merged['returnedAt'] = pd.to_datetime(df_merged['returnedAt'])
-    
     # Identify late returns
-    # Late if returnedAt > dueDate
+    # Late if returnedAt > dueDate (both epoch seconds)
     df_merged['is_late'] = df_merged['returnedAt'] > df_merged['dueDate']
     
     # Filter only late returns
@@ -0,0 +1,114 @@
+import pandas as pd
+import numpy as np
+import os
+from item_loans import load_item_loans
+from schema import load_tables
+from partitioned_tables import month_bounds
+from output_io import write_output
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+LOANS_TABLE = "loan_durations"
+SUMMARY_TABLE = "lateness_summary"
+
+QUANTILES = [0.5, 0.9, 0.95]
+
+# Loans to include by borrow month, inclusive 'YYYY-MM' (None = open-ended)
+BORROWED_FROM_MONTH = None
+BORROWED_TO_MONTH = None
+
+def load_data():
+    print("Loading data...")
+    try:
+        (masters,) = load_tables('analyze_loan_durations')
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None, None
+    start, end = month_bounds(BORROWED_FROM_MONTH, BORROWED_TO_MONTH)
+    loans = load_item_loans(start=start, end=end)
+    if loans is None:
+        return None, None
+    return masters, loans
+
+def loan_durations(loans, as_of):
+    # Item-level durations in days; open loans are measured up to `as_of`
+    loans = loans.copy()
+    loans['is_open'] = loans['returnedAt'].isna()
+    end = loans['returnedAt'].fillna(as_of)
+    loans['duration_days'] = (end - loans['borrowedAt']).dt.total_seconds() / 86400
+    loans['days_late'] = ((end - loans['dueDate']).dt.total_seconds() / 86400).clip(lower=0)
+    loans['is_late'] = loans['days_late'] > 0
+    return loans
+
+def lateness_summary(loans):
+    # Per-student, per-book and per-category statistics in one grouped pass
+    # over a long table with one row per (level, key, loan). Durations and
+    # lateness only cover returned loans; open loans (measured up to as_of, so
+    # censored) are reported apart as open_loans and open_days_overdue (mean
+    # days past due so far)
+    levels = {'student': 'studentId', 'book': 'masterId', 'category': 'categoryId'}
+    is_open = loans['is_open'].to_numpy()
+    returned = np.where(is_open, np.nan, 1.0)
+    long = pd.concat([
+        pd.DataFrame({
+            'level': level,
+            'key': loans[column].to_numpy(),
+            'is_open': is_open,
+            'duration_days': loans['duration_days'].to_numpy() * returned,
+            'days_late': loans['days_late'].to_numpy() * returned,
+            'is_late': loans['is_late'].to_numpy() * returned,
+            'open_days_overdue': np.where(is_open, loans['days_late'].to_numpy(), np.nan),
+        })
+        for level, column in levels.items()
+    ], ignore_index=True).dropna(subset=['key'])
+
+    grouped = long.groupby(['level', 'key'], sort=True)
+    summary = grouped.agg(
+        returned_loans=('duration_days', 'count'),
+        late_loans=('is_late', 'sum'),
+        late_rate=('is_late', 'mean'),
+        mean_duration_days=('duration_days', 'mean'),
+        mean_days_late=('days_late', 'mean'),
+        max_days_late=('days_late', 'max'),
+        open_loans=('is_open', 'sum'),
+        open_days_overdue=('open_days_overdue', 'mean'),
+    ).astype({'late_loans': int, 'open_loans': int})
+    quantiles = grouped[['duration_days', 'days_late']].quantile(QUANTILES).unstack()
+    quantiles.columns = [f"{column}_p{int(round(q * 100))}" for column, q in quantiles.columns]
+    return summary.join(quantiles).reset_index().round(3)
+
+def analyze_loan_durations():
+    masters, loans = load_data()
+    if masters is None:
+        return
+
+    print("Computing item-level loan durations...")
+    as_of = max(loans['borrowedAt'].max(), loans['returnedAt'].max())
+    loans = loans.merge(masters[['id', 'categoryId']].rename(columns={'id': 'masterId'}), on='masterId', how='left')
+    loans = loan_durations(loans, as_of)
+
+    print("Summarising lateness per student, book and category...")
+    summary = lateness_summary(loans)
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    loan_columns = ['borrowId', 'bookItemId', 'masterId', 'categoryId', 'studentId', 'borrowedAt', 'dueDate',
+                    'returnedAt', 'is_open', 'duration_days', 'days_late', 'is_late', 'notes']
+    loans_path = write_output(loans[loan_columns].round({'duration_days': 3, 'days_late': 3}), LOANS_TABLE)
+    print(f"Item-level loan durations saved to {loans_path}")
+    summary_path = write_output(summary, SUMMARY_TABLE)
+    print(f"Lateness summary saved to {summary_path}")
+
+    closed = loans[~loans['is_open']]
+    print(f"\nItem loans: {len(loans)} ({loans['is_open'].sum()} open as of {as_of})")
+    print(f"Late returns: {closed['is_late'].sum()} of {len(closed)} returned items")
+    print("\nDuration distribution (days, returned items):")
+    print(closed['duration_days'].describe(percentiles=QUANTILES).round(2))
+    print("\nStudents with the highest 90th percentile lateness (returned loans):")
+    students = summary[summary['level'] == 'student'].sort_values('days_late_p90', ascending=False)
+    print(students[['key', 'returned_loans', 'late_loans', 'days_late_p50', 'days_late_p90', 'max_days_late', 'open_loans']].head(10))
+
+if __name__ == "__main__":
+    analyze_loan_durations()
@@ -2,6 +2,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+from partitioned_tables import load_tables_in_range, month_bounds
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -9,6 +10,11 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 DATA_DIR = os.path.join(PROJECT_ROOT, "dataset")
 VIS_DIR = os.path.join(SCRIPT_DIR, "visualizations")
 
+# Months to chart, inclusive 'YYYY-MM' (None = open-ended). With the layout from
+# build_partitioned_tables.py only those months' partitions are read.
+START_MONTH = None
+END_MONTH = None
+
 if not os.path.exists(VIS_DIR):
     os.makedirs(VIS_DIR)
 
@@ -21,10 +27,10 @@ def analyze_monthly_trend():
         print(f"Error: File not found at {transactions_path}")
         return
 
-    df = pd.read_csv(transactions_path)
+    (df,) = load_tables_in_range('analyze_monthly_trend', *month_bounds(START_MONTH, END_MONTH))
     
-    # Convert 'borrowedAt' to datetime
-    df['borrowedAt'] = pd.to_datetime(df['borrowedAt'])
+    # Convert 'borrowedAt' (epoch seconds) to datetime
+    df['borrowedAt'] = pd.to_datetime(df['borrowedAt'], unit='s')
     
     # Extract month (YYYY-MM)
     df['month'] = df['borrowedAt'].dt.to_period('M').astype(str)
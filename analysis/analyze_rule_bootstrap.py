@@ -0,0 +1,130 @@
+import pandas as pd
+import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
+from scipy import sparse
+from incidence_matrix import load_incidence_matrix
+from schema import load_tables
+from output_io import read_output, write_output
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+RULES_FILE = "association_analysis.csv"
+OUTPUT_FILE = "association_bootstrap.csv"
+
+N_BOOTSTRAP = 1000        # Bootstrap replicates
+CONFIDENCE_LEVEL = 0.95   # Two-sided percentile interval
+BATCH_SIZE = 100          # Replicates per weights matrix (bounds memory)
+PARALLEL_WORKERS = None   # Processes for the batches (None = every core, 1 = serial)
+SEED = 42
+
+def load_data():
+    print("Loading data...")
+    try:
+        rules = read_output(RULES_FILE)
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e} (run analyze_book_association.py first)")
+        return None, None, None
+    incidence = load_incidence_matrix()
+    if incidence is not None:
+        print("Using the persisted incidence matrix...")
+        return rules, incidence.to_csr(binary=True), incidence.master_titles.astype(str)
+    try:
+        details, items, masters = load_tables('analyze_rule_bootstrap')
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None, None, None
+    # Same transaction x master layout as build_incidence_matrix.py
+    merged = details.merge(items[['id', 'masterId']], left_on='bookItemId', right_on='id', how='left')
+    columns = pd.Index(masters['id']).get_indexer(merged['masterId'])
+    merged = merged[columns >= 0]
+    rows, _ = pd.factorize(merged['borrowId'], sort=True)
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, columns[columns >= 0])),
+                               shape=(rows.max() + 1, len(masters)))
+    matrix.data[:] = 1
+    return rules, matrix, masters['title'].astype(str).to_numpy()
+
+def rule_indicators(rules, matrix, master_titles):
+    # Sparse (transactions x rules) 0/1 matrices: antecedent present, consequent
+    # present, and both present
+    title_codes, titles = pd.factorize(master_titles)
+    to_titles = sparse.csr_matrix((np.ones(len(title_codes)), (np.arange(len(title_codes)), title_codes)),
+                                  shape=(len(title_codes), len(titles)))
+    has_title = (matrix @ to_titles).tocsc()
+    has_title.data[:] = 1
+    title_index = pd.Index(titles)
+
+    def columns(labels):
+        return has_title[:, title_index.get_indexer(labels)]
+
+    parts = rules['Antecedent'].str.split(' | ', regex=False)
+    first = columns(parts.str[0])
+    second_labels = parts.str[1]
+    second = columns(second_labels.fillna(parts.str[0]))
+    antecedent = first.multiply(second).tocsc()
+    consequent = columns(rules['Consequent'])
+    both = antecedent.multiply(consequent).tocsc()
+    return antecedent, consequent, both
+
+def bootstrap_batch(args):
+    # Multinomial resampling weights (replicates x transactions) applied to the
+    # indicator matrices: every replicate's counts come from one sparse product
+    antecedent, consequent, both, n_replicates, seed = args
+    n = antecedent.shape[0]
+    rng = np.random.default_rng(seed)
+    weights = rng.multinomial(n, np.full(n, 1.0 / n), size=n_replicates).astype(np.float64)
+    n_a = np.asarray((antecedent.T @ weights.T).T)
+    n_b = np.asarray((consequent.T @ weights.T).T)
+    n_ab = np.asarray((both.T @ weights.T).T)
+    # A replicate that drops the antecedent or consequent carries no evidence for
+    # the rule, so its confidence and lift count as 0 rather than being skipped
+    with np.errstate(divide='ignore', invalid='ignore'):
+        support = n_ab / n
+        confidence = np.where(n_a > 0, n_ab / n_a, 0.0)
+        lift = np.where(n_a * n_b > 0, n_ab * n / (n_a * n_b), 0.0)
+    return support.astype(np.float32), confidence.astype(np.float32), lift.astype(np.float32)
+
+def analyze_rule_bootstrap():
+    rules, matrix, master_titles = load_data()
+    if rules is None:
+        return
+    if rules.empty:
+        print("No rules to evaluate.")
+        return
+
+    antecedent, consequent, both = rule_indicators(rules, matrix, master_titles)
+    print(f"Bootstrapping {len(rules)} rules over {matrix.shape[0]} transactions "
+          f"({N_BOOTSTRAP} replicates in batches of {BATCH_SIZE})...")
+
+    seeds = np.random.SeedSequence(SEED).spawn((N_BOOTSTRAP + BATCH_SIZE - 1) // BATCH_SIZE)
+    sizes = [min(BATCH_SIZE, N_BOOTSTRAP - i * BATCH_SIZE) for i in range(len(seeds))]
+    tasks = [(antecedent, consequent, both, size, seed) for size, seed in zip(sizes, seeds)]
+    if PARALLEL_WORKERS == 1:
+        batches = list(map(bootstrap_batch, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=PARALLEL_WORKERS) as executor:
+            batches = list(executor.map(bootstrap_batch, tasks))
+
+    tail = (1.0 - CONFIDENCE_LEVEL) / 2 * 100
+    result = rules.copy()
+    for position, metric in enumerate(['Support', 'Confidence', 'Lift']):
+        replicates = np.vstack([batch[position] for batch in batches])
+        low, high = np.percentile(replicates, [tail, 100 - tail], axis=0)
+        result[f'{metric}_Low'] = np.round(low, 4)
+        result[f'{metric}_High'] = np.round(high, 4)
+
+    # Rank by the pessimistic end of the lift interval instead of the point estimate
+    result = result.sort_values(by=['Lift_Low', 'Count', 'Lift'], ascending=[False, False, False])
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    output_path = write_output(result, OUTPUT_FILE)
+    print(f"Bootstrap confidence intervals saved to {output_path}")
+
+    print(f"\nTop 10 Rules by {CONFIDENCE_LEVEL:.0%} Lower Lift Bound:")
+    print(result[['Antecedent', 'Consequent', 'Count', 'Lift', 'Lift_Low', 'Lift_High']].head(10))
+
+if __name__ == "__main__":
+    analyze_rule_bootstrap()
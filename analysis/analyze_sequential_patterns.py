@@ -0,0 +1,123 @@
+import pandas as pd
+import numpy as np
+import os
+from association_mining import mine_sequential_rules, round_rule
+from incidence_matrix import load_incidence_matrix
+from rule_metrics import evaluate_rules
+from schema import load_tables
+from output_io import write_output
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+OUTPUT_FILE = "sequential_rules.csv"
+PATTERNS_FILE = "sequential_patterns.csv"
+
+# Support is the share of students whose history contains the pattern
+MIN_SUPPORT = 0.03
+MAX_GAP_DAYS = 90        # Max time between consecutive pattern items (None = unlimited)
+MAX_PATTERN_LENGTH = 3
+MIN_CONFIDENCE = 0.0
+MIN_LIFT = 0.0
+MAX_RULES = None
+MAX_Q_VALUE = None       # Benjamini-Hochberg adjusted Fisher p-value filter (None = keep all)
+
+USE_INCIDENCE_MATRIX = True
+
+def load_data():
+    print("Loading data...")
+    try:
+        transactions, details, items, masters = load_tables('analyze_sequential_patterns')
+        return transactions, details, items, masters
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None, None, None, None
+
+def load_transactions():
+    # One row per transaction: studentId, borrow time (epoch seconds), set of titles
+    if USE_INCIDENCE_MATRIX:
+        incidence = load_incidence_matrix()
+        if incidence is not None:
+            print("Loading transactions from the persisted incidence matrix...")
+            students = np.asarray(incidence.transaction_students)
+            frame = pd.DataFrame({
+                'studentId': np.where(students >= 0, incidence.student_ids.astype(str)[students], None),
+                'time': np.asarray(incidence.transaction_borrowed_at),
+                'titles': [set(basket) for basket in incidence.baskets(incidence.master_titles)],
+            })
+            return frame.dropna(subset=['studentId'])
+
+    transactions, details, items, masters = load_data()
+    if transactions is None:
+        return None
+
+    merged = details.merge(items[['id', 'masterId']], left_on='bookItemId', right_on='id', how='left')
+    merged = merged.merge(masters[['id', 'title']], left_on='masterId', right_on='id', how='left')
+    baskets = merged[['borrowId', 'title']].dropna().groupby('borrowId')['title'].apply(set)
+    frame = transactions.set_index('id').join(baskets.rename('titles'), how='inner')
+    return pd.DataFrame({
+        'studentId': frame['studentId'].to_numpy(),
+        'time': frame['borrowedAt'].to_numpy(dtype=np.int64),
+        'titles': frame['titles'].to_numpy(),
+    }).dropna(subset=['studentId'])
+
+def analyze_sequential_patterns():
+    transactions = load_transactions()
+    if transactions is None:
+        return
+
+    # Per-student sequences ordered by borrow time
+    transactions = transactions.sort_values(['studentId', 'time'], kind='stable')
+    sequences = [
+        (group['time'].tolist(), group['titles'].tolist())
+        for _, group in transactions.groupby('studentId', sort=True)
+    ]
+    total_students = len(sequences)
+    print(f"Student sequences for analysis: {total_students} ({len(transactions)} transactions)")
+
+    if total_students == 0:
+        print("Not enough data for sequential pattern mining.")
+        return
+
+    max_gap = MAX_GAP_DAYS * 86400 if MAX_GAP_DAYS is not None else None
+    patterns, rules, candidates = mine_sequential_rules(
+        sequences,
+        MIN_SUPPORT,
+        max_gap=max_gap,
+        max_length=MAX_PATTERN_LENGTH,
+        min_confidence=MIN_CONFIDENCE,
+        min_lift=MIN_LIFT,
+        max_rules=MAX_RULES,
+        with_candidates=True
+    )
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    patterns_df = pd.DataFrame([
+        {'Pattern': ' -> '.join(pattern), 'Pattern_Length': len(pattern), 'Count': count,
+         'Support': round_rule(count / total_students)}
+        for pattern, count in patterns.items()
+    ])
+    if not patterns_df.empty:
+        patterns_df = patterns_df.sort_values(by=['Pattern_Length', 'Support'], ascending=[True, False])
+    patterns_path = write_output(patterns_df, PATTERNS_FILE)
+    print(f"Sequential patterns saved to {patterns_path}")
+
+    print(f"Generated {len(rules)} sequential rules (Min Confidence: {MIN_CONFIDENCE}, Min Lift: {MIN_LIFT}, Max Rules: {MAX_RULES})")
+    # Fisher_Q is adjusted over every candidate rule, not just the ones the constraints kept
+    results_df = evaluate_rules(pd.DataFrame(rules), total_students, MAX_Q_VALUE, pd.DataFrame(candidates))
+
+    if not results_df.empty:
+        results_df = results_df.sort_values(by=['Lift', 'Confidence'], ascending=[False, False])
+
+        output_path = write_output(results_df, OUTPUT_FILE)
+        print(f"Sequential rules saved to {output_path}")
+
+        print("\nTop 10 Sequential Rules (borrowed Antecedent, later borrowed Consequent):")
+        print(results_df.head(10))
+    else:
+        print("No sequential rules found meeting the criteria.")
+
+if __name__ == "__main__":
+    analyze_sequential_patterns()
@@ -0,0 +1,187 @@
+import pandas as pd
+import os
+import joblib
+from sketches import CountMinSketch, SpaceSaving
+from analyze_top_students import plot_top_students
+from schema import load_tables
+from output_io import write_output
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+VIS_DIR = os.path.join(SCRIPT_DIR, "visualizations")
+STATE_FILE = os.path.join(OUTPUT_DIR, "streaming_top_k_state.joblib")
+PLOT_FILE = "streaming_top_student_borrowers.png"
+
+TOP_N = 10
+SKETCH_CAPACITY = 1000    # Space-Saving counters per stream (error <= N / capacity)
+CMS_WIDTH = 2048          # Count-Min epsilon = e / width
+CMS_DEPTH = 5             # Count-Min delta = exp(-depth)
+BATCH_SIZE = 100          # Borrow transactions per micro-batch
+SNAPSHOT_EVERY = 5        # Write the top-N outputs every N micro-batches
+# Resume from the saved sketch state and only consume borrows after its
+# watermark (False = replay the whole history into fresh sketches)
+RESUME_STATE = True
+
+class StreamingTopK:
+    # Keeps approximate top-N books, categories and students over a stream of
+    # borrow events with memory bounded by SKETCH_CAPACITY counters per stream.
+    # Books/categories count borrowed copies (as analyze_top_books does),
+    # students count borrow transactions (as analyze_top_students does).
+
+    def __init__(self, capacity=SKETCH_CAPACITY, cms_width=CMS_WIDTH, cms_depth=CMS_DEPTH):
+        self.books = SpaceSaving(capacity)
+        self.categories = SpaceSaving(capacity)
+        self.students = SpaceSaving(capacity)
+        self.book_cms = CountMinSketch(cms_width, cms_depth)
+        # (borrowedAt, borrowId) of the last consumed transaction
+        self.watermark = None
+
+    def add_borrow(self, student_id, master_ids, category_ids):
+        # One borrow transaction: a student and the masters/categories of its items
+        self.students.add(student_id)
+        for master_id in master_ids:
+            self.books.add(master_id)
+        for category_id in category_ids:
+            self.categories.add(category_id)
+        self.book_cms.add(list(master_ids))
+
+    def add_batch(self, events):
+        # Micro-batch of item-level events with columns borrowId, studentId, masterId, categoryId
+        self.students.add_batch(events.drop_duplicates('borrowId')['studentId'])
+        self.books.add_batch(events['masterId'])
+        self.categories.add_batch(events['categoryId'])
+        self.book_cms.add(events['masterId'].to_numpy())
+        last = events.iloc[-1]
+        self.watermark = (int(last['borrowedAt']), str(last['borrowId']))
+
+    def unseen(self, events):
+        # Events after the watermark; borrows back-dated before it are not picked up
+        if self.watermark is None:
+            return events
+        borrowed_at, borrow_id = self.watermark
+        after = (events['borrowedAt'] > borrowed_at) | \
+                ((events['borrowedAt'] == borrowed_at) & (events['borrowId'].astype(str) > borrow_id))
+        return events[after]
+
+    def save(self, path=STATE_FILE):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        # The sketches (sketches.py) and watermark, so the state loads outside this script too
+        joblib.dump(self.__dict__, path)
+
+    def top_books(self, n=TOP_N):
+        return self._to_frame(self.books, n, 'masterId')
+
+    def top_categories(self, n=TOP_N):
+        return self._to_frame(self.categories, n, 'categoryId')
+
+    def top_students(self, n=TOP_N):
+        return self._to_frame(self.students, n, 'studentId')
+
+    def _to_frame(self, summary, n, key_column):
+        df = pd.DataFrame(summary.top(n), columns=[key_column, 'borrow_count', 'error'])
+        # Guaranteed lower bound on the true count
+        df['min_borrow_count'] = df['borrow_count'] - df['error']
+        df['error_bound'] = round(summary.error_bound(), 2)
+        return df
+
+def load_data():
+    print("Loading data...")
+    try:
+        transactions, details, items, masters, categories, students = load_tables('analyze_streaming_top_k')
+        return transactions, details, items, masters, categories, students
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None, None, None, None, None, None
+
+def load_stream_state(path=STATE_FILE):
+    # Saved sketches from the previous run, or None to start from scratch
+    if not RESUME_STATE or not os.path.exists(path):
+        return None
+    stream = StreamingTopK.__new__(StreamingTopK)
+    stream.__dict__.update(joblib.load(path))
+    return stream
+
+def build_event_stream(transactions, details, items, masters):
+    # Item-level borrow events ordered by borrow time, as they would arrive live
+    events = details[['borrowId', 'bookItemId']].merge(
+        transactions[['id', 'studentId', 'borrowedAt']], left_on='borrowId', right_on='id', how='inner')
+    events = events.merge(items[['id', 'masterId']], left_on='bookItemId', right_on='id', how='left', suffixes=('', '_item'))
+    events = events.merge(masters[['id', 'categoryId']], left_on='masterId', right_on='id', how='left', suffixes=('', '_master'))
+    events = events.sort_values(['borrowedAt', 'borrowId'], kind='stable')
+    return events[['borrowId', 'studentId', 'borrowedAt', 'masterId', 'categoryId']].dropna()
+
+def iter_micro_batches(events, batch_size=BATCH_SIZE):
+    # Batches are cut on transaction boundaries so a transaction is never split
+    borrow_ids = events['borrowId'].drop_duplicates().to_numpy()
+    for start in range(0, len(borrow_ids), batch_size):
+        batch_ids = borrow_ids[start:start + batch_size]
+        yield events[events['borrowId'].isin(batch_ids)]
+
+def write_snapshot(stream, masters, categories, students):
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    top_books = stream.top_books().merge(
+        masters[['id', 'title', 'author']].rename(columns={'id': 'masterId'}), on='masterId', how='left')
+    top_books['cms_estimate'] = stream.book_cms.estimate(top_books['masterId'].to_numpy())
+    top_books = top_books[['masterId', 'title', 'author', 'borrow_count', 'min_borrow_count', 'cms_estimate', 'error_bound']]
+    write_output(top_books, "streaming_top_books.csv")
+
+    top_categories = stream.top_categories().merge(
+        categories[['id', 'name']].rename(columns={'id': 'categoryId', 'name': 'category'}), on='categoryId', how='left')
+    top_categories = top_categories[['categoryId', 'category', 'borrow_count', 'min_borrow_count', 'error_bound']]
+    write_output(top_categories, "streaming_top_categories.csv")
+
+    top_students = stream.top_students().merge(
+        students[['id', 'name']].rename(columns={'id': 'studentId'}), on='studentId', how='left')
+    top_students = top_students[['studentId', 'name', 'borrow_count', 'min_borrow_count', 'error_bound']]
+    write_output(top_students, "streaming_top_students.csv")
+
+    return top_books, top_categories, top_students
+
+def analyze_streaming_top_k():
+    transactions, details, items, masters, categories, students = load_data()
+    if transactions is None:
+        return
+
+    events = build_event_stream(transactions, details, items, masters)
+    stream = load_stream_state()
+    if stream is None:
+        print("Replaying borrow events through fresh streaming sketches...")
+        stream = StreamingTopK()
+    else:
+        print(f"Resuming streaming sketches after {stream.watermark[1]} ({stream.books.total} copies so far)...")
+        events = stream.unseen(events)
+
+    batch_number = 0
+    for batch in iter_micro_batches(events):
+        stream.add_batch(batch)
+        batch_number += 1
+        if batch_number % SNAPSHOT_EVERY == 0:
+            write_snapshot(stream, masters, categories, students)
+
+    top_books, top_categories, top_students = write_snapshot(stream, masters, categories, students)
+    stream.save()
+    print(f"Consumed {len(events)} new borrowed copies in {batch_number} micro-batches "
+          f"({stream.books.total} in total)")
+    print(f"Sketch state saved to {STATE_FILE}")
+    print(f"Space-Saving error bound: <= {stream.books.error_bound():.2f} borrows (books), "
+          f"<= {stream.students.error_bound():.2f} borrows (students)")
+    print(f"Count-Min error bound: <= {stream.book_cms.error_bound():.2f} borrows "
+          f"with probability {1 - stream.book_cms.delta:.4f}")
+    print(f"Streaming top-N outputs saved to {OUTPUT_DIR}")
+
+    print(f"\nTop {TOP_N} Most Borrowed Books (streaming):")
+    print(top_books)
+    print(f"\nTop {TOP_N} Categories (streaming):")
+    print(top_categories)
+
+    if not os.path.exists(VIS_DIR):
+        os.makedirs(VIS_DIR)
+    plot_top_students(top_students, os.path.join(VIS_DIR, PLOT_FILE))
+
+if __name__ == "__main__":
+    analyze_streaming_top_k()
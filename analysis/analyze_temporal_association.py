@@ -0,0 +1,109 @@
+import pandas as pd
+import os
+from association_mining import sliding_window_rules
+from incidence_matrix import load_incidence_matrix
+from partitioned_tables import load_tables_in_range, month_bounds, in_range
+from output_io import write_output
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+OUTPUT_FILE = "temporal_association_rules.csv"
+
+# Window length and step in months (WINDOW_MONTHS = 1 gives per-month rules)
+WINDOW_MONTHS = 3
+STEP_MONTHS = 1
+
+# Thresholds are relative to the transactions inside each window
+MIN_SUPPORT = 0.005
+MIN_CONFIDENCE = 0.0
+MIN_LIFT = 0.0
+MAX_RULES = None  # Top-K rules by lift per window
+
+# History to mine, inclusive 'YYYY-MM' (None = open-ended). With the layout from
+# build_partitioned_tables.py only those months' partitions are read.
+HISTORY_START_MONTH = None
+HISTORY_END_MONTH = None
+
+USE_INCIDENCE_MATRIX = True
+
+def load_data():
+    print("Loading data...")
+    try:
+        transactions, details, items, masters = load_tables_in_range(
+            'analyze_temporal_association', *month_bounds(HISTORY_START_MONTH, HISTORY_END_MONTH))
+        return transactions, details, items, masters
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None, None, None, None
+
+def load_monthly_baskets():
+    # [(month, [sorted titles per transaction])] for every month in the history
+    if USE_INCIDENCE_MATRIX:
+        incidence = load_incidence_matrix()
+        if incidence is not None:
+            print("Loading baskets from the persisted incidence matrix...")
+            baskets = pd.Series(incidence.baskets(incidence.master_titles))
+            borrowed_at = pd.Series(incidence.transaction_borrowed_at)
+            if HISTORY_START_MONTH is not None or HISTORY_END_MONTH is not None:
+                keep = in_range(borrowed_at, *month_bounds(HISTORY_START_MONTH, HISTORY_END_MONTH))
+                baskets, borrowed_at = baskets[keep], borrowed_at[keep]
+            return group_by_month(baskets, pd.to_datetime(borrowed_at, unit='s'))
+
+    transactions, details, items, masters = load_data()
+    if transactions is None:
+        return None
+
+    merged = details.merge(items[['id', 'masterId']], left_on='bookItemId', right_on='id', how='left')
+    merged = merged.merge(masters[['id', 'title']], left_on='masterId', right_on='id', how='left')
+    baskets = merged[['borrowId', 'title']].dropna().groupby('borrowId')['title'].apply(lambda x: sorted(set(x)))
+    borrowed_at = pd.to_datetime(transactions.set_index('id')['borrowedAt'], unit='s')
+    borrowed_at = borrowed_at.reindex(baskets.index)
+    return group_by_month(baskets.reset_index(drop=True), borrowed_at.reset_index(drop=True))
+
+def group_by_month(baskets, borrowed_at):
+    months = borrowed_at.dt.to_period('M')
+    month_range = pd.period_range(months.min(), months.max(), freq='M')
+    grouped = baskets.groupby(months).apply(list)
+    # Months without transactions still occupy a window slot
+    return [(str(month), grouped.get(month, [])) for month in month_range]
+
+def analyze_temporal_association():
+    monthly_baskets = load_monthly_baskets()
+    if monthly_baskets is None:
+        return
+
+    print(f"Mining rules over {len(monthly_baskets)} months with {WINDOW_MONTHS}-month windows "
+          f"(step {STEP_MONTHS}, Min Support: {MIN_SUPPORT})...")
+    rows = []
+    for first_month, last_month, total, rules in sliding_window_rules(
+            monthly_baskets, WINDOW_MONTHS, MIN_SUPPORT, min_confidence=MIN_CONFIDENCE,
+            min_lift=MIN_LIFT, max_rules=MAX_RULES, step=STEP_MONTHS):
+        print(f"  {first_month} .. {last_month}: {total} transactions, {len(rules)} rules")
+        for rule in rules:
+            rows.append({'Window_Start': first_month, 'Window_End': last_month, 'Transactions': total, **rule})
+
+    results_df = pd.DataFrame(rows)
+
+    if not results_df.empty:
+        results_df = results_df.sort_values(by=['Window_Start', 'Lift', 'Confidence'], ascending=[True, False, False])
+
+        if not os.path.exists(OUTPUT_DIR):
+            os.makedirs(OUTPUT_DIR)
+
+        output_path = write_output(results_df, OUTPUT_FILE)
+        print(f"Temporal association rules saved to {output_path}")
+
+        # Rules that recur across windows, with their support over time
+        recurring = results_df.groupby(['Antecedent', 'Consequent']).agg(
+            windows=('Window_Start', 'count'),
+            mean_support=('Support', 'mean'),
+            max_lift=('Lift', 'max'),
+        ).sort_values(['windows', 'mean_support'], ascending=False)
+        print("\nMost Recurring Rules:")
+        print(recurring.head(10))
+    else:
+        print("No association rules found meeting the criteria.")
+
+if __name__ == "__main__":
+    analyze_temporal_association()
@@ -1,18 +1,21 @@
 import pandas as pd
 import os
+from schema import load_tables
+from duplicate_masters import merge_duplicate_masters
+from output_io import write_output
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DATASET_DIR = os.path.join(SCRIPT_DIR, "../dataset")
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
 OUTPUT_FILE = "top_books.csv"
 
+# Count copies of duplicate masters (find_duplicate_masters.py) under their canonical master
+MERGE_DUPLICATE_MASTERS = True
+
 def load_data():
     print("Loading data...")
     try:
-        details = pd.read_csv(os.path.join(DATASET_DIR, "borrow_details.csv"))
-        items = pd.read_csv(os.path.join(DATASET_DIR, "book_items.csv"))
-        masters = pd.read_csv(os.path.join(DATASET_DIR, "book_masters.csv"))
+        details, items, masters = load_tables('analyze_top_books')
         return details, items, masters
     except FileNotFoundError as e:
         print(f"Error loading files: {e}")
@@ -22,6 +25,8 @@ def analyze_top_books():
     details, items, masters = load_data()
     if details is None:
         return
+    if MERGE_DUPLICATE_MASTERS:
+        items, masters = merge_duplicate_masters(items, masters)
 
     print("Processing data for Top Books...")
 
@@ -49,12 +54,17 @@ def analyze_top_books():
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
         
-    output_path = os.path.join(OUTPUT_DIR, OUTPUT_FILE)
-    top_books.to_csv(output_path, index=False)
+    output_path = write_output(top_books, OUTPUT_FILE)
     print(f"Top books analysis saved to {output_path}")
     
     print("\nTop 10 Most Borrowed Books:")
     print(top_books.head(10))
 
 if __name__ == "__main__":
-    analyze_top_books()
+    # --sample [FRACTION]: fast estimate with error bounds (preview_analysis.py)
+    from preview_analysis import parse_sample_fraction, run_preview
+    sample_fraction = parse_sample_fraction()
+    if sample_fraction is not None:
+        run_preview(sample_fraction, ['top_books'])
+    else:
+        analyze_top_books()
@@ -2,6 +2,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+from schema import load_tables
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -23,8 +24,7 @@ def analyze_top_students():
         print(f"Error: Required files not found.")
         return
 
-    df_trans = pd.read_csv(transactions_path)
-    df_students = pd.read_csv(students_path)
+    df_trans, df_students = load_tables('analyze_top_students')
     
     # Count borrowings per student
     student_counts = df_trans['studentId'].value_counts().reset_index()
@@ -40,6 +40,10 @@ def analyze_top_students():
     print("\nTop 10 Students by Borrowing Count:")
     print(top_10_students[['name', 'studentId', 'borrow_count']])
     
+    output_path = os.path.join(VIS_DIR, 'top_student_borrowers.png')
+    plot_top_students(top_10_students, output_path)
+
+def plot_top_students(top_10_students, output_path):
     # Visualization using Seaborn and Matplotlib
     plt.figure(figsize=(12, 8))
     sns.barplot(data=top_10_students, x='borrow_count', y='name', hue='name', palette='viridis', legend=False)
@@ -50,7 +54,6 @@ def analyze_top_students():
     plt.grid(axis='x', linestyle='--', alpha=0.7)
     plt.tight_layout()
     
-    output_path = os.path.join(VIS_DIR, 'top_student_borrowers.png')
     plt.savefig(output_path)
     print(f"\nVisualization saved to {output_path}")
     plt.close()
@@ -2,10 +2,11 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+from schema import load_tables
+from output_io import write_output
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DATASET_DIR = os.path.join(SCRIPT_DIR, "../dataset")
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
 VISUALIZATION_DIR = os.path.join(SCRIPT_DIR, "visualizations")
 OUTPUT_FILE = "transaction_size_analysis.csv"
@@ -13,7 +14,7 @@ OUTPUT_FILE = "transaction_size_analysis.csv"
 def analyze_transaction_size():
     print("Loading data...")
     try:
-        details = pd.read_csv(os.path.join(DATASET_DIR, "borrow_details.csv"))
+        (details,) = load_tables('analyze_transaction_size')
     except FileNotFoundError as e:
         print(f"Error loading files: {e}")
         return
@@ -36,8 +37,7 @@ def analyze_transaction_size():
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
         
-    output_path = os.path.join(OUTPUT_DIR, OUTPUT_FILE)
-    size_distribution.to_csv(output_path, index=False)
+    output_path = write_output(size_distribution, OUTPUT_FILE)
     print(f"Transaction size analysis saved to {output_path}")
     
     print("\nTransaction Size Distribution:")
@@ -0,0 +1,545 @@
+import bisect
+import heapq
+import itertools
+import numpy as np
+import pandas as pd
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# Apriori-style mining engine shared by the association analyses.
+# Baskets are sequences of sorted, de-duplicated item labels (book titles,
+# category names, ...). Itemsets are counted up to size 3 and rules
+# {A} -> {B} and {A, B} -> {C} are generated from them.
+#
+# Rule constraints (min confidence, min lift, top-K by lift) are compared with
+# the rounded values that are written out; once K pair rules are known the K-th
+# best lift is a floor below which no triplet rule is generated. By default
+# itemsets are still counted completely, because the itemset output needs every
+# frequent triplet. With complete_itemsets=False the constraints are pushed into
+# counting: pairs (every rule's antecedent support) are counted first, and a
+# triplet candidate is only counted when an upper bound on one of its three
+# rules (triplet count <= smallest sub-pair count) still meets the thresholds
+# and the lift floor. The 3-itemsets are then only those that can yield a rule.
+#
+# Itemset output modes:
+#   'all'     every frequent itemset
+#   'closed'  no frequent superset with the same count (lossless: the count of
+#             any frequent itemset is the max count of its closed supersets)
+#   'maximal' no frequent superset at all (smallest, but counts of subsets are lost)
+# Sizes are capped at 3, so closedness/maximality is relative to that cap.
+
+ITEMSET_MODES = ('all', 'closed', 'maximal')
+# Output file per itemset mode, written by the association scripts and read by the visualisations
+BOOK_ITEMSET_FILES = {
+    'all': "frequent_itemsets.csv",
+    'closed': "closed_itemsets.csv",
+    'maximal': "maximal_itemsets.csv",
+}
+CATEGORY_ITEMSET_FILES = {
+    'all': "frequent_category_itemsets.csv",
+    'closed': "closed_category_itemsets.csv",
+    'maximal': "maximal_category_itemsets.csv",
+}
+
+def round_rule(value):
+    return round(value, 4)
+
+def _rule(antecedent, consequent, count, total, antecedent_count, consequent_count):
+    support = count / total
+    confidence = count / antecedent_count
+    lift = support / ((antecedent_count / total) * (consequent_count / total))
+    return {
+        'Antecedent': antecedent,
+        'Consequent': consequent,
+        'Support': round_rule(support),
+        'Confidence': round_rule(confidence),
+        'Lift': round_rule(lift),
+        'Count': count,
+        'Antecedent_Count': antecedent_count,
+        'Consequent_Count': consequent_count,
+    }, confidence, lift
+
+def _passes(confidence, lift, min_confidence, min_lift):
+    # Same rounding as the written Confidence/Lift, so a rule shown as Lift 2.0
+    # passes MIN_LIFT = 2.0
+    return round_rule(confidence) >= min_confidence and round_rule(lift) >= min_lift
+
+def _pair_rules(pair_counts, item_counts, total, min_confidence, min_lift):
+    rules = []
+    for (item_a, item_b), count in pair_counts.items():
+        # A -> B
+        rule, confidence, lift = _rule(item_a, item_b, count, total, item_counts[item_a], item_counts[item_b])
+        if _passes(confidence, lift, min_confidence, min_lift):
+            rules.append(rule)
+        # B -> A
+        rule, confidence, lift = _rule(item_b, item_a, count, total, item_counts[item_b], item_counts[item_a])
+        if _passes(confidence, lift, min_confidence, min_lift):
+            rules.append(rule)
+    return rules
+
+def _triplet_rules(triplet_counts, pair_counts, item_counts, total, min_confidence, min_lift):
+    rules = []
+    for triplet, count in triplet_counts.items():
+        # For a triplet {A, B, C}: {A, B} -> C, {A, C} -> B, {B, C} -> A
+        for consequent in triplet:
+            antecedent = tuple(x for x in triplet if x != consequent)
+            antecedent_count = pair_counts.get(antecedent)
+            if not antecedent_count:
+                continue
+            rule, confidence, lift = _rule(' | '.join(antecedent), consequent, count, total,
+                                           antecedent_count, item_counts[consequent])
+            if _passes(confidence, lift, min_confidence, min_lift):
+                rules.append(rule)
+    return rules
+
+def _triplet_may_pass(triplet, pair_counts, min_count):
+    # Apriori property: every sub-pair of a frequent triplet is frequent
+    sub_pair_counts = [pair_counts.get(pair) for pair in itertools.combinations(triplet, 2)]
+    if not all(sub_pair_counts):
+        return False
+    # The triplet count can never exceed its smallest sub-pair count
+    return min(sub_pair_counts) >= min_count
+
+def _triplet_rules_may_pass(triplet, pair_counts, item_counts, total, min_count, min_confidence, min_lift):
+    # Apriori plus the rule constraints, evaluated on the best count the triplet could reach
+    if not _triplet_may_pass(triplet, pair_counts, min_count):
+        return False
+    bound = min(pair_counts[pair] for pair in itertools.combinations(triplet, 2))
+    for consequent in triplet:
+        antecedent_count = pair_counts[tuple(x for x in triplet if x != consequent)]
+        confidence = bound / antecedent_count
+        lift = confidence * total / item_counts[consequent]
+        if _passes(confidence, lift, min_confidence, min_lift):
+            return True
+    return False
+
+def _has_constraints(min_confidence, min_lift, max_rules):
+    return min_confidence > 0 or min_lift > 0 or max_rules is not None
+
+def _lift_floor(pair_rules, min_lift, max_rules):
+    # Once K pair rules are known, a triplet rule below the K-th best lift can never make the top K
+    if max_rules is not None and len(pair_rules) >= max_rules:
+        return max(min_lift, top_rules(pair_rules, max_rules)[-1]['Lift'])
+    return min_lift
+
+def top_rules(rules, max_rules):
+    # Top-K by (Lift, Confidence) without sorting the full rule table
+    if max_rules is None or len(rules) <= max_rules:
+        return rules
+    return heapq.nlargest(max_rules, rules, key=lambda rule: (rule['Lift'], rule['Confidence']))
+
+def count_items(baskets):
+    item_counts = Counter()
+    for items in baskets:
+        for item in items:
+            item_counts[item] += 1
+    return item_counts
+
+def count_pairs(baskets, frequent_items):
+    pair_counts = Counter()
+    for items in baskets:
+        frequent_in_basket = [item for item in items if item in frequent_items]
+        for pair in itertools.combinations(frequent_in_basket, 2):
+            pair_counts[pair] += 1
+    return pair_counts
+
+def count_triplets(baskets, frequent_items, may_pass):
+    triplet_counts = Counter()
+    verdicts = {}
+    for items in baskets:
+        frequent_in_basket = [item for item in items if item in frequent_items]
+        # We need at least 3 items to form a triplet
+        if len(frequent_in_basket) < 3:
+            continue
+        for triplet in itertools.combinations(frequent_in_basket, 3):
+            verdict = verdicts.get(triplet)
+            if verdict is None:
+                verdict = verdicts[triplet] = may_pass(triplet)
+            if verdict:
+                triplet_counts[triplet] += 1
+    return triplet_counts
+
+def _mark_subsets(counts, superset_counts, closed, maximal):
+    # Called once level k+1 is counted: flag the level-k itemsets it covers
+    for superset, count in superset_counts.items():
+        for subset in itertools.combinations(superset, len(superset) - 1):
+            key = subset[0] if len(subset) == 1 else subset
+            if key in counts:
+                maximal[key] = False
+                if counts[key] == count:
+                    closed[key] = False
+
+def filter_frequent(counts, min_count):
+    return {itemset: count for itemset, count in counts.items() if count >= min_count}
+
+def frequent_itemsets(baskets, min_count, log=None, make_triplet_filter=None):
+    # Level-wise counting of frequent 1/2/3-itemsets. make_triplet_filter(l1, l2)
+    # may return a stricter triplet candidate test than the Apriori one.
+    # --- Phase 1: 1-Itemset Generation ---
+    l1_counts = filter_frequent(count_items(baskets), min_count)
+    if log:
+        log(f"Found {len(l1_counts)} frequent 1-itemsets")
+
+    # --- Phase 2: 2-Itemset Generation ---
+    l2_counts = filter_frequent(count_pairs(baskets, l1_counts), min_count)
+    if log:
+        log(f"Found {len(l2_counts)} frequent 2-itemsets")
+
+    # --- Phase 3: 3-Itemset Generation ---
+    if make_triplet_filter is not None:
+        may_pass = make_triplet_filter(l1_counts, l2_counts)
+    else:
+        def may_pass(triplet):
+            return _triplet_may_pass(triplet, l2_counts, min_count)
+    l3_counts = filter_frequent(count_triplets(baskets, l1_counts, may_pass), min_count)
+    if log:
+        log(f"Found {len(l3_counts)} frequent 3-itemsets")
+
+    return l1_counts, l2_counts, l3_counts
+
+# --- SON (Savasere, Omiecinski & Navathe) partition mining ---
+# Any itemset frequent over all baskets is frequent (same relative support) in
+# at least one shard, so the union of the shards' local frequent itemsets is a
+# complete candidate set. One global pass then counts the candidates exactly.
+# Shards are contiguous and merged in order, so even the dictionary order (and
+# therefore the rule order) matches serial mining.
+
+def _son_local_itemsets(shard, min_support):
+    l1_counts, l2_counts, l3_counts = frequent_itemsets(shard, min_support * len(shard))
+    return set(l1_counts), set(l2_counts), set(l3_counts)
+
+def _son_count_candidates(shard, item_candidates, pair_candidates, triplet_candidates):
+    item_counts, pair_counts, triplet_counts = Counter(), Counter(), Counter()
+    for items in shard:
+        candidate_items = [item for item in items if item in item_candidates]
+        for item in candidate_items:
+            item_counts[item] += 1
+        for pair in itertools.combinations(candidate_items, 2):
+            if pair in pair_candidates:
+                pair_counts[pair] += 1
+        if len(candidate_items) >= 3:
+            for triplet in itertools.combinations(candidate_items, 3):
+                if triplet in triplet_candidates:
+                    triplet_counts[triplet] += 1
+    return item_counts, pair_counts, triplet_counts
+
+def son_frequent_itemsets(baskets, min_support, n_partitions, n_workers=None, log=None):
+    # Same result as frequent_itemsets(baskets, min_support * len(baskets), ...)
+    total = len(baskets)
+    min_count = min_support * total
+    shard_size = -(-total // n_partitions)
+    shards = [baskets[start:start + shard_size] for start in range(0, total, shard_size)]
+
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        # Pass 1: local frequent itemsets per shard
+        item_candidates, pair_candidates, triplet_candidates = set(), set(), set()
+        for items, pairs, triplets in pool.map(_son_local_itemsets, shards, itertools.repeat(min_support)):
+            item_candidates |= items
+            pair_candidates |= pairs
+            triplet_candidates |= triplets
+        if log:
+            log(f"SON: {len(shards)} shards -> {len(item_candidates)} item, {len(pair_candidates)} pair "
+                f"and {len(triplet_candidates)} triplet candidates")
+
+        # Pass 2: exact global counts of the candidates
+        item_counts, pair_counts, triplet_counts = Counter(), Counter(), Counter()
+        counted = pool.map(_son_count_candidates, shards, itertools.repeat(item_candidates),
+                           itertools.repeat(pair_candidates), itertools.repeat(triplet_candidates))
+        for shard_items, shard_pairs, shard_triplets in counted:
+            item_counts.update(shard_items)
+            pair_counts.update(shard_pairs)
+            triplet_counts.update(shard_triplets)
+
+    l1_counts = filter_frequent(item_counts, min_count)
+    l2_counts = filter_frequent(pair_counts, min_count)
+    l3_counts = filter_frequent(triplet_counts, min_count)
+    if log:
+        log(f"Found {len(l1_counts)} / {len(l2_counts)} / {len(l3_counts)} frequent 1/2/3-itemsets")
+    return l1_counts, l2_counts, l3_counts
+
+def mine_association_rules(baskets, min_support, min_confidence=0.0, min_lift=0.0, max_rules=None,
+                           itemset_mode='all', n_partitions=1, n_workers=None, complete_itemsets=True,
+                           with_candidates=False, log=print):
+    # Returns ({1: {item: count}, 2: {pair: count}, 3: {triplet: count}}, rules),
+    # plus every candidate rule before the constraints when with_candidates
+    # (the multiple-testing family for rule_metrics.evaluate_rules; with pushed-down
+    # constraints it only covers the triplets that were counted)
+    # With complete_itemsets the itemsets are every frequent itemset (or the
+    # closed/maximal ones when itemset_mode asks for it) regardless of the rule
+    # constraints; without it the constraints prune triplet counting and only
+    # the rules are meaningful. n_partitions > 1 mines with SON across a process
+    # pool of n_workers and gives identical results (SON always counts completely).
+    if itemset_mode not in ITEMSET_MODES:
+        raise ValueError(f"itemset_mode must be one of {ITEMSET_MODES}")
+    total = len(baskets)
+    min_count = min_support * total
+    push_down = not complete_itemsets and _has_constraints(min_confidence, min_lift, max_rules)
+
+    log(f"\n[Phase 1-3] Counting 1/2/3-Itemsets (Min Support: {min_support})")
+    pair_rules = lift_floor = None
+    if n_partitions and n_partitions > 1:
+        l1_counts, l2_counts, l3_counts = son_frequent_itemsets(baskets, min_support, n_partitions, n_workers, log)
+    elif push_down:
+        def make_triplet_filter(l1, l2):
+            nonlocal pair_rules, lift_floor
+            pair_rules = _pair_rules(l2, l1, total, min_confidence, min_lift)
+            lift_floor = _lift_floor(pair_rules, min_lift, max_rules)
+
+            def may_pass(triplet):
+                return _triplet_rules_may_pass(triplet, l2, l1, total, min_count, min_confidence, lift_floor)
+            return may_pass
+        l1_counts, l2_counts, l3_counts = frequent_itemsets(baskets, min_count, log, make_triplet_filter)
+        log(f"Counted only the 3-itemsets that can yield a rule (Lift floor: {lift_floor})")
+    else:
+        l1_counts, l2_counts, l3_counts = frequent_itemsets(baskets, min_count, log)
+
+    if pair_rules is None:
+        pair_rules = _pair_rules(l2_counts, l1_counts, total, min_confidence, min_lift)
+        lift_floor = _lift_floor(pair_rules, min_lift, max_rules)
+    rules = pair_rules + _triplet_rules(l3_counts, l2_counts, l1_counts, total, min_confidence, lift_floor)
+    rules = top_rules(rules, max_rules)
+    candidates = candidate_rules(l1_counts, l2_counts, l3_counts, total) if with_candidates else None
+
+    itemset_counts = {1: l1_counts, 2: l2_counts, 3: l3_counts}
+    if itemset_mode != 'all':
+        closed = {itemset: True for level in (l1_counts, l2_counts) for itemset in level}
+        maximal = dict(closed)
+        _mark_subsets(l1_counts, l2_counts, closed, maximal)
+        _mark_subsets(l2_counts, l3_counts, closed, maximal)
+        itemset_counts = _condensed(itemset_counts, closed if itemset_mode == 'closed' else maximal)
+        log(f"Kept {sum(len(counts) for counts in itemset_counts.values())} {itemset_mode} itemsets")
+
+    if with_candidates:
+        return itemset_counts, rules, candidates
+    return itemset_counts, rules
+
+def candidate_rules(l1_counts, l2_counts, l3_counts, total):
+    # Every rule the frequent itemsets can form, before any rule constraint
+    return _pair_rules(l2_counts, l1_counts, total, 0.0, 0.0) + \
+        _triplet_rules(l3_counts, l2_counts, l1_counts, total, 0.0, 0.0)
+
+def _condensed(itemset_counts, flags):
+    # The largest mined size has no counted supersets, so it is always kept
+    max_size = max(itemset_counts)
+    return {
+        size: {itemset: count for itemset, count in counts.items() if size == max_size or flags[itemset]}
+        for size, counts in itemset_counts.items()
+    }
+
+# --- Bitmask engine for small item universes (e.g. the ~21 categories) ---
+# Each basket is one uint64 whose bit i is set when it contains label i, so the
+# support of a subset S is the number of masks with (mask & S) == S. Identical
+# masks are collapsed first, which keeps counting independent of the number of
+# transactions once the baskets are encoded.
+
+MAX_BITMASK_ITEMS = 64
+BITMASK_CHUNK = 4096  # Subsets tested per vectorized block
+
+def encode_bitmasks(basket_ids, items):
+    # Returns (one uint64 mask per basket, sorted labels indexed by bit position)
+    item_codes, labels = pd.factorize(np.asarray(items), sort=True)
+    if len(labels) > MAX_BITMASK_ITEMS:
+        raise ValueError(f"Bitmask counting supports at most {MAX_BITMASK_ITEMS} distinct items")
+    bits = np.left_shift(np.uint64(1), item_codes.astype(np.uint64))
+    basket_codes, _ = pd.factorize(np.asarray(basket_ids), sort=True)
+    order = np.argsort(basket_codes, kind='stable')
+    basket_codes, bits = basket_codes[order], bits[order]
+    starts = np.flatnonzero(np.r_[True, basket_codes[1:] != basket_codes[:-1]])
+    masks = np.bitwise_or.reduceat(bits, starts)
+    return masks, list(labels)
+
+def count_subsets_bitmask(masks, n_items, max_size=3):
+    # Exact support of every subset with 1..max_size items, as {size: (subset_masks, counts)}
+    unique_masks, weights = np.unique(masks, return_counts=True)
+    sizes = np.bitwise_count(unique_masks)
+    levels = {}
+    for size in range(1, max_size + 1):
+        combos = np.array(list(itertools.combinations(range(n_items), size)), dtype=np.uint64).reshape(-1, size)
+        subset_masks = np.bitwise_or.reduce(np.left_shift(np.uint64(1), combos), axis=1)
+        # Only baskets with at least `size` items can contain a subset of that size
+        candidates = sizes >= size
+        candidate_masks, candidate_weights = unique_masks[candidates], weights[candidates]
+        counts = np.zeros(len(subset_masks), dtype=np.int64)
+        for start in range(0, len(subset_masks), BITMASK_CHUNK):
+            block = subset_masks[start:start + BITMASK_CHUNK, None]
+            contained = (candidate_masks[None, :] & block) == block
+            counts[start:start + BITMASK_CHUNK] = contained @ candidate_weights
+        levels[size] = (combos.astype(np.int64), counts)
+    return levels
+
+def mine_association_rules_bitmask(basket_ids, items, min_support, min_confidence=0.0, min_lift=0.0,
+                                   max_rules=None, itemset_mode='all', log=print):
+    # Same results as mine_association_rules on the equivalent baskets, with
+    # (basket_id, item) rows as input instead of Python lists per basket
+    if itemset_mode not in ITEMSET_MODES:
+        raise ValueError(f"itemset_mode must be one of {ITEMSET_MODES}")
+    masks, labels = encode_bitmasks(basket_ids, items)
+    total = len(masks)
+    min_count = min_support * total
+    log(f"Encoded {total} baskets over {len(labels)} items as bitmasks")
+
+    itemset_counts = {}
+    for size, (combos, counts) in count_subsets_bitmask(masks, len(labels)).items():
+        frequent = np.flatnonzero((counts >= min_count) & (counts > 0))
+        if size == 1:
+            level = {labels[combos[i, 0]]: int(counts[i]) for i in frequent}
+        else:
+            level = {tuple(labels[j] for j in combos[i]): int(counts[i]) for i in frequent}
+        itemset_counts[size] = level
+        log(f"Found {len(level)} frequent {size}-itemsets (Min Support: {min_support})")
+
+    l1_counts, l2_counts, l3_counts = itemset_counts[1], itemset_counts[2], itemset_counts[3]
+    rules = _pair_rules(l2_counts, l1_counts, total, min_confidence, min_lift)
+    rules += _triplet_rules(l3_counts, l2_counts, l1_counts, total, min_confidence, min_lift)
+    rules = top_rules(rules, max_rules)
+
+    if itemset_mode != 'all':
+        closed = {itemset: True for level in (l1_counts, l2_counts) for itemset in level}
+        maximal = dict(closed)
+        _mark_subsets(l1_counts, l2_counts, closed, maximal)
+        _mark_subsets(l2_counts, l3_counts, closed, maximal)
+        itemset_counts = _condensed(itemset_counts, closed if itemset_mode == 'closed' else maximal)
+        log(f"Kept {sum(len(counts) for counts in itemset_counts.values())} {itemset_mode} itemsets")
+
+    return itemset_counts, rules
+
+def itemset_rows(itemset_counts, total):
+    rows = []
+    for size, counts in sorted(itemset_counts.items()):
+        for itemset, count in counts.items():
+            rows.append({
+                'Itemset': itemset if size == 1 else ' | '.join(itemset),
+                'Itemset_Size': size,
+                'Count': count,
+                'Support': round_rule(count / total)
+            })
+    return rows
+
+# --- Sequential patterns (PrefixSpan) ---
+# A sequence is one student's transactions ordered by time, each a set of
+# items. Patterns are item sequences <A, B, C> whose items occur in strictly
+# later transactions, each at most max_gap seconds after the previous match.
+# Projected databases are pseudo-projections: (sequence id, positions where
+# the prefix can end) pointers into the original sequences, never copies.
+# Every admissible end position is kept because with a gap constraint the
+# leftmost match does not dominate later ones. Support counts sequences.
+# Rules <A, B> -> C use the same columns as basket rules, with the antecedent
+# items joined by ' | ' in temporal order.
+
+def _extend_projection(sequences, projection, max_gap):
+    # item -> {sequence id: sorted end positions} for every one-item extension
+    extensions = {}
+    for seq_id, positions in projection:
+        times, elements = sequences[seq_id]
+        scanned = 0
+        for position in positions:
+            # Transactions strictly after `position` and within the gap; windows of
+            # later positions only extend to the right, so each index is scanned once
+            low = max(position + 1, scanned)
+            high = len(times) if max_gap is None else bisect.bisect_right(times, times[position] + max_gap)
+            for index in range(low, high):
+                for item in elements[index]:
+                    extensions.setdefault(item, {}).setdefault(seq_id, []).append(index)
+            scanned = max(scanned, high)
+    return extensions
+
+def prefixspan(sequences, min_count, max_gap=None, max_length=3):
+    # {pattern tuple: number of sequences containing it} for frequent patterns
+    item_counts = Counter(item for _, elements in sequences for item in set().union(*elements))
+    frequent = {item for item, count in item_counts.items() if count >= min_count}
+    sequences = [(times, [element & frequent for element in elements]) for times, elements in sequences]
+
+    patterns = {}
+
+    def grow(prefix, projection):
+        patterns[prefix] = len(projection)
+        if len(prefix) >= max_length:
+            return
+        for item, matches in sorted(_extend_projection(sequences, projection, max_gap).items()):
+            if len(matches) >= min_count:
+                grow(prefix + (item,), list(matches.items()))
+
+    initial = {}
+    for seq_id, (_, elements) in enumerate(sequences):
+        for position, element in enumerate(elements):
+            for item in element:
+                initial.setdefault(item, {}).setdefault(seq_id, []).append(position)
+    for item in sorted(frequent):
+        grow((item,), list(initial[item].items()))
+    return patterns
+
+def mine_sequential_rules(sequences, min_support, max_gap=None, max_length=3, min_confidence=0.0,
+                          min_lift=0.0, max_rules=None, with_candidates=False, log=print):
+    # sequences: [(sorted times in seconds, [set of items per transaction])]
+    # Returns ({pattern tuple: count}, rules), plus every candidate rule before
+    # the constraints when with_candidates
+    total = len(sequences)
+    min_count = min_support * total
+    log(f"\n[PrefixSpan] Mining sequential patterns (Min Support: {min_support}, Max Gap: {max_gap}s)")
+    patterns = prefixspan(sequences, min_count, max_gap, max_length)
+    log(f"Found {len(patterns)} frequent sequential patterns")
+
+    rules, candidates = [], []
+    for pattern, count in patterns.items():
+        if len(pattern) < 2:
+            continue
+        antecedent, consequent = pattern[:-1], pattern[-1]
+        rule, confidence, lift = _rule(' | '.join(antecedent), consequent, count, total,
+                                       patterns[antecedent], patterns[(consequent,)])
+        candidates.append(rule)
+        if _passes(confidence, lift, min_confidence, min_lift):
+            rules.append(rule)
+    if with_candidates:
+        return patterns, top_rules(rules, max_rules), candidates
+    return patterns, top_rules(rules, max_rules)
+
+# --- Sliding-window rules ---
+# Each period (e.g. month) is counted once into exact 1/2/3-itemset Counters.
+# A window's counts are a running sum: the entering period is added and the
+# leaving one subtracted, so sliding by one period costs one period's counts
+# instead of re-counting the whole window. Exact counts keep the downward
+# closure, so frequent pairs/items of a frequent triplet are always present.
+
+def count_period_itemsets(baskets):
+    counts = {1: Counter(), 2: Counter(), 3: Counter()}
+    for items in baskets:
+        counts[1].update(items)
+        counts[2].update(itertools.combinations(items, 2))
+        counts[3].update(itertools.combinations(items, 3))
+    return counts
+
+def _slide(running, period_counts, sign):
+    for size, counts in period_counts.items():
+        target = running[size]
+        for itemset, count in counts.items():
+            value = target[itemset] + sign * count
+            if value:
+                target[itemset] = value
+            else:
+                del target[itemset]
+
+def sliding_window_rules(period_baskets, window, min_support, min_confidence=0.0, min_lift=0.0,
+                         max_rules=None, step=1):
+    # period_baskets: [(period label, baskets)] in time order. Yields
+    # (first period, last period, transactions in window, rules) for every
+    # complete window of `window` periods, advancing `step` periods at a time.
+    period_counts = [(label, len(baskets), count_period_itemsets(baskets)) for label, baskets in period_baskets]
+    running = {1: Counter(), 2: Counter(), 3: Counter()}
+    total = 0
+    for end, (label, n_baskets, counts) in enumerate(period_counts):
+        _slide(running, counts, 1)
+        total += n_baskets
+        start = end - window + 1
+        if start > 0:
+            _, leaving_baskets, leaving_counts = period_counts[start - 1]
+            _slide(running, leaving_counts, -1)
+            total -= leaving_baskets
+        if start < 0 or start % step or total == 0:
+            continue
+        min_count = min_support * total
+        l1_counts = filter_frequent(running[1], min_count)
+        l2_counts = filter_frequent(running[2], min_count)
+        l3_counts = filter_frequent(running[3], min_count)
+        rules = _pair_rules(l2_counts, l1_counts, total, min_confidence, min_lift) + \
+            _triplet_rules(l3_counts, l2_counts, l1_counts, total, min_confidence, min_lift)
+        yield period_counts[start][0], label, total, top_rules(rules, max_rules)
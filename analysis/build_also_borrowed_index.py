@@ -0,0 +1,112 @@
+import pandas as pd
+import numpy as np
+import os
+from also_borrowed_index import INDEX_DIR, AlsoBorrowedIndex, key_hash, table_capacity
+from schema import load_tables
+from output_io import read_output
+
+# Configuration
+RULES_FILE = "association_analysis.csv"
+RULE_COLUMNS = ['Antecedent', 'Consequent', 'Lift', 'Confidence']
+
+TOP_K = 10  # Consequents kept per antecedent
+
+def load_data():
+    print("Loading data...")
+    try:
+        rules = read_output(RULES_FILE, columns=RULE_COLUMNS)
+        (masters,) = load_tables('build_also_borrowed_index')
+        return rules, masters
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e} (run analyze_book_association.py first)")
+        return None, None
+
+def encode_rules(rules, titles):
+    # Antecedent/consequent titles -> title indices; pairs ordered (larger, smaller)
+    title_index = pd.Index(titles)
+    rules = rules.reset_index(drop=True)
+    antecedent_titles = rules['Antecedent'].str.split(' | ', regex=False)
+    a = title_index.get_indexer(antecedent_titles.str[0])
+    b = np.where(antecedent_titles.str[1].isna(), -1, title_index.get_indexer(antecedent_titles.str[1].fillna('')))
+    encoded = pd.DataFrame({
+        'a': np.where(b >= 0, np.maximum(a, b), a).astype(np.int32),
+        'b': np.where(b >= 0, np.minimum(a, b), -1).astype(np.int32),
+        'consequent': title_index.get_indexer(rules['Consequent']).astype(np.int32),
+        'Lift': rules['Lift'],
+        'Confidence': rules['Confidence'],
+    })
+    return encoded[(encoded['a'] >= 0) & (encoded['consequent'] >= 0)]
+
+def build_also_borrowed_index():
+    rules, masters = load_data()
+    if rules is None:
+        return
+
+    print("Building also-borrowed index...")
+    # Rules are mined on titles, so the index is keyed on titles as well
+    titles = np.array(sorted(masters['title'].dropna().astype(str).unique()), dtype=object)
+    expanded = encode_rules(rules, titles)
+
+    # Top-K consequents per antecedent, best lift first
+    expanded = expanded.sort_values(['a', 'b', 'Lift', 'Confidence'], ascending=[True, True, False, False])
+    expanded = expanded.drop_duplicates(['a', 'b', 'consequent'])
+    expanded = expanded[expanded.groupby(['a', 'b']).cumcount() < TOP_K]
+
+    keys = expanded[['a', 'b']].drop_duplicates().to_numpy(dtype=np.int32)
+    group_sizes = expanded.groupby(['a', 'b'], sort=False).size().to_numpy()
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(group_sizes, out=offsets[1:])
+
+    title_bytes = pd.Series(titles).str.encode('utf-8').to_numpy().astype('S')
+    # masterId -> title lookup by binary search over the sorted ids
+    catalogued = masters.dropna(subset=['title']).sort_values('id')
+    master_ids_bytes = catalogued['id'].astype(str).str.encode('utf-8').to_numpy().astype('S')
+    master_titles = pd.Index(titles).get_indexer(catalogued['title'].astype(str)).astype(np.int32)
+
+    # Open-addressing hash table: antecedent key hash -> entry number (linear probing)
+    capacity = table_capacity(len(keys))
+    table_hashes = np.zeros(capacity, dtype=np.uint64)
+    table_entries = np.full(capacity, -1, dtype=np.int64)
+    mask = capacity - 1
+    for entry, (a, b) in enumerate(keys):
+        value = key_hash([titles[a]] if b < 0 else [titles[a], titles[b]])
+        slot = value & mask
+        while table_hashes[slot] != 0:
+            slot = (slot + 1) & mask
+        table_hashes[slot] = value
+        table_entries[slot] = entry
+
+    if not os.path.exists(INDEX_DIR):
+        os.makedirs(INDEX_DIR)
+
+    arrays = {
+        "table_hashes.npy": table_hashes,
+        "table_entries.npy": table_entries,
+        "antecedents.npy": keys,
+        "offsets.npy": offsets,
+        "consequents.npy": expanded['consequent'].to_numpy(dtype=np.int32),
+        "lift.npy": expanded['Lift'].to_numpy(dtype=np.float32),
+        "confidence.npy": expanded['Confidence'].to_numpy(dtype=np.float32),
+        "titles.npy": title_bytes,
+        "master_ids.npy": master_ids_bytes,
+        "master_titles.npy": master_titles,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(INDEX_DIR, name), array)
+
+    single_keys = int((keys[:, 1] < 0).sum())
+    print(f"Indexed {single_keys} single and {len(keys) - single_keys} pair antecedents "
+          f"({len(expanded)} consequents, top {TOP_K} each)")
+    print(f"Also-borrowed index saved to {INDEX_DIR}")
+
+    # Sample lookup
+    index = AlsoBorrowedIndex(INDEX_DIR)
+    if len(keys):
+        a, b = keys[0]
+        sample = [titles[a]] if b < 0 else [titles[a], titles[b]]
+        print(f"\nReaders who borrowed {' + '.join(sample)} also borrowed:")
+        for title, lift, confidence in index.lookup_titles(*sample, k=5):
+            print(f"  {title}  lift={lift:.2f}  confidence={confidence:.2f}")
+
+if __name__ == "__main__":
+    build_also_borrowed_index()
@@ -0,0 +1,76 @@
+import pandas as pd
+import numpy as np
+import os
+from incidence_matrix import INCIDENCE_DIR, SOURCES_FILE, SOURCE_TABLES, load_incidence_matrix
+from schema import load_tables, source_fingerprint
+from output_io import write_output
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_data():
+    print("Loading data...")
+    try:
+        transactions, details, items, masters, students = load_tables('build_incidence_matrix')
+        return transactions, details, items, masters, students
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None, None, None, None, None
+
+def build_incidence_matrix():
+    transactions, details, items, masters, students = load_data()
+    if transactions is None:
+        return
+    sources = source_fingerprint(SOURCE_TABLES)
+
+    print("Building transaction x master incidence matrix...")
+
+    # Borrow Details -> Items -> Masters (column index)
+    master_index = pd.Series(np.arange(len(masters), dtype=np.int32), index=masters['id'])
+    merged = details[['borrowId', 'bookItemId']].merge(
+        items[['id', 'masterId']], left_on='bookItemId', right_on='id', how='left')
+    merged['column'] = merged['masterId'].map(master_index)
+    merged = merged.dropna(subset=['column'])
+
+    # Copies of each master per transaction, rows in borrowId order
+    cells = merged.groupby(['borrowId', 'column']).size().reset_index(name='copies')
+    row_codes, transaction_ids = pd.factorize(cells['borrowId'], sort=True)
+
+    indptr = np.zeros(len(transaction_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(row_codes, minlength=len(transaction_ids)), out=indptr[1:])
+    indices = cells['column'].to_numpy(dtype=np.int32)
+    data = cells['copies'].to_numpy(dtype=np.int32)
+
+    # Per-row student and borrow time
+    row_info = transactions.set_index('id').reindex(transaction_ids)
+    student_ids = students['id'].astype(str).to_numpy()
+    student_index = pd.Series(np.arange(len(student_ids), dtype=np.int32), index=student_ids)
+    transaction_students = row_info['studentId'].map(student_index).fillna(-1).to_numpy(dtype=np.int32)
+    # Epoch seconds from schema.py; unknown transactions get the NaT sentinel
+    transaction_borrowed_at = row_info['borrowedAt'].fillna(np.iinfo(np.int64).min).to_numpy(dtype=np.int64)
+
+    arrays = {
+        "indptr": indptr,
+        "indices": indices,
+        "data": data,
+        "transaction_ids": np.asarray(transaction_ids, dtype=str).astype('S'),
+        "transaction_students": transaction_students,
+        "transaction_borrowed_at": transaction_borrowed_at,
+        "master_ids": masters['id'].astype(str).to_numpy().astype('S'),
+        "master_titles": masters['title'].astype(str).to_numpy().astype('U'),
+        "student_ids": student_ids.astype('S'),
+    }
+
+    if not os.path.exists(INCIDENCE_DIR):
+        os.makedirs(INCIDENCE_DIR)
+    for name, array in arrays.items():
+        np.save(os.path.join(INCIDENCE_DIR, f"{name}.npy"), array)
+    write_output(sources, SOURCES_FILE, INCIDENCE_DIR, export_csv=False)
+
+    incidence = load_incidence_matrix()
+    rows, columns = incidence.shape
+    print(f"Incidence matrix: {rows} transactions x {columns} masters, {len(incidence.indices)} non-zeros")
+    print(f"Incidence matrix saved to {INCIDENCE_DIR}")
+
+if __name__ == "__main__":
+    build_incidence_matrix()
@@ -0,0 +1,107 @@
+import pandas as pd
+import numpy as np
+import os
+import time
+from item_loans import CONDITIONS, load_item_loans
+from inventory_state import (STATE_DIR, ACQUIRE, BORROW, RETURN, NOT_ACQUIRED, ON_LOAN,
+                             UNKNOWN_CONDITION, InventoryState, to_epoch_seconds)
+from schema import load_tables
+from output_io import write_output
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+OUTPUT_FILE = "available_copies_at.csv"
+
+# Point in time for the sample report (None = time of the last event)
+QUERY_TIME = None
+
+def load_data():
+    print("Loading data...")
+    try:
+        items, masters = load_tables('build_inventory_state')
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None, None, None
+    loans = load_item_loans()
+    if loans is None:
+        return None, None, None
+    return items, masters, loans
+
+def condition_codes(values):
+    codes = pd.Categorical(values, categories=list(CONDITIONS)).codes
+    return np.where(codes >= 0, codes, UNKNOWN_CONDITION).astype(np.int8)
+
+def build_inventory_state():
+    items, masters, loans = load_data()
+    if items is None:
+        return
+
+    print("Building inventory event log...")
+    master_index = pd.Series(np.arange(len(masters), dtype=np.int32), index=masters['id'])
+    # Copies of masters missing from the catalog have no master to count them under
+    catalogued = items['masterId'].isin(master_index.index)
+    if not catalogued.all():
+        print(f"Skipping {int((~catalogued).sum())} copies whose masterId is not in book_masters")
+    items = items[catalogued].reset_index(drop=True)
+    item_index = pd.Series(np.arange(len(items), dtype=np.int32), index=items['id'])
+    loans = loans[loans['bookItemId'].isin(item_index.index)]
+    loan_items = loans['bookItemId'].map(item_index).to_numpy(dtype=np.int32)
+
+    borrowed_at = to_epoch_seconds(loans['borrowedAt'])
+    returned = loans['returnedAt'].notna().to_numpy()
+    returned_at = to_epoch_seconds(loans.loc[returned, 'returnedAt'])
+
+    # A copy lent out before its recorded createdAt is taken as acquired at its first loan
+    acquired_at = items['createdAt'].to_numpy()
+    first_borrow = np.full(len(items), np.iinfo(np.int64).max)
+    np.minimum.at(first_borrow, loan_items, borrowed_at)
+    acquired_at = np.minimum(acquired_at, first_borrow)
+
+    times = np.concatenate([acquired_at, borrowed_at, returned_at])
+    event_items = np.concatenate([np.arange(len(items), dtype=np.int32), loan_items, loan_items[returned]])
+    kinds = np.concatenate([
+        np.full(len(items), ACQUIRE, dtype=np.int8),
+        np.full(len(loans), BORROW, dtype=np.int8),
+        np.full(int(returned.sum()), RETURN, dtype=np.int8),
+    ])
+    conditions = np.concatenate([
+        np.full(len(items), UNKNOWN_CONDITION, dtype=np.int8),
+        condition_codes(loans['conditionAtBorrow']),
+        condition_codes(loans.loc[returned, 'conditionAtReturn']),
+    ])
+
+    state = InventoryState.from_events(
+        items['id'].astype(str).to_numpy().astype('S'),
+        items['masterId'].map(master_index).to_numpy(dtype=np.int32),
+        masters['id'].astype(str).to_numpy().astype('S'),
+        times, event_items, kinds, conditions)
+    state.save()
+    print(f"Event log: {len(state.times)} events, {len(state.snapshot_positions)} snapshots")
+    print(f"Inventory state saved to {STATE_DIR}")
+
+    # Point-in-time report
+    when = pd.Timestamp(QUERY_TIME) if QUERY_TIME is not None else pd.Timestamp(int(state.times[-1]), unit='s')
+    start = time.perf_counter()
+    available = state.available_copies_at(when)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    status, _ = state.state_at(when)
+    master_count = len(state.master_ids)
+
+    report = masters[['id', 'title']].rename(columns={'id': 'masterId'})
+    report['available_copies'] = available
+    report['on_loan'] = np.bincount(state.item_masters[status == ON_LOAN], minlength=master_count)
+    report['acquired_copies'] = np.bincount(state.item_masters[status != NOT_ACQUIRED], minlength=master_count)
+    report.insert(0, 'as_of', when.strftime('%Y-%m-%d %H:%M:%S'))
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    output_path = write_output(report, OUTPUT_FILE)
+    print(f"Available copies as of {when} saved to {output_path} (query took {elapsed_ms:.2f} ms)")
+
+    print("\nCopy status as of that time:")
+    print(state.status_at(when)['status'].value_counts())
+
+if __name__ == "__main__":
+    build_inventory_state()
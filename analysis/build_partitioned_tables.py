@@ -0,0 +1,69 @@
+import pandas as pd
+import os
+import shutil
+from schema import TABLES, DATETIME, read_table, source_fingerprint
+from output_io import write_output
+from partitioned_tables import (PARTITION_DIR, PARTITION_KEYS, PART_FILE, STATS_FILE, SOURCES_FILE,
+                                TIME_COLUMN, ROW_COLUMN, partition_path, partition_times, source_tables)
+
+# Rewrites the transaction tables into the year/month layout read by
+# partitioned_tables.py. Re-run after the dataset changes; each table's
+# directory is replaced as a whole.
+
+def load_data():
+    print("Loading data...")
+    tables = {}
+    try:
+        # Parents first: details are partitioned by their transaction's time
+        for table in PARTITION_KEYS:
+            tables[table] = read_table(table)
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None
+    return tables
+
+def partition_stats(table, part, year, month, times):
+    row = {'year': year, 'month': month, 'rows': len(part),
+           'min_time': times.min(), 'max_time': times.max()}
+    for column, dtype in TABLES[table]['columns'].items():
+        if dtype == DATETIME:
+            row[f'min_{column}'] = part[column].min()
+            row[f'max_{column}'] = part[column].max()
+    return row
+
+def build_partitioned_tables():
+    tables = load_data()
+    if tables is None:
+        return
+    sources = source_fingerprint(PARTITION_KEYS)
+
+    summary = []
+    for table, key in PARTITION_KEYS.items():
+        frame = tables[table]
+        times = partition_times(table, frame, tables.get(key.get('parent')))
+        frame = frame.assign(**{TIME_COLUMN: times.astype('Int64'), ROW_COLUMN: range(len(frame))})
+        stamps = pd.to_datetime(times, unit='s')
+        keys = pd.DataFrame({'year': stamps.dt.year, 'month': stamps.dt.month})
+
+        table_dir = os.path.join(PARTITION_DIR, table)
+        if os.path.exists(table_dir):
+            shutil.rmtree(table_dir)
+
+        stats = []
+        for (year, month), index in keys.groupby(['year', 'month'], dropna=False, sort=True).groups.items():
+            part = frame.loc[index]
+            write_output(part, PART_FILE, partition_path(table, year, month), export_csv=False)
+            stats.append(partition_stats(table, part, year, month, times.loc[index]))
+        stats = pd.DataFrame(stats).astype({'year': 'Int64', 'month': 'Int64', 'min_time': 'Int64', 'max_time': 'Int64'})
+        write_output(stats, STATS_FILE, table_dir, export_csv=False)
+        table_sources = sources[sources['table'].isin(source_tables(table))]
+        write_output(table_sources, SOURCES_FILE, table_dir, export_csv=False)
+        summary.append({'table': table, 'rows': len(frame), 'partitions': len(stats),
+                        'unpartitioned_rows': int(times.isna().sum())})
+        print(f"{table}: {len(frame)} rows in {len(stats)} partitions saved to {table_dir}")
+
+    print("\nPartition Summary:")
+    print(pd.DataFrame(summary))
+
+if __name__ == "__main__":
+    build_partitioned_tables()
@@ -0,0 +1,74 @@
+import pandas as pd
+import os
+import time
+from similar_books_index import INDEX_FILE, SimilarBooksIndex, load_similar_books_index
+from schema import load_tables
+from output_io import write_output
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+OUTPUT_FILE = "similar_books.csv"
+
+# Reuse an existing index and only apply catalog changes: new and edited masters
+# are (re-)added, deleted ones tombstoned (False = full refit)
+INCREMENTAL_REFRESH = True
+TOP_K = 10          # Neighbours written per book
+SAMPLE_MASTER_ID = "BM-0737"
+
+def load_data():
+    print("Loading data...")
+    try:
+        (masters,) = load_tables('build_similar_books_index')
+        return masters
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None
+
+def build_similar_books_index():
+    masters = load_data()
+    if masters is None:
+        return
+
+    index = load_similar_books_index() if INCREMENTAL_REFRESH else None
+    if index is None:
+        print("Fitting similar-books index on catalog metadata...")
+        index = SimilarBooksIndex().fit(masters)
+    else:
+        changed = masters[index.changed(masters)]
+        deleted = set(index.positions) - set(masters['id'].astype(str))
+        print(f"Refreshing similar-books index: {len(changed)} new or edited, {len(deleted)} deleted masters...")
+        index.remove(deleted)
+        index.add(changed)
+    index.save()
+    print(f"Indexed {len(index.positions)} masters ({index.vectors.shape[1]} dimensions)")
+    print(f"Similar-books index saved to {INDEX_FILE}")
+
+    print(f"Querying top {TOP_K} neighbours per book...")
+    rows = []
+    for master_id in masters['id'].astype(str):
+        for rank, (neighbour, similarity) in enumerate(index.query(master_id, k=TOP_K), start=1):
+            rows.append({'masterId': master_id, 'rank': rank, 'similar_masterId': neighbour, 'similarity': similarity})
+    similar = pd.DataFrame(rows)
+    titles = masters[['id', 'title']]
+    similar = similar.merge(titles.rename(columns={'id': 'masterId'}), on='masterId', how='left')
+    similar = similar.merge(titles.rename(columns={'id': 'similar_masterId', 'title': 'similar_title'}), on='similar_masterId', how='left')
+    similar = similar[['masterId', 'title', 'rank', 'similar_masterId', 'similar_title', 'similarity']]
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    output_path = write_output(similar, OUTPUT_FILE)
+    print(f"Similar books saved to {output_path}")
+
+    # Sample query
+    if SAMPLE_MASTER_ID in index.positions:
+        start = time.perf_counter()
+        neighbours = index.query(SAMPLE_MASTER_ID, k=5)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"\nBooks similar to {SAMPLE_MASTER_ID} ({elapsed_ms:.2f} ms):")
+        for master_id, similarity in neighbours:
+            print(f"  {master_id}  similarity={similarity:.3f}")
+
+if __name__ == "__main__":
+    build_similar_books_index()
@@ -1,9 +1,12 @@
 import pandas as pd
 import os
+from incidence_matrix import load_incidence_matrix
+from schema import load_tables
+from duplicate_masters import merge_duplicate_masters, canonicalize_master_ids
+from output_io import read_output, write_output, output_exists
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DATASET_DIR = os.path.join(SCRIPT_DIR, "../dataset")
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
 OUTPUT_FILE = "dss_recommendations.csv"
 
@@ -11,20 +14,40 @@ OUTPUT_FILE = "dss_recommendations.csv"
 WEIGHT_BORROW_COUNT = 1.0
 WEIGHT_POOR_COPY = 10.0  # High priority to replace poor copies
 WEIGHT_FAIR_COPY = 2.0   # Medium priority
+WEIGHT_POOR_SOON_COPY = 5.0  # Predicted to reach Poor within REPLACEMENT_HORIZON_DAYS
 WEIGHT_LOST_COPY = 15.0  # Highest priority (if we had lost status, keeping for future)
 
+# Low Stock thresholds when copy_utilization.csv (analyze_copy_utilization.py) is available
+LOW_STOCK_UTILIZATION = 0.5  # Share of copy-time spent on loan
+LOW_STOCK_STOCKOUT = 0.1     # Share of time with every copy on loan
+
+# Forward-looking replacement when condition_forecast.csv (analyze_condition_degradation.py) is available
+REPLACEMENT_HORIZON_DAYS = 180
+
+# Count copies of duplicate masters (find_duplicate_masters.py) under their canonical master
+MERGE_DUPLICATE_MASTERS = True
+
 def load_data():
     print("Loading data...")
     try:
-        items = pd.read_csv(os.path.join(DATASET_DIR, "book_items.csv"))
-        masters = pd.read_csv(os.path.join(DATASET_DIR, "book_masters.csv"))
+        items, masters = load_tables('dss_recommendation')
+        if MERGE_DUPLICATE_MASTERS:
+            items, masters = merge_duplicate_masters(items, masters)
         
         # We can use the existing book_analysis.csv for borrow counts if available, 
         # but recalculating ensures we are self-contained or we can use top_books.csv
         # Let's use top_books.csv if it exists, otherwise recalculate or load borrow_details
-        top_books_path = os.path.join(OUTPUT_DIR, "top_books.csv")
-        if os.path.exists(top_books_path):
-            popularity = pd.read_csv(top_books_path)
+        # The persisted incidence matrix (build_incidence_matrix.py) is preferred when present
+        incidence = load_incidence_matrix()
+        if incidence is not None:
+            borrow_counts = pd.Series(incidence.borrow_counts(), index=incidence.master_ids.astype(str))
+            if MERGE_DUPLICATE_MASTERS:
+                borrow_counts = borrow_counts.groupby(canonicalize_master_ids(borrow_counts.index).to_numpy()).sum()
+            popularity = masters[['id', 'title', 'author']].rename(columns={'id': 'masterId'})
+            popularity['borrow_count'] = popularity['masterId'].map(borrow_counts).fillna(0).astype(int)
+            popularity = popularity[popularity['borrow_count'] > 0]
+        elif output_exists("top_books.csv"):
+            popularity = read_output("top_books.csv")
         else:
             print("top_books.csv not found, please run analyze_top_books.py first.")
             return None, None, None
@@ -34,19 +57,42 @@ def load_data():
         print(f"Error loading files: {e}")
         return None, None, None
 
+def load_optional_output(filename, columns=None, filters=None):
+    # Optional inputs produced by other analyses; the DSS still runs without them.
+    # Only the columns (and rows) the DSS uses are read.
+    if output_exists(filename):
+        return read_output(filename, columns=columns, filters=filters)
+    print(f"{filename} not found, continuing without it.")
+    return None
+
 def calculate_dss_score(row):
     score = (row['borrow_count'] * WEIGHT_BORROW_COUNT) + \
             (row['poor_copies'] * WEIGHT_POOR_COPY) + \
             (row['fair_copies'] * WEIGHT_FAIR_COPY)
+    if 'poor_soon_copies' in row and pd.notna(row['poor_soon_copies']):
+        score += row['poor_soon_copies'] * WEIGHT_POOR_SOON_COPY
     return score
 
 def determine_action(row):
     actions = []
     if row['poor_copies'] > 0:
         actions.append(f"Replace {row['poor_copies']} Poor cop{'y' if row['poor_copies']==1 else 'ies'}")
+    if 'poor_soon_copies' in row and pd.notna(row['poor_soon_copies']) and row['poor_soon_copies'] > 0:
+        actions.append(f"Plan replacement of {int(row['poor_soon_copies'])} cop{'y' if row['poor_soon_copies']==1 else 'ies'} "
+                       f"(Poor within {REPLACEMENT_HORIZON_DAYS} days)")
     
-    if row['borrow_count'] > 10: # Arbitrary threshold for "High Demand"
+    # Distinct borrowers (analyze_distinct_borrowers.py) stop a few heavy readers
+    # re-borrowing the same title from looking like broad demand
+    demand = row['borrow_count']
+    if 'distinct_borrowers' in row and pd.notna(row['distinct_borrowers']):
+        demand = row['distinct_borrowers']
+
+    if demand > 10: # Arbitrary threshold for "High Demand"
         actions.append("Buy more copies (High Demand)")
+    elif 'utilization' in row and pd.notna(row['utilization']):
+        # Measured loan intervals replace the borrow-count / copy-count heuristic
+        if row['utilization'] >= LOW_STOCK_UTILIZATION or row['stockout_fraction'] >= LOW_STOCK_STOCKOUT:
+            actions.append("Buy more copies (Low Stock)")
     elif row['borrow_count'] > 5 and row['total_copies'] < 3:
         actions.append("Buy more copies (Low Stock)")
         
@@ -55,13 +101,8 @@ def determine_action(row):
     
     return ", ".join(actions)
 
-def run_dss():
-    items, masters, popularity = load_data()
-    if items is None:
-        return
-
-    print("Running DSS Analysis...")
-
+def merge_inventory(popularity, items):
+    # Copies per condition of every master next to its borrow count (also used by preview_analysis.py)
     # 1. Analyze Inventory Condition per Master Book
     # Create dummies for condition
     condition_dummies = pd.get_dummies(items['condition'])
@@ -98,6 +139,57 @@ def run_dss():
     dss_df['total_copies'] = dss_df['total_copies'].fillna(0)
     dss_df['poor_copies'] = dss_df['poor_copies'].fillna(0)
     dss_df['fair_copies'] = dss_df['fair_copies'].fillna(0)
+    return dss_df
+
+def run_dss():
+    items, masters, popularity = load_data()
+    if items is None:
+        return
+
+    print("Running DSS Analysis...")
+
+    dss_df = merge_inventory(popularity, items)
+
+    distinct_borrowers = load_optional_output("distinct_borrowers.csv", columns=['masterId', 'distinct_borrowers'])
+    if distinct_borrowers is not None:
+        dss_df = dss_df.merge(distinct_borrowers, on='masterId', how='left')
+
+    utilization_cols = ['masterId', 'utilization', 'peak_concurrent_loans', 'stockout_fraction']
+    utilization = load_optional_output("copy_utilization.csv", columns=utilization_cols)
+    if utilization is not None:
+        dss_df = dss_df.merge(utilization, on='masterId', how='left')
+
+    forecast = load_optional_output("demand_forecast.csv",
+                                    columns=['id', 'forecast_next_month', 'forecast_horizon_total'],
+                                    filters=[('level', '==', 'master')])
+    if forecast is not None:
+        forecast = forecast.rename(columns={
+            'id': 'masterId',
+            'forecast_next_month': 'forecast_demand_next_month',
+            'forecast_horizon_total': 'forecast_demand_horizon',
+        })
+        forecast_cols = ['masterId', 'forecast_demand_next_month', 'forecast_demand_horizon']
+        dss_df = dss_df.merge(forecast[forecast_cols], on='masterId', how='left')
+
+    condition_forecast = load_optional_output("condition_forecast.csv",
+                                              columns=['masterId', 'condition', 'expected_days_to_poor', 'poor_reachable'])
+    if condition_forecast is not None:
+        # Degenerate input (no loan observed taking a copy into Poor): no replacement signal at all
+        reachable = condition_forecast['poor_reachable'].fillna(False).astype(bool)
+        if not (reachable & (condition_forecast['condition'] != 'Poor')).any():
+            print("condition_forecast.csv has no copy that can still reach Poor, skipping the replacement signal.")
+            condition_forecast = None
+    if condition_forecast is not None:
+        # Copies not yet Poor that the degradation model expects to get there soon;
+        # copies with no observed path to Poor (NaN days) never count
+        soon = (condition_forecast['condition'] != 'Poor') & \
+               (condition_forecast['expected_days_to_poor'] <= REPLACEMENT_HORIZON_DAYS)
+        condition_forecast['poor_soon'] = soon.astype(int)
+        degradation = condition_forecast.groupby('masterId').agg(
+            poor_soon_copies=('poor_soon', 'sum'),
+            min_days_to_poor=('expected_days_to_poor', lambda days: days[days > 0].min()),
+        ).reset_index()
+        dss_df = dss_df.merge(degradation, on='masterId', how='left')
     
     # 3. Calculate Score
     dss_df['recommendation_score'] = dss_df.apply(calculate_dss_score, axis=1)
@@ -111,18 +203,34 @@ def run_dss():
     
     # Select output columns
     output_cols = ['masterId', 'title', 'author', 'borrow_count', 'total_copies', 'poor_copies', 'fair_copies', 'recommendation_score', 'recommended_action']
+    if 'distinct_borrowers' in recommendations.columns:
+        output_cols.insert(output_cols.index('borrow_count') + 1, 'distinct_borrowers')
+    if 'forecast_demand_next_month' in recommendations.columns:
+        position = output_cols.index('total_copies')
+        output_cols[position:position] = ['forecast_demand_next_month', 'forecast_demand_horizon']
+    if 'poor_soon_copies' in recommendations.columns:
+        position = output_cols.index('fair_copies') + 1
+        output_cols[position:position] = ['poor_soon_copies', 'min_days_to_poor']
+    if 'utilization' in recommendations.columns:
+        position = output_cols.index('fair_copies') + 1
+        output_cols[position:position] = ['utilization', 'peak_concurrent_loans', 'stockout_fraction']
     final_output = recommendations[output_cols]
     
     # Save
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
         
-    output_path = os.path.join(OUTPUT_DIR, OUTPUT_FILE)
-    final_output.to_csv(output_path, index=False)
+    output_path = write_output(final_output, OUTPUT_FILE)
     print(f"DSS Recommendations saved to {output_path}")
     
     print("\nTop 10 Recommendations:")
     print(final_output.head(10))
 
 if __name__ == "__main__":
-    run_dss()
+    # --sample [FRACTION]: fast estimate with error bounds (preview_analysis.py)
+    from preview_analysis import parse_sample_fraction, run_preview
+    sample_fraction = parse_sample_fraction()
+    if sample_fraction is not None:
+        run_preview(sample_fraction, ['dss_recommendations'])
+    else:
+        run_dss()
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from output_io import read_output, output_exists
+
+# Read side of the duplicate-master report written by find_duplicate_masters.py.
+# Analyses that key on masterId (popularity, top books, book association,
+# distinct borrowers, copy utilization, demand and condition forecasts, DSS)
+# map every member of a duplicate cluster to its canonical master, so copies
+# catalogued under several BM- ids are counted once instead of being merged
+# implicitly by title. Without the report everything is left unchanged.
+
+DUPLICATES_FILE = "duplicate_masters.csv"
+
+def load_canonical_masters(filename=DUPLICATES_FILE):
+    # masterId -> canonical_masterId for masters in a duplicate cluster, or None
+    # when find_duplicate_masters.py has not been run
+    if not output_exists(filename):
+        return None
+    report = read_output(filename, columns=['masterId', 'canonical_masterId'])
+    return report.set_index('masterId')['canonical_masterId']
+
+def canonicalize_master_ids(master_ids, canonical=None):
+    # Replace duplicate masterIds with their canonical id; others are unchanged
+    if canonical is None:
+        canonical = load_canonical_masters()
+    master_ids = pd.Series(master_ids)
+    if canonical is None:
+        return master_ids
+    return master_ids.map(canonical).fillna(master_ids)
+
+def merge_duplicate_masters(items, masters, canonical=None):
+    # Points the copies of duplicate masters at their canonical master and drops
+    # the non-canonical duplicates from `masters`
+    if canonical is None:
+        canonical = load_canonical_masters()
+    if canonical is None or canonical.empty:
+        return items, masters
+    items = items.assign(masterId=canonicalize_master_ids(items['masterId'], canonical).to_numpy())
+    duplicates = canonical.index[canonical.index != canonical.to_numpy()]
+    return items, masters[~masters['id'].isin(duplicates)]
+
+def canonical_labels(master_ids, labels, canonical=None):
+    # Per-master labels (e.g. titles) with each duplicate taking its canonical master's label
+    labels = pd.Series(list(labels), index=list(master_ids))
+    canonical_labels = labels.reindex(canonicalize_master_ids(labels.index, canonical)).to_numpy()
+    # A canonical master missing from master_ids keeps the duplicate's own label
+    return np.where(pd.isna(canonical_labels), labels.to_numpy(), canonical_labels)
@@ -0,0 +1,145 @@
+import pandas as pd
+import numpy as np
+import os
+import re
+from sketches import hash_keys, minhash_signatures, lsh_candidate_pairs
+from duplicate_masters import DUPLICATES_FILE
+from output_io import write_output
+from schema import load_tables
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+
+SHINGLE_SIZE = 3           # Character shingles over "title | author"
+NUM_PERM = 128             # MinHash signature length
+LSH_BANDS = 16             # 16 bands x 8 rows: collision threshold ~0.7, >99.9% at Jaccard 0.9
+JACCARD_THRESHOLD = 0.9    # Verified similarity needed to call two masters duplicates
+
+def load_data():
+    print("Loading data...")
+    try:
+        (masters,) = load_tables('find_duplicate_masters')
+        return masters
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None
+
+def normalize_text(values):
+    return values.fillna('').astype(str).str.lower().str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip()
+
+def shingle_sets(texts):
+    # Set of character k-shingles per text (the whole text if shorter than k)
+    shingles = []
+    for text in texts:
+        if len(text) <= SHINGLE_SIZE:
+            shingles.append({text} if text else set())
+        else:
+            shingles.append({text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)})
+    return shingles
+
+def jaccard(a, b):
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            # Lower index becomes the root so clusters are deterministic
+            self.parent[max(a, b)] = min(a, b)
+
+def find_duplicate_masters():
+    masters = load_data()
+    if masters is None:
+        return
+
+    masters = masters.reset_index(drop=True)
+    n = len(masters)
+    titles = normalize_text(masters['title'])
+    authors = normalize_text(masters['author'])
+    texts = (titles + ' | ' + authors).tolist()
+    # Volume / edition numbers must match exactly ("Music 3" is not "Music 4")
+    numbers = [tuple(re.findall(r'\d+', title)) for title in titles]
+
+    print("Computing MinHash signatures...")
+    shingles = shingle_sets(texts)
+    doc_index = np.repeat(np.arange(n), [len(s) for s in shingles])
+    flat = [shingle for s in shingles for shingle in s]
+    signatures = minhash_signatures(doc_index, hash_keys(flat), n, num_perm=NUM_PERM)
+
+    print("Blocking candidate pairs...")
+    candidates = lsh_candidate_pairs(signatures, LSH_BANDS)
+    lsh_candidates = len(candidates)
+
+    # Exact ISBN blocking: same ISBN means the same edition regardless of metadata
+    isbn = masters['isbn'].fillna('').astype(str).str.replace(r'[^0-9Xx]', '', regex=True).str.upper()
+    isbn_pairs = set()
+    for members in pd.Series(np.arange(n))[isbn != ''].groupby(isbn[isbn != '']):
+        members = members[1].to_numpy()
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                isbn_pairs.add((int(members[i]), int(members[j])))
+
+    print(f"Verifying {lsh_candidates} LSH and {len(isbn_pairs)} ISBN candidate pairs "
+          f"(all-pairs would be {n * (n - 1) // 2})...")
+    union_find = UnionFind(n)
+    matches = []
+    for i, j in sorted(candidates | isbn_pairs):
+        similarity = jaccard(shingles[i], shingles[j])
+        if (i, j) in isbn_pairs:
+            match = 'isbn'
+        elif similarity >= JACCARD_THRESHOLD and numbers[i] == numbers[j]:
+            match = 'minhash'
+        else:
+            continue
+        union_find.union(i, j)
+        matches.append((i, j, match, similarity))
+
+    # Cluster report: every member of a cluster with more than one master
+    roots = np.array([union_find.find(i) for i in range(n)])
+    cluster_sizes = np.bincount(roots, minlength=n)
+    members = np.flatnonzero(cluster_sizes[roots] > 1)
+    match_type = {}
+    for i, j, match, _ in matches:
+        for k in (i, j):
+            match_type[k] = 'isbn' if match == 'isbn' or match_type.get(k) == 'isbn' else match
+
+    report = pd.DataFrame({
+        'cluster_id': pd.factorize(roots[members])[0] + 1,
+        'masterId': masters.loc[members, 'id'].to_numpy(),
+        'canonical_masterId': masters.loc[roots[members], 'id'].to_numpy(),
+        'title': masters.loc[members, 'title'].to_numpy(),
+        'author': masters.loc[members, 'author'].to_numpy(),
+        'isbn': masters.loc[members, 'isbn'].to_numpy(),
+        'cluster_size': cluster_sizes[roots[members]],
+        'match': [match_type.get(i, '') for i in members],
+        'jaccard_to_canonical': [round(jaccard(shingles[i], shingles[roots[i]]), 4) for i in members],
+    })
+    # One block per cluster, members in masterId order
+    report = report.sort_values(['cluster_id', 'masterId'], kind='stable').reset_index(drop=True)
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    output_path = write_output(report, DUPLICATES_FILE)
+    print(f"Found {report['cluster_id'].nunique() if not report.empty else 0} duplicate clusters "
+          f"covering {len(report)} masters")
+    print(f"Duplicate master report saved to {output_path}")
+
+    if not report.empty:
+        print("\nSample Duplicate Clusters:")
+        print(report.head(10))
+
+if __name__ == "__main__":
+    find_duplicate_masters()
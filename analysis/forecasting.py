@@ -0,0 +1,99 @@
+import numpy as np
+
+# Batched demand forecasting for many monthly count series at once.
+# Every function takes a 2-D array y of shape (n_series, n_periods) and loops
+# over time only, so thousands of series are fitted with a handful of
+# vectorised numpy updates instead of one model fit per series.
+
+SES_ALPHAS = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.7])
+CROSTON_ALPHA = 0.1
+ADI_CUTOFF = 1.32  # Syntetos-Boylan: mean interval between demands above this is intermittent
+
+def demand_profile(y):
+    # Average demand interval (ADI) and squared CV of non-zero demand sizes
+    y = np.asarray(y, dtype=np.float64)
+    nonzero = y > 0
+    n_demands = nonzero.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        adi = np.where(n_demands > 0, y.shape[1] / n_demands, np.inf)
+        mean_size = np.where(n_demands > 0, y.sum(axis=1) / n_demands, 0.0)
+        squares = np.where(nonzero, (y - mean_size[:, None]) ** 2, 0.0).sum(axis=1)
+        cv2 = np.where(n_demands > 1, squares / np.maximum(n_demands - 1, 1) / mean_size ** 2, 0.0)
+    return adi, np.nan_to_num(cv2)
+
+def simple_exponential_smoothing(y, alphas=SES_ALPHAS):
+    # SES fitted over a grid of smoothing constants; each series keeps the alpha
+    # with the smallest one-step-ahead squared error. Returns (forecast, alpha).
+    y = np.asarray(y, dtype=np.float64)
+    alphas = np.asarray(alphas, dtype=np.float64)[:, None]
+    level = np.repeat(y[None, :, 0], len(alphas), axis=0)
+    sse = np.zeros_like(level)
+    for t in range(1, y.shape[1]):
+        error = y[None, :, t] - level
+        sse += error ** 2
+        level += alphas * error
+    best = np.argmin(sse, axis=0)
+    series = np.arange(y.shape[0])
+    return level[best, series], alphas[best, 0]
+
+def croston(y, alpha=CROSTON_ALPHA, sba=True):
+    # Croston's method for intermittent demand: demand size and the interval
+    # between demands are smoothed separately and only updated in periods with
+    # demand. sba applies the Syntetos-Boylan bias correction (1 - alpha / 2).
+    y = np.asarray(y, dtype=np.float64)
+    n_series, n_periods = y.shape
+    adi, _ = demand_profile(y)
+    has_demand = np.isfinite(adi)
+    size = np.where(has_demand, y.sum(axis=1) / np.maximum((y > 0).sum(axis=1), 1), 0.0)
+    interval = np.where(has_demand, adi, 1.0)
+    since_last = np.ones(n_series)
+    for t in range(n_periods):
+        demand = y[:, t] > 0
+        size = np.where(demand, size + alpha * (y[:, t] - size), size)
+        interval = np.where(demand, interval + alpha * (since_last - interval), interval)
+        since_last = np.where(demand, 1.0, since_last + 1.0)
+    forecast = np.where(has_demand, size / interval, 0.0)
+    if sba:
+        forecast *= 1.0 - alpha / 2.0
+    return forecast
+
+def seasonal_indices(y, season_length):
+    # Multiplicative seasonal indices pooled over all series, or None when there
+    # are fewer than two full seasons to estimate them from
+    y = np.asarray(y, dtype=np.float64)
+    n_periods = y.shape[1]
+    if season_length <= 1 or n_periods < 2 * season_length:
+        return None
+    total = y.sum(axis=0)
+    positions = np.arange(n_periods) % season_length
+    season_means = np.bincount(positions, weights=total, minlength=season_length) / np.bincount(positions, minlength=season_length)
+    if season_means.mean() <= 0:
+        return None
+    indices = season_means / season_means.mean()
+    return np.where(indices > 0, indices, 1.0)
+
+def forecast_demand(y, horizon=3, season_length=12, alphas=SES_ALPHAS, croston_alpha=CROSTON_ALPHA):
+    # Per-series forecasts for the next `horizon` periods. Smooth series use
+    # SES, intermittent ones (ADI > ADI_CUTOFF) use Croston-SBA; both are
+    # fitted on deseasonalised data when seasonal indices can be estimated.
+    y = np.asarray(y, dtype=np.float64)
+    n_periods = y.shape[1]
+    indices = seasonal_indices(y, season_length)
+    adjusted = y / indices[np.arange(n_periods) % season_length] if indices is not None else y
+
+    adi, cv2 = demand_profile(y)
+    intermittent = adi > ADI_CUTOFF
+    ses_forecast, ses_alpha = simple_exponential_smoothing(adjusted, alphas)
+    croston_forecast = croston(adjusted, croston_alpha)
+    level = np.where(intermittent, croston_forecast, ses_forecast)
+
+    future = np.ones(horizon)
+    if indices is not None:
+        future = indices[np.arange(n_periods, n_periods + horizon) % season_length]
+    return {
+        'method': np.where(intermittent, 'croston_sba', 'ses'),
+        'alpha': np.where(intermittent, croston_alpha, ses_alpha),
+        'adi': adi,
+        'cv2': cv2,
+        'forecast': np.clip(level[:, None] * future[None, :], 0.0, None),
+    }
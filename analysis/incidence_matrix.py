@@ -0,0 +1,82 @@
+import os
+import numpy as np
+from output_io import output_exists, read_output
+from schema import DATASET_DIR, SCRIPT_COLUMNS, fingerprint_matches
+
+# Read side of the transaction x master incidence matrix written by
+# build_incidence_matrix.py. The matrix is stored in CSR form as plain .npy
+# files and opened with np.load(mmap_mode='r'), so every worker process maps
+# the same page-cached copy instead of rebuilding baskets with groupby.
+#
+# Layout (all in INCIDENCE_DIR):
+#   indptr.npy                  int64[n_transactions + 1]  row start offsets
+#   indices.npy                 int32[nnz]                 master column of each entry
+#   data.npy                    int32[nnz]                 copies of that master in the transaction
+#   transaction_ids.npy         S[n_transactions]          borrowId of each row (sorted)
+#   transaction_students.npy    int32[n_transactions]      row -> index into student_ids
+#   transaction_borrowed_at.npy int64[n_transactions]      borrow time, seconds since epoch
+#   master_ids.npy              S[n_masters]               masterId of each column
+#   master_titles.npy           U[n_masters]               title of each column
+#   student_ids.npy             S[n_students]
+#   sources.<csv|parquet|...>   size/mtime of the dataset files it was built from
+#
+# A matrix whose sources no longer match the dataset is stale: it is not
+# loaded, and callers fall back to the CSVs until it is rebuilt.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INCIDENCE_DIR = os.path.join(SCRIPT_DIR, "output", "incidence")
+
+ARRAY_NAMES = (
+    "indptr", "indices", "data",
+    "transaction_ids", "transaction_students", "transaction_borrowed_at",
+    "master_ids", "master_titles", "student_ids",
+)
+SOURCES_FILE = "sources.csv"
+SOURCE_TABLES = tuple(SCRIPT_COLUMNS['build_incidence_matrix'])
+
+class IncidenceMatrix:
+    def __init__(self, arrays):
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+
+    @property
+    def shape(self):
+        return len(self.transaction_ids), len(self.master_ids)
+
+    def borrow_counts(self):
+        # Borrowed copies per master (same as counting borrow_details rows)
+        return np.bincount(self.indices, weights=self.data, minlength=self.shape[1]).astype(np.int64)
+
+    def baskets(self, labels=None):
+        # Sorted, de-duplicated labels per transaction (masterIds by default, e.g. titles)
+        if labels is None:
+            labels = self.master_ids.astype(str)
+        labels = np.asarray(labels)
+        indptr = np.asarray(self.indptr)
+        row_labels = labels[np.asarray(self.indices)]
+        return [sorted(set(row_labels[start:end].tolist())) for start, end in zip(indptr[:-1], indptr[1:])]
+
+    def to_csr(self, binary=False):
+        # scipy.sparse view over the mapped arrays
+        from scipy.sparse import csr_matrix
+        data = np.ones(len(self.indices), dtype=np.int32) if binary else self.data
+        return csr_matrix((data, self.indices, self.indptr), shape=self.shape, copy=False)
+
+def incidence_matrix_exists(incidence_dir=INCIDENCE_DIR):
+    return all(os.path.exists(os.path.join(incidence_dir, f"{name}.npy")) for name in ARRAY_NAMES)
+
+def incidence_matrix_is_current(incidence_dir=INCIDENCE_DIR, dataset_dir=DATASET_DIR):
+    saved = read_output(SOURCES_FILE, output_dir=incidence_dir) if output_exists(SOURCES_FILE, incidence_dir) else None
+    return fingerprint_matches(saved, SOURCE_TABLES, dataset_dir)
+
+def load_incidence_matrix(incidence_dir=INCIDENCE_DIR, mmap_mode='r', dataset_dir=DATASET_DIR):
+    # Returns None when build_incidence_matrix.py has not been run, or when the
+    # dataset changed since it was (the caller then reads the CSVs)
+    if not incidence_matrix_exists(incidence_dir):
+        return None
+    if not incidence_matrix_is_current(incidence_dir, dataset_dir):
+        print("Persisted incidence matrix is older than the dataset, ignoring it "
+              "(re-run build_incidence_matrix.py)")
+        return None
+    arrays = {name: np.load(os.path.join(incidence_dir, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAY_NAMES}
+    return IncidenceMatrix(arrays)
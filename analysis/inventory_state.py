@@ -0,0 +1,156 @@
+import os
+import numpy as np
+import pandas as pd
+from item_loans import CONDITIONS
+
+# Event-sourced copy inventory built by build_inventory_state.py.
+#
+# Every copy's history is an ordered event log (acquisition, borrow, return)
+# with the condition recorded at that event. A full state vector (status and
+# last known condition of every copy) is snapshotted every SNAPSHOT_INTERVAL
+# events, so a point-in-time query loads the nearest earlier snapshot and
+# replays only the events after it instead of scanning the whole history.
+# Replaying a segment is vectorised: the last event per copy in the segment
+# decides its state.
+#
+# Every array is an uncompressed .npy file in STATE_DIR opened with
+# np.load(mmap_mode='r'), as in incidence_matrix.py. A snapshot is one
+# contiguous row of snapshot_status/snapshot_condition, so a query only reads
+# that row plus the event tail after it, never the whole log.
+#
+# Layout (all in STATE_DIR):
+#   item_ids.npy            S[n_items]
+#   item_masters.npy        int32[n_items]               index into master_ids
+#   master_ids.npy          S[n_masters]
+#   times.npy               int64[n_events]              sorted event times
+#   items.npy               int32[n_events]              copy of each event
+#   kinds.npy               int8[n_events]               ACQUIRE / RETURN / BORROW
+#   conditions.npy          int8[n_events]               index into CONDITIONS or -1
+#   snapshot_positions.npy  int64[n_snapshots]           events applied in each snapshot
+#   snapshot_status.npy     int8[n_snapshots, n_items]   one row per snapshot
+#   snapshot_condition.npy  int8[n_snapshots, n_items]
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(SCRIPT_DIR, "output", "inventory_state")
+
+ARRAY_NAMES = (
+    "item_ids", "item_masters", "master_ids", "times", "items", "kinds", "conditions",
+    "snapshot_positions", "snapshot_status", "snapshot_condition",
+)
+
+SNAPSHOT_INTERVAL = 1000  # Events between snapshots
+
+# Event types; at equal timestamps acquisitions apply first, then returns, then borrows
+ACQUIRE, RETURN, BORROW = 0, 1, 2
+# Status codes
+NOT_ACQUIRED, AVAILABLE, ON_LOAN = 0, 1, 2
+STATUS_NAMES = ('Not Acquired', 'Available', 'Borrowed')
+EVENT_STATUS = np.array([AVAILABLE, AVAILABLE, ON_LOAN], dtype=np.int8)
+UNKNOWN_CONDITION = -1
+
+def to_epoch_seconds(times):
+    return pd.to_datetime(pd.Series(times)).to_numpy(dtype='datetime64[s]').astype(np.int64)
+
+class InventoryState:
+    def __init__(self, item_ids, item_masters, master_ids, times, items, kinds, conditions,
+                 snapshot_positions, snapshot_status, snapshot_condition):
+        self.item_ids = item_ids                      # S[n_items]
+        self.item_masters = item_masters              # int32[n_items], index into master_ids
+        self.master_ids = master_ids                  # S[n_masters]
+        self.times = times                            # int64[n_events], sorted
+        self.items = items                            # int32[n_events]
+        self.kinds = kinds                            # int8[n_events]
+        self.conditions = conditions                  # int8[n_events], index into CONDITIONS or -1
+        self.snapshot_positions = snapshot_positions  # int64[n_snapshots], events applied
+        self.snapshot_status = snapshot_status        # int8[n_snapshots, n_items]
+        self.snapshot_condition = snapshot_condition  # int8[n_snapshots, n_items]
+
+    @classmethod
+    def from_events(cls, item_ids, item_masters, master_ids, times, items, kinds, conditions,
+                    snapshot_interval=SNAPSHOT_INTERVAL):
+        order = np.lexsort((kinds, times))
+        times, items, kinds, conditions = times[order], items[order], kinds[order], conditions[order]
+        n_items = len(item_ids)
+
+        status = np.full(n_items, NOT_ACQUIRED, dtype=np.int8)
+        condition = np.full(n_items, UNKNOWN_CONDITION, dtype=np.int8)
+        positions = np.arange(0, len(times) + 1, snapshot_interval, dtype=np.int64)
+        snapshot_status = np.empty((len(positions), n_items), dtype=np.int8)
+        snapshot_condition = np.empty((len(positions), n_items), dtype=np.int8)
+        state = cls(item_ids, item_masters, master_ids, times, items, kinds, conditions,
+                    positions, snapshot_status, snapshot_condition)
+        previous = 0
+        for i, position in enumerate(positions):
+            state._replay(status, condition, previous, position)
+            snapshot_status[i] = status
+            snapshot_condition[i] = condition
+            previous = position
+        return state
+
+    def _replay(self, status, condition, start, stop):
+        # Apply events[start:stop] in place: the last event per copy wins
+        if stop <= start:
+            return
+        items = self.items[start:stop]
+        last = _last_index(items)
+        status[items[last]] = EVENT_STATUS[self.kinds[start:stop][last]]
+        known = np.flatnonzero(self.conditions[start:stop] >= 0)
+        if len(known):
+            last_known = known[_last_index(items[known])]
+            condition[items[last_known]] = self.conditions[start:stop][last_known]
+
+    def state_at(self, when):
+        # (status, condition) arrays of every copy after all events at or before `when`
+        target = int(np.searchsorted(self.times, to_epoch_seconds([when])[0], side='right'))
+        snapshot = int(np.searchsorted(self.snapshot_positions, target, side='right')) - 1
+        status = np.array(self.snapshot_status[snapshot])
+        condition = np.array(self.snapshot_condition[snapshot])
+        self._replay(status, condition, int(self.snapshot_positions[snapshot]), target)
+        return status, condition
+
+    def status_at(self, when):
+        # Status and last known condition of every copy at `when`
+        status, condition = self.state_at(when)
+        # UNKNOWN_CONDITION (-1) picks the trailing None
+        condition_names = np.array(CONDITIONS + (None,), dtype=object)
+        return pd.DataFrame({
+            'bookItemId': self.item_ids.astype(str),
+            'masterId': self.master_ids.astype(str)[self.item_masters],
+            'status': np.array(STATUS_NAMES)[status],
+            'condition': condition_names[condition],
+        })
+
+    def available_copies_at(self, when):
+        # Available copies per master at `when` (int64[n_masters])
+        status, _ = self.state_at(when)
+        return np.bincount(self.item_masters[status == AVAILABLE], minlength=len(self.master_ids))
+
+    def available_copies(self, master_id, when):
+        master = np.flatnonzero(self.master_ids.astype(str) == master_id)
+        if len(master) == 0:
+            raise KeyError(f"{master_id} is not in the inventory state")
+        status, _ = self.state_at(when)
+        return int(((self.item_masters == master[0]) & (status == AVAILABLE)).sum())
+
+    def save(self, state_dir=STATE_DIR):
+        if not os.path.exists(state_dir):
+            os.makedirs(state_dir)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(state_dir, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, state_dir=STATE_DIR, mmap_mode='r'):
+        return cls(**{name: np.load(os.path.join(state_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+                      for name in ARRAY_NAMES})
+
+def _last_index(values):
+    # Index of the last occurrence of every distinct value
+    reversed_values = values[::-1]
+    _, first_in_reversed = np.unique(reversed_values, return_index=True)
+    return len(values) - 1 - first_in_reversed
+
+def load_inventory_state(state_dir=STATE_DIR, mmap_mode='r'):
+    # Returns None when build_inventory_state.py has not been run
+    if not all(os.path.exists(os.path.join(state_dir, f"{name}.npy")) for name in ARRAY_NAMES):
+        return None
+    return InventoryState.load(state_dir, mmap_mode)
@@ -0,0 +1,43 @@
+import pandas as pd
+from schema import DATASET_DIR, CONDITIONS
+from partitioned_tables import load_tables_in_range
+
+# Item-level loan table shared by the inventory, utilization, condition and
+# lateness analyses: one row per borrow_details line joined to its transaction,
+# its master and (when returned) the matching return_details line.
+#
+# return_details has no borrowId, so returns are matched through
+# return_transactions on (borrowId, bookItemId).
+
+LOAN_COLUMNS = [
+    'borrowId', 'bookItemId', 'masterId', 'studentId',
+    'borrowedAt', 'dueDate', 'returnedAt',
+    'conditionAtBorrow', 'conditionAtReturn', 'notes',
+]
+
+def load_item_loans(dataset_dir=DATASET_DIR, start=None, end=None):
+    # Returns None when a dataset file is missing; returnedAt is NaT for open loans.
+    # start/end (epoch seconds, half-open) keep loans borrowed in that range; a
+    # return cannot precede its borrow, so returns are read from `start` onward.
+    returns_range = (start, None)
+    try:
+        transactions, details, items, return_transactions, return_details = load_tables_in_range(
+            'item_loans', start, end, dataset_dir,
+            ranges={'return_transactions': returns_range, 'return_details': returns_range})
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None
+
+    returns = return_details[['returnId', 'bookItemId', 'conditionAtReturn', 'notes']].merge(
+        return_transactions[['id', 'borrowId', 'returnedAt']], left_on='returnId', right_on='id', how='inner')
+
+    loans = details[['borrowId', 'bookItemId', 'conditionAtBorrow']].merge(
+        transactions[['id', 'studentId', 'borrowedAt', 'dueDate']], left_on='borrowId', right_on='id', how='inner')
+    loans = loans.merge(items[['id', 'masterId']], left_on='bookItemId', right_on='id', how='left', suffixes=('', '_item'))
+    loans = loans.merge(returns[['borrowId', 'bookItemId', 'returnedAt', 'conditionAtReturn', 'notes']],
+                        on=['borrowId', 'bookItemId'], how='left')
+
+    for column in ['borrowedAt', 'dueDate', 'returnedAt']:
+        # schema.py reads timestamps as epoch seconds
+        loans[column] = pd.to_datetime(loans[column], unit='s')
+    return loans[LOAN_COLUMNS]
@@ -0,0 +1,106 @@
+import os
+import operator
+import pandas as pd
+
+# Pluggable storage for the tables in analysis/output. Scripts name their
+# outputs as before ("association_analysis.csv"); write_output stores them in
+# OUTPUT_FORMAT and read_output finds whichever version was written last, so
+# the next pipeline stage reads typed columnar data instead of re-parsing CSV.
+#
+#   'parquet' / 'feather'  keep the dataframe schema (dtypes, categories);
+#                          need pyarrow, otherwise CSV is written instead
+#   'csv'                  plain text, also kept as an export next to the
+#                          columnar file while EXPORT_CSV is on
+#
+# read_output supports column projection and simple predicate filters
+# [(column, op, value), ...] (AND-ed). Parquet pushes both down to the reader;
+# for Feather and CSV only the needed columns are parsed and rows are filtered
+# afterwards.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+
+OUTPUT_FORMAT = "parquet"  # 'csv', 'parquet' or 'feather'
+EXPORT_CSV = True          # Also write the .csv when OUTPUT_FORMAT is columnar
+
+EXTENSIONS = {'csv': ".csv", 'parquet': ".parquet", 'feather': ".feather"}
+
+FILTER_OPERATORS = {
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    'in': lambda column, values: column.isin(values),
+    'not in': lambda column, values: ~column.isin(values),
+}
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+def resolve_format(fmt=None):
+    fmt = OUTPUT_FORMAT if fmt is None else fmt
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Unknown output format {fmt!r}; use one of {sorted(EXTENSIONS)}")
+    if fmt != 'csv' and not HAS_PYARROW:
+        return 'csv'
+    return fmt
+
+def output_path(filename, fmt, output_dir=OUTPUT_DIR):
+    return os.path.join(output_dir, os.path.splitext(filename)[0] + EXTENSIONS[fmt])
+
+def write_output(df, filename, output_dir=OUTPUT_DIR, fmt=None, export_csv=None):
+    # Writes `df` under `filename` in the configured format; returns the main path
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    fmt = resolve_format(fmt)
+    export_csv = EXPORT_CSV if export_csv is None else export_csv
+    # The CSV export goes first so the columnar file is the newest version
+    if fmt == 'csv' or export_csv:
+        df.to_csv(output_path(filename, 'csv', output_dir), index=False)
+    path = output_path(filename, fmt, output_dir)
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    elif fmt == 'feather':
+        df.reset_index(drop=True).to_feather(path)
+    return path
+
+def find_output(filename, output_dir=OUTPUT_DIR):
+    # Most recently written readable version of an output, or None
+    formats = [fmt for fmt in EXTENSIONS if fmt == 'csv' or HAS_PYARROW]
+    paths = [output_path(filename, fmt, output_dir) for fmt in formats]
+    paths = [path for path in paths if os.path.exists(path)]
+    if not paths:
+        return None
+    return max(paths, key=os.path.getmtime)
+
+def output_exists(filename, output_dir=OUTPUT_DIR):
+    return find_output(filename, output_dir) is not None
+
+def apply_filters(df, filters):
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        if op not in FILTER_OPERATORS:
+            raise ValueError(f"Unsupported filter operator {op!r}")
+        mask &= FILTER_OPERATORS[op](df[column], value)
+    return df[mask]
+
+def read_output(filename, columns=None, filters=None, output_dir=OUTPUT_DIR):
+    # Raises FileNotFoundError like pd.read_csv when no version exists
+    path = find_output(filename, output_dir)
+    if path is None:
+        raise FileNotFoundError(f"No such output: {output_path(filename, 'csv', output_dir)}")
+    filters = list(filters or [])
+    if path.endswith(EXTENSIONS['parquet']):
+        return pd.read_parquet(path, columns=columns, filters=filters or None)
+
+    needed = None
+    if columns is not None:
+        needed = list(dict.fromkeys(list(columns) + [column for column, _, _ in filters]))
+    if path.endswith(EXTENSIONS['feather']):
+        df = pd.read_feather(path, columns=needed)
+    else:
+        df = pd.read_csv(path, usecols=needed)
+    if filters:
+        df = apply_filters(df, filters).reset_index(drop=True)
+    return df if columns is None else df[list(columns)]
@@ -0,0 +1,65 @@
+import heapq
+
+# Event-driven overdue detection. Open loans sit in a min-heap keyed by
+# dueDate; advancing the clock pops every loan whose due date has passed and
+# emits an alert if it is still open. Returns only drop the loan from the
+# open-loan map (lazy deletion), so every event costs O(log n).
+
+class OverdueAlertProcessor:
+    def __init__(self, reminder_interval=None, on_alert=None):
+        # reminder_interval: re-alert still-open loans every interval (a timedelta), or None
+        self.reminder_interval = reminder_interval
+        self.on_alert = on_alert
+        self.heap = []
+        self.open_loans = {}
+        self.alerted = {}
+        self.alerts = []
+        self.now = None
+
+    def _emit(self, alert):
+        self.alerts.append(alert)
+        if self.on_alert is not None:
+            self.on_alert(alert)
+
+    def advance(self, now):
+        # Move the clock forward and alert on every open loan that became overdue
+        while self.heap and self.heap[0][0] < now:
+            alert_time, loan_key = heapq.heappop(self.heap)
+            loan = self.open_loans.get(loan_key)
+            if loan is None:
+                continue
+            reminder = self.alerted.get(loan_key, 0)
+            self.alerted[loan_key] = reminder + 1
+            self._emit({
+                'alert_time': alert_time,
+                'borrowId': loan_key[0],
+                'bookItemId': loan_key[1],
+                'studentId': loan['studentId'],
+                'masterId': loan['masterId'],
+                'borrowedAt': loan['borrowedAt'],
+                'dueDate': loan['dueDate'],
+                'reminder': reminder,
+            })
+            if self.reminder_interval is not None:
+                heapq.heappush(self.heap, (alert_time + self.reminder_interval, loan_key))
+        if self.now is None or now > self.now:
+            self.now = now
+
+    def borrow(self, time, borrow_id, book_item_id, student_id, due_date, master_id=None):
+        self.advance(time)
+        loan_key = (borrow_id, book_item_id)
+        self.open_loans[loan_key] = {
+            'studentId': student_id, 'masterId': master_id, 'borrowedAt': time, 'dueDate': due_date,
+        }
+        heapq.heappush(self.heap, (due_date, loan_key))
+
+    def return_item(self, time, borrow_id, book_item_id):
+        # Returns whether the returned loan had been alerted
+        self.advance(time)
+        loan_key = (borrow_id, book_item_id)
+        self.open_loans.pop(loan_key, None)
+        return self.alerted.pop(loan_key, 0) > 0
+
+    @property
+    def overdue_count(self):
+        return sum(1 for loan in self.open_loans.values() if loan['dueDate'] < self.now)
@@ -0,0 +1,163 @@
+import os
+import pandas as pd
+from output_io import read_output, output_exists
+from schema import (DATASET_DIR, INTEGER, SCRIPT_COLUMNS, fingerprint_matches, read_table, stored_dtypes,
+                    table_columns)
+
+# Time-partitioned layout of the transaction tables, written by
+# build_partitioned_tables.py in Hive style:
+#
+#   output/partitioned/<table>/year=2025/month=01/part.<csv|parquet|feather>
+#   output/partitioned/<table>/_partitions.<...>   one row per partition
+#
+# Transactions are partitioned by their own timestamp; detail rows follow
+# their parent transaction (borrow_details by borrowedAt, return_details by
+# returnedAt). _partitions holds each partition's row count and the min/max
+# of its partition time and of every timestamp column, so date-bounded reads
+# open only the months they need. Rows without a partition time go to the
+# Hive default partition, which bounded queries never need. Every part
+# also keeps the row's partition time (exact bounds inside the edge months)
+# and its source position (reads return rows in dataset order).
+#
+# _sources records the size/mtime of the dataset files a table was built from;
+# when they no longer match, the partitions are ignored and the CSVs are read.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PARTITION_DIR = os.path.join(SCRIPT_DIR, "output", "partitioned")
+PART_FILE = "part.csv"
+STATS_FILE = "_partitions.csv"
+SOURCES_FILE = "_sources.csv"
+DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+TIME_COLUMN = "_time"
+ROW_COLUMN = "_row"
+
+# table -> partition time column, taken from the parent table via `on` (child key, parent key)
+PARTITION_KEYS = {
+    'borrow_transactions': {'time': 'borrowedAt'},
+    'borrow_details': {'time': 'borrowedAt', 'parent': 'borrow_transactions', 'on': ('borrowId', 'id')},
+    'return_transactions': {'time': 'returnedAt'},
+    'return_details': {'time': 'returnedAt', 'parent': 'return_transactions', 'on': ('returnId', 'id')},
+}
+
+def month_bounds(start_month=None, end_month=None):
+    # Inclusive 'YYYY-MM' months -> half-open [start, end) epoch seconds (None = unbounded)
+    start = end = None
+    if start_month is not None:
+        start = int(pd.Period(start_month, freq='M').start_time.timestamp())
+    if end_month is not None:
+        end = int((pd.Period(end_month, freq='M') + 1).start_time.timestamp())
+    return start, end
+
+def partition_times(table, frame, parent=None):
+    # Epoch seconds each row is partitioned by (NaN when unknown)
+    key = PARTITION_KEYS[table]
+    if 'parent' not in key:
+        return frame[key['time']].astype('float64')
+    child_key, parent_key = key['on']
+    times = parent.set_index(parent_key)[key['time']]
+    return frame[child_key].map(times).astype('float64')
+
+def source_tables(table):
+    # Dataset tables a partitioned table is built from (itself and its parent)
+    parent = PARTITION_KEYS[table].get('parent')
+    return (table,) if parent is None else (table, parent)
+
+def in_range(times, start=None, end=None):
+    mask = times.notna()
+    if start is not None:
+        mask &= times >= start
+    if end is not None:
+        mask &= times < end
+    return mask.to_numpy()
+
+def partition_path(table, year, month, partition_dir=PARTITION_DIR):
+    if pd.isna(year):
+        return os.path.join(partition_dir, table, f"year={DEFAULT_PARTITION}", f"month={DEFAULT_PARTITION}")
+    return os.path.join(partition_dir, table, f"year={int(year):04d}", f"month={int(month):02d}")
+
+def partitions_are_current(table, partition_dir=PARTITION_DIR, dataset_dir=DATASET_DIR):
+    table_dir = os.path.join(partition_dir, table)
+    saved = read_output(SOURCES_FILE, output_dir=table_dir) if output_exists(SOURCES_FILE, table_dir) else None
+    return fingerprint_matches(saved, source_tables(table), dataset_dir)
+
+def load_partition_stats(table, partition_dir=PARTITION_DIR, dataset_dir=DATASET_DIR):
+    # _partitions of a table, or None when build_partitioned_tables.py has not
+    # been run or the dataset changed since it was
+    table_dir = os.path.join(partition_dir, table)
+    if not output_exists(STATS_FILE, table_dir):
+        return None
+    if not partitions_are_current(table, partition_dir, dataset_dir):
+        print(f"Partitions of {table} are older than the dataset, reading the CSV instead "
+              "(re-run build_partitioned_tables.py)")
+        return None
+    return read_output(STATS_FILE, output_dir=table_dir)
+
+def prune_partitions(stats, start=None, end=None):
+    # Partitions whose [min_time, max_time] overlaps [start, end)
+    if start is None and end is None:
+        return stats
+    keep = stats['min_time'].notna()
+    if start is not None:
+        keep &= stats['max_time'] >= start
+    if end is not None:
+        keep &= stats['min_time'] < end
+    return stats[keep]
+
+def empty_table(table, columns=None):
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in stored_dtypes(table, columns).items()})
+
+def read_partitioned(table, start=None, end=None, columns=None, partition_dir=PARTITION_DIR, dataset_dir=DATASET_DIR):
+    # Rows of `table` whose partition time is in [start, end), reading only the
+    # partitions that overlap it. None when the table has no current partitions.
+    stats = load_partition_stats(table, partition_dir, dataset_dir)
+    if stats is None:
+        return None
+    selected = prune_partitions(stats, start, end)
+    bounded = start is not None or end is not None
+    needed = None
+    if columns is not None:
+        needed = list(columns) + [TIME_COLUMN, ROW_COLUMN]
+
+    frames = []
+    for year, month in zip(selected['year'], selected['month']):
+        frame = read_output(PART_FILE, columns=needed, output_dir=partition_path(table, year, month, partition_dir))
+        if bounded:
+            # Exact bounds inside the first and last partition
+            frame = frame[in_range(frame[TIME_COLUMN], start, end)]
+        frames.append(frame)
+    if not frames:
+        return empty_table(table, columns)
+    frame = pd.concat(frames).sort_values(ROW_COLUMN).reset_index(drop=True)
+    frame = frame[table_columns(table, columns)]
+    # CSV partitions lose categories; restore the schema dtypes (nullable
+    # timestamps stay Int64 as in schema.parse_datetimes)
+    dtypes = stored_dtypes(table, frame.columns)
+    for column, dtype in dtypes.items():
+        if dtype == INTEGER and frame[column].isna().any():
+            dtypes[column] = 'Int64'
+    return frame.astype(dtypes)
+
+def load_tables_in_range(script, start=None, end=None, dataset_dir=DATASET_DIR, ranges=None):
+    # Like schema.load_tables, but partitioned tables only keep rows whose
+    # partition time is in [start, end); `ranges` overrides the bounds per table.
+    # Bounded reads use the partitioned layout when it is current; unbounded
+    # reads and stale or missing layouts read the dataset CSVs.
+    ranges = ranges or {}
+    frames = []
+    for table, columns in SCRIPT_COLUMNS[script].items():
+        table_start, table_end = ranges.get(table, (start, end))
+        if table not in PARTITION_KEYS or (table_start is None and table_end is None):
+            frames.append(read_table(table, columns, dataset_dir))
+            continue
+        frame = read_partitioned(table, table_start, table_end, columns, dataset_dir=dataset_dir)
+        if frame is None:
+            frame = read_table(table, columns, dataset_dir)
+            key = PARTITION_KEYS[table]
+            if 'parent' in key:
+                parent = read_table(key['parent'], [key['on'][1], key['time']], dataset_dir)
+                times = partition_times(table, read_table(table, [key['on'][0]], dataset_dir), parent)
+            else:
+                times = partition_times(table, read_table(table, [key['time']], dataset_dir))
+            frame = frame[in_range(times, table_start, table_end)].reset_index(drop=True)
+        frames.append(frame)
+    return tuple(frames)
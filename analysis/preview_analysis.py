@@ -0,0 +1,193 @@
+import argparse
+import itertools
+import os
+import time
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from schema import load_tables
+from sampling import coarsen_strata, stratified_sample, estimate_totals
+from duplicate_masters import merge_duplicate_masters
+from dss_recommendation import calculate_dss_score, determine_action, merge_inventory
+from output_io import write_output
+
+# Approximate preview of the top-books, category popularity, association and
+# DSS analyses from a stratified sample of transactions, with 95% error bounds.
+#   python analysis/preview_analysis.py --sample 0.1
+#   python analysis/analyze_top_books.py --sample 0.1   (one analysis only)
+# Without --sample every transaction is used and the bounds are zero.
+# The association preview estimates title-pair rules from the weighted sample
+# counts directly; association_mining.py works on unweighted baskets.
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output", "preview")
+
+DEFAULT_SAMPLE_FRACTION = 0.1
+MIN_PAIR_SUPPORT = 0.001   # Estimated support needed for a previewed pair rule
+TOP_N = 10
+SEED = 42
+
+# Count copies of duplicate masters (find_duplicate_masters.py) under their canonical master
+MERGE_DUPLICATE_MASTERS = True
+
+def load_data():
+    print("Loading data...")
+    try:
+        transactions, details, items, masters, categories = load_tables('preview_analysis')
+        if MERGE_DUPLICATE_MASTERS:
+            items, masters = merge_duplicate_masters(items, masters)
+        return transactions, details, items, masters, categories
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None, None, None, None, None
+
+def with_bounds(frame, estimates, bounds, column):
+    frame[f'{column}_estimate'] = np.round(estimates, 2)
+    frame[f'{column}_error_bound'] = np.round(bounds, 2)
+    return frame
+
+def draw_sample(sample_fraction=None):
+    # Stratified sample of transactions and the sampled borrowed copies as a
+    # (sampled transactions x masters) count matrix; None when data is missing
+    transactions, details, items, masters, categories = load_data()
+    if transactions is None:
+        return None
+
+    # Borrow Details -> Items -> Masters, one row per borrowed copy
+    master_index = pd.Index(masters['id'])
+    rows = details.merge(items[['id', 'masterId']], left_on='bookItemId', right_on='id', how='left')
+    rows['master'] = master_index.get_indexer(rows['masterId'])
+    rows = rows[rows['master'] >= 0]
+    transaction_index = pd.Index(transactions['id'])
+    rows['transaction'] = transaction_index.get_indexer(rows['borrowId'])
+    rows = rows[rows['transaction'] >= 0]
+    master_category = pd.Index(categories['id']).get_indexer(masters['categoryId'])
+
+    # Strata: borrow month x category of the transaction's first book, coarsened
+    # to the month (then one pooled stratum) where too small for the fraction
+    month = pd.to_datetime(transactions['borrowedAt'], unit='s').dt.strftime('%Y-%m').to_numpy()
+    first_book = rows.sort_values('bookItemId').drop_duplicates('transaction').set_index('transaction')['master']
+    first_category = pd.Series(master_category[first_book.to_numpy()], index=first_book.index)
+    category_label = first_category.reindex(np.arange(len(transactions))).fillna(-1).astype(int).astype(str)
+    fraction = 1.0 if sample_fraction is None else sample_fraction
+    strata = coarsen_strata([month + '|' + category_label.to_numpy(), month], fraction)
+
+    positions, sample_strata, population, sample_sizes = stratified_sample(strata, fraction, SEED)
+    sample_slot = np.full(len(transactions), -1)
+    sample_slot[positions] = np.arange(len(positions))
+    sampled = rows[sample_slot[rows['transaction'].to_numpy()] >= 0]
+    slots = sample_slot[sampled['transaction'].to_numpy()]
+    print(f"Sampled {len(positions)} of {len(transactions)} transactions "
+          f"({len(positions) / len(transactions):.1%}, {len(population)} strata)")
+
+    copies = sparse.csr_matrix((np.ones(len(sampled)), (slots, sampled['master'].to_numpy())),
+                               shape=(len(positions), len(masters)))
+    return {
+        'items': items, 'masters': masters, 'categories': categories,
+        'master_category': master_category, 'n_transactions': len(transactions),
+        'sampled_masters': sampled['master'].to_numpy(), 'slots': slots, 'copies': copies,
+        'strata': (sample_strata, population, sample_sizes),
+    }
+
+def preview_top_books(sample):
+    totals, bounds = estimate_totals(sample['copies'], *sample['strata'])
+    masters = sample['masters']
+    top_books = with_bounds(masters[['id', 'title', 'author']].rename(columns={'id': 'masterId'}), totals, bounds, 'borrow_count')
+    return top_books[top_books['borrow_count_estimate'] > 0].sort_values('borrow_count_estimate', ascending=False)
+
+def preview_category_popularity(sample):
+    master_category, categories = sample['master_category'], sample['categories']
+    known = master_category >= 0
+    to_category = sparse.csr_matrix((np.ones(known.sum()), (np.flatnonzero(known), master_category[known])),
+                                    shape=(len(master_category), len(categories)))
+    totals, bounds = estimate_totals(sample['copies'] @ to_category, *sample['strata'])
+    category_popularity = with_bounds(categories[['name']].rename(columns={'name': 'category'}), totals, bounds, 'borrow_count')
+    return category_popularity.sort_values('borrow_count_estimate', ascending=False)
+
+def preview_association(sample):
+    # Title-pair rules; support, confidence and lift come from estimated totals
+    slots, n_sampled = sample['slots'], sample['copies'].shape[0]
+    title_codes, titles = pd.factorize(sample['masters']['title'])
+    sampled_titles = title_codes[sample['sampled_masters']]
+    baskets = pd.Series(sampled_titles).groupby(slots).apply(lambda x: sorted(set(x)))
+    basket_rows, pair_keys = [], []
+    for slot, basket in baskets.items():
+        for pair in itertools.combinations(basket, 2):
+            basket_rows.append(slot)
+            pair_keys.append(pair)
+    pair_index = {pair: i for i, pair in enumerate(dict.fromkeys(pair_keys))}
+    pair_matrix = sparse.csr_matrix(
+        (np.ones(len(pair_keys)), (basket_rows, [pair_index[pair] for pair in pair_keys])),
+        shape=(n_sampled, len(pair_index)))
+    has_title = sparse.csr_matrix((np.ones(len(slots)), (slots, sampled_titles)), shape=(n_sampled, len(titles)))
+    has_title.data[:] = 1  # Presence, not copies
+    pair_totals, pair_bounds = estimate_totals(pair_matrix, *sample['strata'])
+    title_totals, _ = estimate_totals(has_title, *sample['strata'])
+    n_transactions = sample['n_transactions']
+    association_rows = []
+    for (a, b), i in pair_index.items():
+        support = pair_totals[i] / n_transactions
+        if support < MIN_PAIR_SUPPORT:
+            continue
+        for antecedent, consequent in ((a, b), (b, a)):
+            association_rows.append({
+                'Antecedent': titles[antecedent],
+                'Consequent': titles[consequent],
+                'Support': round(support, 4),
+                'Support_Error_Bound': round(pair_bounds[i] / n_transactions, 4),
+                'Confidence': round(pair_totals[i] / title_totals[antecedent], 4),
+                'Lift': round(support * n_transactions ** 2 / (title_totals[antecedent] * title_totals[consequent]), 4),
+            })
+    association = pd.DataFrame(association_rows, columns=['Antecedent', 'Consequent', 'Support', 'Support_Error_Bound', 'Confidence', 'Lift'])
+    return association.sort_values(by=['Lift', 'Confidence'], ascending=[False, False])
+
+def preview_dss(sample):
+    # DSS score and action on estimated borrow counts (the inventory is read in full)
+    top_books = preview_top_books(sample)
+    popularity = top_books.assign(borrow_count=top_books['borrow_count_estimate'])
+    dss = merge_inventory(popularity, sample['items'])
+    dss['recommendation_score'] = dss.apply(calculate_dss_score, axis=1)
+    dss['recommended_action'] = dss.apply(determine_action, axis=1)
+    output_cols = ['masterId', 'title', 'author', 'borrow_count_estimate', 'borrow_count_error_bound',
+                   'total_copies', 'poor_copies', 'fair_copies', 'recommendation_score', 'recommended_action']
+    return dss[output_cols].sort_values('recommendation_score', ascending=False)
+
+PREVIEWS = {
+    'top_books': ("Books (estimated borrow count)", preview_top_books),
+    'category_popularity': ("Categories (estimated borrow count)", preview_category_popularity),
+    'association': ("Pair Rules (estimated)", preview_association),
+    'dss_recommendations': ("DSS Recommendations (estimated)", preview_dss),
+}
+
+def run_preview(sample_fraction=None, analyses=tuple(PREVIEWS)):
+    start_time = time.perf_counter()
+    sample = draw_sample(sample_fraction)
+    if sample is None:
+        return
+
+    results = {name: PREVIEWS[name][1](sample) for name in analyses}
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+    for name, frame in results.items():
+        write_output(frame, f"preview_{name}.csv", OUTPUT_DIR)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Preview finished in {elapsed:.2f}s; estimates saved to {OUTPUT_DIR} (bounds are 95%)")
+    for name, frame in results.items():
+        print(f"\nTop {TOP_N} {PREVIEWS[name][0]}:")
+        print(frame.head(TOP_N))
+
+def parse_sample_fraction(description="Approximate preview of the main analyses"):
+    # --sample [FRACTION] from the command line; None when not given
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--sample', type=float, nargs='?', const=DEFAULT_SAMPLE_FRACTION, default=None,
+                        help=f"preview from this fraction of transactions (default {DEFAULT_SAMPLE_FRACTION} when given)")
+    args = parser.parse_args()
+    if args.sample is not None and not 0 < args.sample <= 1:
+        parser.error("--sample must be in (0, 1]")
+    return args.sample
+
+if __name__ == "__main__":
+    run_preview(parse_sample_fraction())
@@ -0,0 +1,83 @@
+import pandas as pd
+import os
+import time
+from item_loans import load_item_loans
+from overdue_alerts import OverdueAlertProcessor
+from output_io import write_output
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+OUTPUT_FILE = "overdue_alerts.csv"
+
+# Replay speed: None replays in simulated time (as fast as possible); a number
+# replays at that many simulated seconds per wall-clock second (e.g. 86400 = 1 day/s)
+REPLAY_SPEEDUP = None
+MAX_SLEEP_SECONDS = 1.0        # Cap on a single wall-clock pause during accelerated replay
+REMINDER_DAYS = None           # Re-alert still-open loans every N days (None = alert once)
+AS_OF = None                   # Final clock time (None = last event)
+PRINT_ALERTS = False
+
+def loan_events(loans):
+    # Borrow and return events in time order; returns sort before borrows at the same instant
+    borrows = loans.assign(kind=1, time=loans['borrowedAt'])
+    returns = loans[loans['returnedAt'].notna()].assign(kind=0, time=lambda df: df['returnedAt'])
+    events = pd.concat([borrows, returns], ignore_index=True)
+    return events.sort_values(['time', 'kind'], kind='stable')
+
+def replay(processor, events, speedup=None):
+    previous = None
+    for event in events.itertuples(index=False):
+        if speedup is not None and previous is not None:
+            pause = (event.time - previous).total_seconds() / speedup
+            time.sleep(min(max(pause, 0.0), MAX_SLEEP_SECONDS))
+        previous = event.time
+        if event.kind == 1:
+            processor.borrow(event.time, event.borrowId, event.bookItemId, event.studentId,
+                             event.dueDate, master_id=event.masterId)
+        else:
+            processor.return_item(event.time, event.borrowId, event.bookItemId)
+
+def process_overdue_alerts():
+    print("Loading data...")
+    loans = load_item_loans()
+    if loans is None:
+        return
+
+    events = loan_events(loans)
+    reminder_interval = pd.Timedelta(days=REMINDER_DAYS) if REMINDER_DAYS else None
+    on_alert = None
+    if PRINT_ALERTS:
+        on_alert = lambda alert: print(f"[{alert['alert_time']}] OVERDUE {alert['borrowId']} "
+                                       f"{alert['bookItemId']} ({alert['studentId']}), due {alert['dueDate']}")
+    processor = OverdueAlertProcessor(reminder_interval=reminder_interval, on_alert=on_alert)
+
+    mode = "simulated time" if REPLAY_SPEEDUP is None else f"{REPLAY_SPEEDUP}x speed"
+    print(f"Replaying {len(events)} borrow/return events in {mode}...")
+    start = time.perf_counter()
+    replay(processor, events, REPLAY_SPEEDUP)
+    as_of = pd.Timestamp(AS_OF) if AS_OF is not None else events['time'].max()
+    processor.advance(as_of)
+    elapsed = time.perf_counter() - start
+
+    alerts = pd.DataFrame(processor.alerts, columns=['alert_time', 'borrowId', 'bookItemId', 'studentId', 'masterId',
+                                                     'borrowedAt', 'dueDate', 'reminder'])
+    # When (if ever) each alerted loan was resolved
+    returned = loans[['borrowId', 'bookItemId', 'returnedAt']]
+    alerts = alerts.merge(returned, on=['borrowId', 'bookItemId'], how='left')
+    alerts['still_open'] = alerts['returnedAt'].isna() | (alerts['returnedAt'] > as_of)
+    alerts['days_overdue'] = ((alerts['returnedAt'].where(~alerts['still_open'], as_of) - alerts['dueDate'])
+                              .dt.total_seconds() / 86400).round(2)
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    output_path = write_output(alerts, OUTPUT_FILE)
+    print(f"Processed in {elapsed:.2f}s: {len(alerts)} alerts, {processor.overdue_count} loans still overdue as of {as_of}")
+    print(f"Overdue alerts saved to {output_path}")
+
+    print("\nStill-open overdue loans:")
+    print(alerts[alerts['still_open']].sort_values('days_overdue', ascending=False).head(10))
+
+if __name__ == "__main__":
+    process_overdue_alerts()
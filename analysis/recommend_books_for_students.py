@@ -0,0 +1,162 @@
+import pandas as pd
+import numpy as np
+import os
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from incidence_matrix import load_incidence_matrix
+from schema import load_tables
+from output_io import write_output
+
+# Configuration
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+OUTPUT_FILE = "student_recommendations.csv"
+
+SIMILARITY = "bm25"   # 'cosine' or 'bm25' (down-weights heavy borrowers)
+BM25_K1 = 1.2
+BM25_B = 0.75
+NEIGHBOURS = 50       # Similar items kept per book (bounds the similarity matrix)
+TOP_N = 10            # Recommendations per student
+BATCH_SIZE = 1024     # Rows per sparse product (bounds peak memory)
+
+def load_data():
+    print("Loading data...")
+    try:
+        transactions, details, items, masters, students = load_tables('recommend_books_for_students')
+        return transactions, details, items, masters, students
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}")
+        return None, None, None, None, None
+
+def build_student_item_matrix(transactions, details, items, masters, students):
+    # Sparse students x masters matrix of borrow counts
+    incidence = load_incidence_matrix()
+    if incidence is not None:
+        # students x transactions selector times the transactions x masters incidence
+        rows = np.asarray(incidence.transaction_students)
+        valid = np.flatnonzero(rows >= 0)
+        selector = sparse.csr_matrix(
+            (np.ones(len(valid), dtype=np.int32), (rows[valid], valid)),
+            shape=(len(incidence.student_ids), incidence.shape[0]))
+        matrix = selector @ incidence.to_csr()
+        return matrix.tocsr(), incidence.student_ids.astype(str), incidence.master_ids.astype(str)
+
+    merged = details[['borrowId', 'bookItemId']].merge(
+        transactions[['id', 'studentId']], left_on='borrowId', right_on='id', how='inner')
+    merged = merged.merge(items[['id', 'masterId']], left_on='bookItemId', right_on='id', how='left', suffixes=('', '_item'))
+    student_ids = students['id'].astype(str).to_numpy()
+    master_ids = masters['id'].astype(str).to_numpy()
+    row = pd.Index(student_ids).get_indexer(merged['studentId'])
+    col = pd.Index(master_ids).get_indexer(merged['masterId'])
+    keep = (row >= 0) & (col >= 0)
+    matrix = sparse.csr_matrix(
+        (np.ones(keep.sum(), dtype=np.int32), (row[keep], col[keep])),
+        shape=(len(student_ids), len(master_ids)))
+    matrix.sum_duplicates()
+    return matrix, student_ids, master_ids
+
+def bm25_weight(matrix, k1=BM25_K1, b=BM25_B):
+    # BM25 over the items x students view: students who borrow from few titles
+    # carry more signal (idf), repeated borrows saturate (k1), and titles with
+    # very many borrowers are length-normalised (b)
+    item_student = sparse.coo_matrix(matrix.T, dtype=np.float64)
+    n_items = item_student.shape[0]
+    idf = np.log(n_items) - np.log1p(np.bincount(item_student.col, minlength=item_student.shape[1]))
+    row_sums = np.ravel(item_student.sum(axis=1))
+    length_norm = (1.0 - b) + b * row_sums / max(row_sums.mean(), 1e-12)
+    weighted = item_student.data * (k1 + 1.0) / (k1 * length_norm[item_student.row] + item_student.data) * idf[item_student.col]
+    return sparse.csr_matrix((weighted, (item_student.col, item_student.row)), shape=matrix.shape)
+
+def top_k_per_row(block, k):
+    # Keep the k largest entries of every row of a sparse block
+    block = block.tocsr()
+    rows, cols, vals = [], [], []
+    for i in range(block.shape[0]):
+        start, end = block.indptr[i], block.indptr[i + 1]
+        if end == start:
+            continue
+        data, indices = block.data[start:end], block.indices[start:end]
+        if end - start > k:
+            keep = np.argpartition(-data, k)[:k]
+            data, indices = data[keep], indices[keep]
+        rows.append(np.full(len(data), i))
+        cols.append(indices)
+        vals.append(data)
+    if not rows:
+        return sparse.csr_matrix(block.shape)
+    return sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=block.shape)
+
+def item_similarity(matrix, neighbours=NEIGHBOURS, batch_size=BATCH_SIZE):
+    # Cosine similarity between item columns, computed in row blocks and pruned
+    # to the top neighbours per item so memory stays O(items * neighbours)
+    item_vectors = normalize(matrix.T.tocsr().astype(np.float64), norm='l2', axis=1)
+    vectors_t = item_vectors.T.tocsc()
+    blocks = []
+    for start in range(0, item_vectors.shape[0], batch_size):
+        block = (item_vectors[start:start + batch_size] @ vectors_t).tocoo()
+        # Drop self-similarity on the diagonal of this block
+        off_diagonal = block.row + start != block.col
+        block = sparse.csr_matrix(
+            (block.data[off_diagonal], (block.row[off_diagonal], block.col[off_diagonal])), shape=block.shape)
+        blocks.append(top_k_per_row(block, neighbours))
+    similarity = sparse.vstack(blocks).tocsr()
+    similarity.eliminate_zeros()
+    return similarity
+
+def recommend(matrix, similarity, top_n=TOP_N, batch_size=BATCH_SIZE):
+    # Yields (student_index, item_index, score) for the top-N unseen items of every
+    # student; scores stay sparse, so a batch costs O(candidates) rather than
+    # O(batch_size * items)
+    for start in range(0, matrix.shape[0], batch_size):
+        history = matrix[start:start + batch_size]
+        scores = (history @ similarity).tocsr()
+        # Never recommend what the student already borrowed
+        scores = scores - scores.multiply(history.astype(bool))
+        scores.data[scores.data < 0] = 0
+        scores.eliminate_zeros()
+        top = top_k_per_row(scores, top_n)
+        for offset in range(top.shape[0]):
+            row_start, row_end = top.indptr[offset], top.indptr[offset + 1]
+            items, values = top.indices[row_start:row_end], top.data[row_start:row_end]
+            for position in np.lexsort((items, -values)):
+                yield start + offset, items[position], values[position]
+
+def recommend_books_for_students():
+    transactions, details, items, masters, students = load_data()
+    if transactions is None:
+        return
+
+    print("Building student x book matrix...")
+    matrix, student_ids, master_ids = build_student_item_matrix(transactions, details, items, masters, students)
+    print(f"Matrix: {matrix.shape[0]} students x {matrix.shape[1]} books, {matrix.nnz} non-zeros")
+
+    weighted = bm25_weight(matrix) if SIMILARITY == "bm25" else matrix.astype(np.float64)
+    print(f"Computing item-item {SIMILARITY} similarity (top {NEIGHBOURS} neighbours)...")
+    similarity = item_similarity(weighted)
+
+    print("Scoring students...")
+    recommendations = pd.DataFrame(
+        list(recommend(matrix.astype(np.float64), similarity)),
+        columns=['student_index', 'item_index', 'score'])
+    recommendations['studentId'] = student_ids[recommendations['student_index'].to_numpy(dtype=int)]
+    recommendations['masterId'] = master_ids[recommendations['item_index'].to_numpy(dtype=int)]
+    recommendations['rank'] = recommendations.groupby('studentId').cumcount() + 1
+    recommendations['score'] = recommendations['score'].round(4)
+
+    recommendations = recommendations.merge(
+        students[['id', 'name']].rename(columns={'id': 'studentId'}), on='studentId', how='left')
+    recommendations = recommendations.merge(
+        masters[['id', 'title', 'author']].rename(columns={'id': 'masterId'}), on='masterId', how='left')
+    output = recommendations[['studentId', 'name', 'rank', 'masterId', 'title', 'author', 'score']]
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    output_path = write_output(output, OUTPUT_FILE)
+    print(f"Student recommendations saved to {output_path}")
+
+    print("\nSample Recommendations:")
+    print(output.head(TOP_N))
+
+if __name__ == "__main__":
+    recommend_books_for_students()
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import hypergeom
+
+# Rule-quality and significance metrics computed as column operations over the
+# whole rule table. Every rule is a 2x2 contingency table built from four
+# arrays: n_ab = Count, n_a = Antecedent_Count, n_b = Consequent_Count and
+# n = total transactions (or sequences) the rules were mined from.
+#
+#   leverage     P(AB) - P(A)P(B)
+#   conviction   (1 - P(B)) / (1 - confidence); inf for exact rules
+#   jaccard      n_ab / (n_a + n_b - n_ab)
+#   kulczynski   mean of P(B|A) and P(A|B)
+#   chi_square   Pearson chi-square of the 2x2 table (1 dof, no continuity correction)
+#   fisher_p     one-sided Fisher exact p-value for positive association,
+#                P(X >= n_ab) with X ~ Hypergeom(n, n_a, n_b)
+#   fisher_q     Benjamini-Hochberg FDR-adjusted fisher_p over the candidate rules
+#
+# The false discovery rate is controlled over the family that was tested: every
+# rule the frequent itemsets (or patterns) can form, before min confidence, min
+# lift and top-K select from it. Adjusting only over the selected rules would
+# be anti-conservative, since the selection used the same counts. Without a
+# candidate table the family is the rule table itself.
+
+METRIC_COLUMNS = ['Leverage', 'Conviction', 'Jaccard', 'Kulczynski', 'Chi_Square', 'Fisher_P', 'Fisher_Q']
+
+def benjamini_hochberg(p_values):
+    p_values = np.asarray(p_values, dtype=np.float64)
+    m = len(p_values)
+    if m == 0:
+        return p_values
+    order = np.argsort(p_values)
+    ranked = p_values[order] * m / np.arange(1, m + 1)
+    # Enforce monotonicity from the largest p-value down
+    ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+    q_values = np.empty(m)
+    q_values[order] = np.clip(ranked, 0.0, 1.0)
+    return q_values
+
+def rule_metrics(n_ab, n_a, n_b, n):
+    n_ab = np.asarray(n_ab, dtype=np.float64)
+    n_a = np.asarray(n_a, dtype=np.float64)
+    n_b = np.asarray(n_b, dtype=np.float64)
+    n = np.broadcast_to(np.asarray(n, dtype=np.float64), n_ab.shape)
+
+    p_ab, p_a, p_b = n_ab / n, n_a / n, n_b / n
+    confidence = n_ab / n_a
+    with np.errstate(divide='ignore', invalid='ignore'):
+        conviction = np.where(confidence < 1.0, (1.0 - p_b) / (1.0 - confidence), np.inf)
+        # Cells of the 2x2 table: (A, B), (A, not B), (not A, B), (not A, not B)
+        n_a_nb = n_a - n_ab
+        n_na_b = n_b - n_ab
+        n_na_nb = n - n_a - n_b + n_ab
+        denominator = n_a * (n - n_a) * n_b * (n - n_b)
+        chi_square = np.where(denominator > 0, n * (n_ab * n_na_nb - n_a_nb * n_na_b) ** 2 / denominator, 0.0)
+
+    fisher_p = hypergeom.sf(n_ab - 1, n, n_a, n_b)
+    return {
+        'Leverage': p_ab - p_a * p_b,
+        'Conviction': conviction,
+        'Jaccard': n_ab / (n_a + n_b - n_ab),
+        'Kulczynski': 0.5 * (n_ab / n_a + n_ab / n_b),
+        'Chi_Square': chi_square,
+        'Fisher_P': fisher_p,
+        'Fisher_Q': benjamini_hochberg(fisher_p),
+    }
+
+def family_q_values(rules_df, candidates, total):
+    # Fisher_Q of each rule in rules_df, adjusted over every candidate rule
+    fisher_p = hypergeom.sf(candidates['Count'] - 1, total, candidates['Antecedent_Count'],
+                            candidates['Consequent_Count'])
+    q_values = pd.Series(benjamini_hochberg(fisher_p),
+                         index=pd.MultiIndex.from_frame(candidates[['Antecedent', 'Consequent']]))
+    return q_values.reindex(pd.MultiIndex.from_frame(rules_df[['Antecedent', 'Consequent']])).to_numpy()
+
+def evaluate_rules(rules_df, total, max_q_value=None, candidates=None):
+    # Adds METRIC_COLUMNS to a rule table with Count/Antecedent_Count/Consequent_Count;
+    # candidates (same columns plus Antecedent/Consequent) is the family Fisher_Q
+    # is adjusted over. With max_q_value, keeps only rules significant at that
+    # false discovery rate
+    if rules_df.empty:
+        return rules_df.assign(**{column: pd.Series(dtype=np.float64) for column in METRIC_COLUMNS})
+    metrics = rule_metrics(rules_df['Count'], rules_df['Antecedent_Count'], rules_df['Consequent_Count'], total)
+    if candidates is not None and len(candidates) > len(rules_df):
+        metrics['Fisher_Q'] = family_q_values(rules_df, candidates, total)
+    rules_df = rules_df.assign(**{
+        column: np.round(values, 4) if column not in ('Fisher_P', 'Fisher_Q') else values
+        for column, values in metrics.items()
+    })
+    if max_q_value is not None:
+        rules_df = rules_df[rules_df['Fisher_Q'] <= max_q_value]
+    return rules_df
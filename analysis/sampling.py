@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Stratified transaction sampling for fast approximate previews.
+# Transactions are stratified by (borrow month, category of their first book)
+# and sampled with proportional allocation, at least MIN_PER_STRATUM per
+# stratum so its within-stratum variance can be estimated. A stratum too small
+# for proportional allocation to reach MIN_PER_STRATUM (N_h * fraction below
+# it) would be oversampled, so coarsen_strata first folds it into a coarser
+# stratum (its month, then one pooled remainder); the sample then stays close
+# to the requested fraction. Totals
+# are estimated with the stratified expansion estimator
+#     T = sum_h N_h / n_h * sum_{j in h} y_j
+#     Var(T) = sum_h N_h^2 (1 - n_h / N_h) s_h^2 / n_h
+# and reported as estimate +/- z * sqrt(Var(T)).
+
+Z_95 = 1.959964
+MIN_PER_STRATUM = 2
+
+POOLED_STRATUM = "*"
+
+def coarsen_strata(levels, fraction, min_per_stratum=MIN_PER_STRATUM):
+    # levels: label arrays from finest to coarsest (e.g. month x category, month).
+    # Each transaction keeps the finest label whose stratum is large enough,
+    # otherwise it goes to the pooled remainder stratum.
+    min_population = min_per_stratum / fraction
+    strata = np.full(len(levels[0]), POOLED_STRATUM, dtype=object)
+    assigned = np.zeros(len(strata), dtype=bool)
+    for labels in levels:
+        labels = pd.Series(np.asarray(labels, dtype=object))
+        # Sizes counted over the transactions not yet placed in a finer stratum
+        sizes = labels[~assigned].map(labels[~assigned].value_counts())
+        large = np.zeros(len(strata), dtype=bool)
+        large[np.flatnonzero(~assigned)] = sizes.to_numpy() >= min_population
+        strata[large] = labels[large].to_numpy()
+        assigned |= large
+    return strata
+
+def stratified_sample(strata, fraction, seed=42, min_per_stratum=MIN_PER_STRATUM):
+    # strata: one label per transaction. Returns (positions of the sampled
+    # transactions, their stratum codes, population size N_h, sample size n_h)
+    codes, _ = pd.factorize(pd.Series(strata), sort=True)
+    population = np.bincount(codes)
+    sample_sizes = np.minimum(population, np.maximum(min_per_stratum, np.round(population * fraction).astype(np.int64)))
+    rng = np.random.default_rng(seed)
+    # A random key per transaction; the n_h smallest keys in each stratum are taken
+    keys = rng.random(len(codes))
+    order = np.lexsort((keys, codes))
+    rank = np.empty(len(codes), dtype=np.int64)
+    starts = np.r_[0, np.cumsum(population)[:-1]]
+    rank[order] = np.arange(len(codes)) - np.repeat(starts, population)
+    positions = np.flatnonzero(rank < sample_sizes[codes])
+    return positions, codes[positions], population, sample_sizes
+
+def estimate_totals(values, sample_strata, population, sample_sizes, z=Z_95):
+    # values: (sampled transactions x quantities) sparse or dense matrix of y_j.
+    # Returns (estimated totals, error bounds) per quantity column.
+    values = sparse.csr_matrix(values, dtype=np.float64)
+    n_strata = len(population)
+    membership = sparse.csr_matrix(
+        (np.ones(len(sample_strata)), (sample_strata, np.arange(len(sample_strata)))),
+        shape=(n_strata, len(sample_strata)))
+    sums = np.asarray((membership @ values).todense())
+    squares = np.asarray((membership @ values.multiply(values)).todense())
+
+    N = population[:, None].astype(np.float64)
+    n = sample_sizes[:, None].astype(np.float64)
+    totals = (N / n * sums).sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance_within = np.where(n > 1, (squares - sums ** 2 / n) / (n - 1), 0.0)
+    variance = (N ** 2 * (1.0 - n / N) * np.maximum(variance_within, 0.0) / n).sum(axis=0)
+    return totals, z * np.sqrt(variance)
@@ -0,0 +1,264 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Typed schema for the eight dataset CSVs. Loaders read only the columns a
+# script needs (SCRIPT_COLUMNS) with explicit dtypes instead of letting pandas
+# infer them:
+#   identifiers and free text  -> str
+#   low-cardinality enums      -> category (conditions use a fixed category order)
+#   timestamps                 -> parsed with DATETIME_FORMAT into int64 epoch seconds
+# Missing files raise FileNotFoundError as pd.read_csv does, so the scripts'
+# existing error handling is unchanged.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_DIR = os.path.join(SCRIPT_DIR, "../dataset")
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+CONDITIONS = ('New', 'Good', 'Fair', 'Poor')  # Best to worst
+
+STRING = 'str'
+INTEGER = 'int64'
+CATEGORY = 'category'
+CONDITION = pd.CategoricalDtype(list(CONDITIONS))
+DATETIME = 'datetime'  # Read as text, stored as int64 epoch seconds
+
+TABLES = {
+    'book_items': {
+        'file': "book_items.csv",
+        'columns': {'id': STRING, 'masterId': STRING, 'code': STRING, 'condition': CONDITION,
+                    'status': CATEGORY, 'createdAt': DATETIME},
+    },
+    'book_masters': {
+        'file': "book_masters.csv",
+        'columns': {'id': STRING, 'title': STRING, 'author': STRING, 'publisher': STRING,
+                    'year': INTEGER, 'categoryId': STRING, 'isbn': STRING},
+    },
+    'borrow_details': {
+        'file': "borrow_details.csv",
+        'columns': {'id': STRING, 'borrowId': STRING, 'bookItemId': STRING, 'conditionAtBorrow': CONDITION},
+    },
+    'borrow_transactions': {
+        'file': "borrow_transactions.csv",
+        'columns': {'id': STRING, 'adminId': CATEGORY, 'studentId': STRING, 'borrowedAt': DATETIME,
+                    'dueDate': DATETIME, 'status': CATEGORY},
+    },
+    'categorys': {
+        'file': "categorys.csv",
+        'columns': {'id': STRING, 'name': STRING, 'description': STRING},
+    },
+    'return_details': {
+        'file': "return_details.csv",
+        'columns': {'id': STRING, 'returnId': STRING, 'bookItemId': STRING, 'conditionAtReturn': CONDITION,
+                    'notes': CATEGORY},
+    },
+    'return_transactions': {
+        'file': "return_transactions.csv",
+        'columns': {'id': STRING, 'borrowId': STRING, 'adminId': CATEGORY, 'returnedAt': DATETIME},
+    },
+    'students': {
+        'file': "students.csv",
+        'columns': {'id': STRING, 'nis': INTEGER, 'name': STRING},
+    },
+}
+
+# Tables and columns each script reads, in the order its load_data returns them
+SCRIPT_COLUMNS = {
+    'analyze_book_association': {
+        'borrow_details': ['borrowId', 'bookItemId'],
+        'book_items': ['id', 'masterId'],
+        'book_masters': ['id', 'title'],
+    },
+    'analyze_book_clustering': {
+        'borrow_details': ['bookItemId'],
+        'book_items': ['id', 'masterId'],
+        'book_masters': ['id', 'title', 'year', 'categoryId'],
+        'categorys': ['id', 'name'],
+    },
+    'analyze_book_popularity': {
+        'book_masters': ['id', 'title', 'author', 'year'],
+        'book_items': ['id', 'masterId'],
+        'borrow_details': ['bookItemId'],
+    },
+    'analyze_category_association': {
+        'borrow_details': ['borrowId', 'bookItemId'],
+        'book_items': ['id', 'masterId'],
+        'book_masters': ['id', 'categoryId'],
+        'categorys': ['id', 'name'],
+    },
+    'analyze_category_popularity': {
+        'borrow_details': ['borrowId', 'bookItemId'],
+        'book_items': ['id', 'masterId'],
+        'book_masters': ['id', 'categoryId'],
+        'categorys': ['id', 'name'],
+    },
+    'analyze_condition_degradation': {
+        'book_items': ['id', 'masterId', 'condition', 'createdAt'],
+        'book_masters': ['id', 'categoryId'],
+    },
+    'analyze_copy_utilization': {
+        'book_items': ['id', 'masterId', 'createdAt'],
+        'book_masters': ['id', 'title'],
+    },
+    'analyze_demand_forecast': {
+        'book_masters': ['id', 'title', 'categoryId'],
+        'categorys': ['id', 'name'],
+    },
+    'analyze_distinct_borrowers': {
+        'borrow_transactions': ['id', 'studentId', 'borrowedAt'],
+        'borrow_details': ['borrowId', 'bookItemId'],
+        'book_items': ['id', 'masterId'],
+        'book_masters': ['id', 'title', 'categoryId'],
+        'categorys': ['id', 'name'],
+    },
+    'analyze_late_returns': {
+        'borrow_transactions': ['id', 'studentId', 'dueDate'],
+        'return_transactions': ['borrowId', 'returnedAt'],
+        'students': ['id', 'name'],
+    },
+    'analyze_loan_durations': {
+        'book_masters': ['id', 'categoryId'],
+    },
+    'analyze_monthly_trend': {
+        'borrow_transactions': ['borrowedAt'],
+    },
+    'analyze_rule_bootstrap': {
+        'borrow_details': ['borrowId', 'bookItemId'],
+        'book_items': ['id', 'masterId'],
+        'book_masters': ['id', 'title'],
+    },
+    'analyze_sequential_patterns': {
+        'borrow_transactions': ['id', 'studentId', 'borrowedAt'],
+        'borrow_details': ['borrowId', 'bookItemId'],
+        'book_items': ['id', 'masterId'],
+        'book_masters': ['id', 'title'],
+    },
+    'analyze_streaming_top_k': {
+        'borrow_transactions': ['id', 'studentId', 'borrowedAt'],
+        'borrow_details': ['borrowId', 'bookItemId'],
+        'book_items': ['id', 'masterId'],
+        'book_masters': ['id', 'title', 'author', 'categoryId'],
+        'categorys': ['id', 'name'],
+        'students': ['id', 'name'],
+    },
+    'analyze_temporal_association': {
+        'borrow_transactions': ['id', 'borrowedAt'],
+        'borrow_details': ['borrowId', 'bookItemId'],
+        'book_items': ['id', 'masterId'],
+        'book_masters': ['id', 'title'],
+    },
+    'analyze_top_books': {
+        'borrow_details': ['borrowId', 'bookItemId'],
+        'book_items': ['id', 'masterId'],
+        'book_masters': ['id', 'title', 'author', 'publisher', 'year'],
+    },
+    'analyze_top_students': {
+        'borrow_transactions': ['studentId'],
+        'students': ['id', 'name'],
+    },
+    'analyze_transaction_size': {
+        'borrow_details': ['borrowId'],
+    },
+    'build_also_borrowed_index': {
+        'book_masters': ['id', 'title'],
+    },
+    'build_incidence_matrix': {
+        'borrow_transactions': ['id', 'studentId', 'borrowedAt'],
+        'borrow_details': ['borrowId', 'bookItemId'],
+        'book_items': ['id', 'masterId'],
+        'book_masters': ['id', 'title'],
+        'students': ['id'],
+    },
+    'build_inventory_state': {
+        'book_items': ['id', 'masterId', 'createdAt'],
+        'book_masters': ['id', 'title'],
+    },
+    'build_similar_books_index': {
+        'book_masters': ['id', 'title', 'author', 'publisher', 'year', 'categoryId'],
+    },
+    'dss_recommendation': {
+        'book_items': ['id', 'masterId', 'condition'],
+        'book_masters': ['id', 'title', 'author'],
+    },
+    'find_duplicate_masters': {
+        'book_masters': ['id', 'title', 'author', 'isbn'],
+    },
+    'item_loans': {
+        'borrow_transactions': ['id', 'studentId', 'borrowedAt', 'dueDate'],
+        'borrow_details': ['borrowId', 'bookItemId', 'conditionAtBorrow'],
+        'book_items': ['id', 'masterId'],
+        'return_transactions': ['id', 'borrowId', 'returnedAt'],
+        'return_details': ['returnId', 'bookItemId', 'conditionAtReturn', 'notes'],
+    },
+    'preview_analysis': {
+        'borrow_transactions': ['id', 'borrowedAt'],
+        'borrow_details': ['borrowId', 'bookItemId'],
+        'book_items': ['id', 'masterId', 'condition'],
+        'book_masters': ['id', 'title', 'author', 'categoryId'],
+        'categorys': ['id', 'name'],
+    },
+    'recommend_books_for_students': {
+        'borrow_transactions': ['id', 'studentId'],
+        'borrow_details': ['borrowId', 'bookItemId'],
+        'book_items': ['id', 'masterId'],
+        'book_masters': ['id', 'title', 'author'],
+        'students': ['id', 'name'],
+    },
+}
+
+def parse_datetimes(values):
+    # Fixed-format text -> int64 epoch seconds (nullable Int64 if any value is missing)
+    parsed = pd.to_datetime(values, format=DATETIME_FORMAT)
+    seconds = parsed.to_numpy(dtype='datetime64[s]').astype(np.int64)
+    missing = parsed.isna().to_numpy()
+    if missing.any():
+        return pd.arrays.IntegerArray(seconds, missing)
+    return seconds
+
+def table_columns(name, columns=None):
+    table = TABLES[name]
+    columns = list(table['columns']) if columns is None else list(columns)
+    unknown = [column for column in columns if column not in table['columns']]
+    if unknown:
+        raise KeyError(f"{name} has no column(s) {unknown}")
+    return columns
+
+def stored_dtypes(name, columns=None):
+    # In-memory dtypes after loading: timestamps are int64 epoch seconds
+    return {column: INTEGER if TABLES[name]['columns'][column] == DATETIME else TABLES[name]['columns'][column]
+            for column in table_columns(name, columns)}
+
+def read_table(name, columns=None, dataset_dir=DATASET_DIR):
+    # One dataset file with its declared dtypes, projected to `columns`
+    table = TABLES[name]
+    columns = table_columns(name, columns)
+    dtypes = {column: STRING if table['columns'][column] == DATETIME else table['columns'][column] for column in columns}
+    frame = pd.read_csv(os.path.join(dataset_dir, table['file']), usecols=columns, dtype=dtypes)[columns]
+    for column in columns:
+        if table['columns'][column] == DATETIME:
+            frame[column] = parse_datetimes(frame[column])
+    return frame
+
+def source_fingerprint(tables, dataset_dir=DATASET_DIR):
+    # Size and modification time of each table's dataset file; artifacts built
+    # from the dataset store it and are only reused while it still matches
+    rows = []
+    for name in sorted(tables):
+        stat = os.stat(os.path.join(dataset_dir, TABLES[name]['file']))
+        rows.append({'table': name, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns})
+    return pd.DataFrame(rows, columns=['table', 'size', 'mtime_ns'])
+
+def fingerprint_matches(saved, tables, dataset_dir=DATASET_DIR):
+    # False when a source file changed, disappeared or was not recorded
+    try:
+        current = source_fingerprint(tables, dataset_dir)
+    except FileNotFoundError:
+        return False
+    if saved is None or len(saved) != len(current):
+        return False
+    saved = saved.sort_values('table').reset_index(drop=True)
+    return all((saved[column].astype(str) == current[column].astype(str)).all() for column in current.columns)
+
+def load_tables(script, dataset_dir=DATASET_DIR):
+    # Tuple of frames, one per table in SCRIPT_COLUMNS[script]
+    return tuple(read_table(name, columns, dataset_dir) for name, columns in SCRIPT_COLUMNS[script].items())
@@ -0,0 +1,186 @@
+import os
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.neighbors import BallTree
+from sklearn.preprocessing import OneHotEncoder, normalize
+
+# Content-based "similar books" index over catalog metadata, built by
+# build_similar_books_index.py. Needs no borrow history, so brand-new
+# acquisitions get neighbours as soon as they are catalogued.
+#
+# Each master is vectorised as a sparse row:
+#   TF-IDF of the title (word 1-2 grams)
+#   one-hot categoryId, publisher and author
+#   min-max scaled publication year
+# with per-block weights, projected to a dense space with TruncatedSVD and
+# L2-normalised, so euclidean distance in a BallTree ranks by cosine similarity.
+#
+# New masters are transformed with the already-fitted vectorisers and kept in a
+# small delta buffer that is searched by brute force next to the tree. Deleted
+# masters are tombstoned (skipped by queries); an edited master is tombstoned
+# and re-added to the buffer with its new vector. Each row keeps a signature of
+# its metadata so build_similar_books_index.py can spot edits. The tree is
+# rebuilt, dropping tombstones, once buffer plus tombstones outgrow
+# REBUILD_FRACTION of the indexed rows.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_FILE = os.path.join(SCRIPT_DIR, "output", "similar_books_index.joblib")
+
+FEATURE_COLUMNS = ['title', 'categoryId', 'publisher', 'author', 'year']
+FEATURE_WEIGHTS = {'title': 1.0, 'categoryId': 1.0, 'publisher': 0.5, 'author': 0.5, 'year': 0.3}
+N_COMPONENTS = 128
+REBUILD_FRACTION = 0.1
+LEAF_SIZE = 40
+
+class SimilarBooksIndex:
+    def __init__(self, n_components=N_COMPONENTS, weights=None, rebuild_fraction=REBUILD_FRACTION):
+        self.n_components = n_components
+        self.weights = dict(FEATURE_WEIGHTS if weights is None else weights)
+        self.rebuild_fraction = rebuild_fraction
+
+    def _features(self, masters):
+        # Sparse, weighted metadata vectors with the fitted vectorisers
+        title = self.title_vectorizer.transform(masters['title'].fillna('').astype(str))
+        categorical = self.encoder.transform(masters[['categoryId', 'publisher', 'author']].fillna('').astype(str))
+        # Split the one-hot block per column so each gets its own weight
+        bounds = np.cumsum([0] + [len(c) for c in self.encoder.categories_])
+        blocks = [title * self.weights['title']]
+        for i, column in enumerate(['categoryId', 'publisher', 'author']):
+            blocks.append(categorical[:, bounds[i]:bounds[i + 1]] * self.weights[column])
+        year = masters['year'].fillna(self.year_min).to_numpy(dtype=np.float64)
+        year = np.clip((year - self.year_min) / max(self.year_max - self.year_min, 1.0), 0.0, 1.0)
+        blocks.append(sparse.csr_matrix(year[:, None] * self.weights['year']))
+        return sparse.hstack(blocks).tocsr()
+
+    def _embed(self, masters):
+        return normalize(self.svd.transform(self._features(masters)))
+
+    def fit(self, masters):
+        self.title_vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)
+        self.title_vectorizer.fit(masters['title'].fillna('').astype(str))
+        self.encoder = OneHotEncoder(handle_unknown='ignore')
+        self.encoder.fit(masters[['categoryId', 'publisher', 'author']].fillna('').astype(str))
+        self.year_min = float(masters['year'].min())
+        self.year_max = float(masters['year'].max())
+
+        features = self._features(masters)
+        n_components = max(1, min(self.n_components, features.shape[1] - 1, len(masters) - 1))
+        self.svd = TruncatedSVD(n_components=n_components, random_state=42)
+        self.svd.fit(features)
+
+        self.master_ids = masters['id'].astype(str).to_numpy()
+        self.vectors = normalize(self.svd.transform(features))
+        self.signatures = metadata_signatures(masters)
+        self.deleted = np.zeros(len(masters), dtype=bool)
+        self._rebuild_tree()
+        return self
+
+    def _rebuild_tree(self):
+        # Compact away tombstoned rows and index everything in the tree
+        live = ~self.deleted
+        self.master_ids = self.master_ids[live]
+        self.vectors = self.vectors[live]
+        self.signatures = self.signatures[live]
+        self.deleted = self.deleted[live]
+        self.tree = BallTree(self.vectors, leaf_size=LEAF_SIZE)
+        self.tree_size = len(self.vectors)
+        self.positions = {master_id: i for i, master_id in enumerate(self.master_ids)}
+
+    def _maybe_rebuild(self):
+        pending = len(self.vectors) - self.tree_size + int(self.deleted.sum())
+        if pending > self.rebuild_fraction * max(self.tree_size, 1):
+            self._rebuild_tree()
+
+    def changed(self, masters):
+        # Boolean mask of `masters` rows that are new or whose metadata changed since indexed
+        ids = masters['id'].astype(str).to_numpy()
+        positions = np.array([self.positions.get(master_id, -1) for master_id in ids], dtype=np.int64)
+        signatures = metadata_signatures(masters)
+        known = positions >= 0
+        changed = ~known
+        changed[known] = self.signatures[positions[known]] != signatures[known]
+        return changed
+
+    def remove(self, master_ids):
+        # Tombstone masters deleted from the catalog; unknown ids are ignored
+        removed = 0
+        for master_id in master_ids:
+            position = self.positions.pop(str(master_id), None)
+            if position is not None:
+                self.deleted[position] = True
+                removed += 1
+        if removed:
+            self._maybe_rebuild()
+        return removed
+
+    def add(self, masters):
+        # Incremental refresh: new masters go to the delta buffer; re-catalogued
+        # ones are tombstoned and re-added there with their new vector
+        if masters.empty:
+            return 0
+        vectors = self._embed(masters)
+        ids = masters['id'].astype(str).to_numpy()
+        for master_id in ids:
+            position = self.positions.get(master_id)
+            if position is not None:
+                self.deleted[position] = True
+        start = len(self.master_ids)
+        for offset, master_id in enumerate(ids):
+            self.positions[master_id] = start + offset
+        self.master_ids = np.concatenate([self.master_ids, ids])
+        self.vectors = np.vstack([self.vectors, vectors])
+        self.signatures = np.concatenate([self.signatures, metadata_signatures(masters)])
+        self.deleted = np.concatenate([self.deleted, np.zeros(len(ids), dtype=bool)])
+        self._maybe_rebuild()
+        return int(len(ids))
+
+    def query_vector(self, vector, k=10, exclude=None):
+        # [(masterId, cosine similarity)] best first, from the tree plus the delta buffer
+        vector = np.asarray(vector, dtype=np.float64).reshape(1, -1)
+        # Ask the tree for extra neighbours to make up for tombstoned rows
+        n_tree = min(k + 1 + int(self.deleted[:self.tree_size].sum()), self.tree_size)
+        candidates = {}
+        if n_tree:
+            distances, indices = self.tree.query(vector, k=n_tree)
+            for distance, i in zip(distances[0], indices[0]):
+                if not self.deleted[i]:
+                    candidates[int(i)] = 1.0 - distance ** 2 / 2.0
+        if len(self.vectors) > self.tree_size:
+            delta = self.vectors[self.tree_size:] @ vector[0]
+            for offset, similarity in enumerate(delta):
+                if not self.deleted[self.tree_size + offset]:
+                    candidates[self.tree_size + offset] = float(similarity)
+        candidates.pop(exclude, None)
+        best = sorted(candidates.items(), key=lambda item: -item[1])[:k]
+        return [(str(self.master_ids[i]), round(float(similarity), 4)) for i, similarity in best]
+
+    def query(self, master_id, k=10):
+        # Books most similar to an indexed masterId (e.g. 'BM-0737')
+        position = self.positions.get(master_id)
+        if position is None:
+            raise KeyError(f"{master_id} is not in the similar-books index")
+        return self.query_vector(self.vectors[position], k=k, exclude=position)
+
+    def save(self, path=INDEX_FILE):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        joblib.dump(self, path)
+
+def metadata_signatures(masters):
+    # One hash per master over the vectorised columns; differs when any of them is edited
+    return pd.util.hash_pandas_object(masters[FEATURE_COLUMNS], index=False).to_numpy()
+
+def load_similar_books_index(path=INDEX_FILE):
+    # Returns None when build_similar_books_index.py has not been run, or when
+    # the saved index predates metadata signatures (it is then refitted)
+    if not os.path.exists(path):
+        return None
+    index = joblib.load(path)
+    if not hasattr(index, 'signatures'):
+        return None
+    return index
@@ -0,0 +1,327 @@
+import heapq
+import math
+import numpy as np
+import pandas as pd
+
+# Probabilistic summaries used by the streaming analyses.
+# All sketches hash keys through pandas' vectorized 64-bit hash so that a
+# micro-batch of events is processed with numpy operations instead of a
+# Python loop per event.
+
+HASH_KEY = "dss-library-skch"  # 16 bytes, fixed so hashes are stable across runs
+
+
+def hash_keys(keys):
+    # Stable 64-bit hash for an array-like of keys (strings or ints)
+    return pd.util.hash_array(np.asarray(keys, dtype=object), hash_key=HASH_KEY, categorize=True)
+
+
+class CountMinSketch:
+    # Count-Min sketch (Cormode & Muthukrishnan).
+    # With width w and depth d, every point estimate satisfies
+    #   true <= estimate <= true + epsilon * N   with probability >= 1 - delta
+    # where epsilon = e / w, delta = exp(-d) and N is the total count added.
+
+    def __init__(self, width=2048, depth=5, seed=42):
+        # Width is rounded up to a power of two so a bucket is a bit shift
+        self.log_width = max(1, int(math.ceil(math.log2(width))))
+        self.width = 1 << self.log_width
+        self.depth = depth
+        self.table = np.zeros((depth, self.width), dtype=np.int64)
+        rng = np.random.default_rng(seed)
+        # Odd multipliers for multiply-shift hashing, one per row
+        self.multipliers = rng.integers(1, 2**63, size=depth, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.total = 0
+
+    @property
+    def epsilon(self):
+        return math.e / self.width
+
+    @property
+    def delta(self):
+        return math.exp(-self.depth)
+
+    def _buckets(self, hashes):
+        # (depth, n) bucket indices; uint64 multiplication wraps modulo 2^64
+        shift = np.uint64(64 - self.log_width)
+        with np.errstate(over='ignore'):
+            return (self.multipliers[:, None] * hashes[None, :]) >> shift
+
+    def add_hashes(self, hashes, counts=None):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if counts is None:
+            counts = np.ones(len(hashes), dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        buckets = self._buckets(hashes)
+        for row in range(self.depth):
+            np.add.at(self.table[row], buckets[row], counts)
+        self.total += int(counts.sum())
+
+    def add(self, keys, counts=None):
+        self.add_hashes(hash_keys(keys), counts)
+
+    def estimate_hashes(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        buckets = self._buckets(hashes)
+        rows = np.arange(self.depth)[:, None]
+        return self.table[rows, buckets].min(axis=0)
+
+    def estimate(self, keys):
+        return self.estimate_hashes(hash_keys(keys))
+
+    def error_bound(self):
+        # Additive overestimate bound that holds with probability 1 - delta
+        return self.epsilon * self.total
+
+    def merge(self, other):
+        if self.table.shape != other.table.shape or not np.array_equal(self.multipliers, other.multipliers):
+            raise ValueError("Count-Min sketches must share width, depth and seed to be merged")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+
+class SpaceSaving:
+    # Space-Saving heavy-hitter summary (Metwally et al.) with k counters.
+    # Each monitored key keeps (count, error) where
+    #   count - error <= true count <= count   and   error <= N / k.
+    # Every key whose true count exceeds N / k is guaranteed to be monitored.
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        # Lazy min-heap of (count, key); stale entries are skipped on pop
+        self._heap = []
+
+    def _push(self, key):
+        heapq.heappush(self._heap, (self.counts[key], key))
+        # Keep the lazy heap from growing without bound
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, k) for k, count in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                return key, count
+
+    def add(self, key, count=1):
+        self.total += count
+        if key in self.counts:
+            self.counts[key] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = count
+            self.errors[key] = 0
+        else:
+            # Replace the minimum counter; the new key inherits its count as error
+            min_key, min_count = self._pop_min()
+            del self.counts[min_key]
+            del self.errors[min_key]
+            self.counts[key] = min_count + count
+            self.errors[key] = min_count
+        self._push(key)
+
+    def add_batch(self, keys):
+        # Micro-batch update: aggregate the batch first, then apply weighted updates
+        batch_counts = pd.Series(keys).value_counts(sort=False)
+        for key, count in batch_counts.items():
+            self.add(key, int(count))
+
+    def error_bound(self):
+        return self.total / self.capacity
+
+    def top(self, n=10):
+        # Returns [(key, count, error)] sorted by estimated count
+        ranked = sorted(self.counts.items(), key=lambda kv: (-kv[1], self.errors[kv[0]]))
+        return [(key, count, self.errors[key]) for key, count in ranked[:n]]
+
+    def merge(self, other):
+        # Mergeable summary (Agarwal et al.): add counters, then keep the k largest
+        merged_counts = dict(self.counts)
+        merged_errors = dict(self.errors)
+        self_min = min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+        other_min = min(other.counts.values()) if len(other.counts) >= other.capacity else 0
+        for key in set(merged_counts) | set(other.counts):
+            count_a = self.counts.get(key, self_min)
+            count_b = other.counts.get(key, other_min)
+            error_a = self.errors.get(key, self_min)
+            error_b = other.errors.get(key, other_min)
+            merged_counts[key] = count_a + count_b
+            merged_errors[key] = error_a + error_b
+        keep = heapq.nlargest(self.capacity, merged_counts.items(), key=lambda kv: kv[1])
+        self.counts = {key: count for key, count in keep}
+        self.errors = {key: merged_errors[key] for key in self.counts}
+        self.total += other.total
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+        return self
+
+
+def _bit_length(values):
+    # Exact bit length of uint64 values via a branch-free binary search
+    values = values.copy()
+    lengths = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >> np.uint64(shift)
+        mask = high != 0
+        lengths[mask] += shift
+        values = np.where(mask, high, values)
+    lengths += (values != 0)
+    return lengths
+
+
+class HyperLogLog:
+    # Bank of HyperLogLog distinct-count sketches (Flajolet et al.), one per
+    # integer group code. Registers are stored sparsely as sorted
+    # (group, register, rank) triples, so a group only costs memory for the
+    # registers it has touched (at most 2^precision). Standard error is
+    # 1.04 / sqrt(2^precision); merging takes the register-wise maximum, so
+    # sketches for different time partitions can be combined losslessly.
+
+    def __init__(self, precision=12):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.m = 1 << precision
+        self.groups = np.zeros(0, dtype=np.int64)
+        self.registers = np.zeros(0, dtype=np.int32)
+        self.ranks = np.zeros(0, dtype=np.uint8)
+
+    @property
+    def relative_error(self):
+        return 1.04 / math.sqrt(self.m)
+
+    def _compact(self, groups, registers, ranks):
+        # Keep the maximum rank per (group, register)
+        keys = groups * self.m + registers
+        order = np.argsort(keys, kind='stable')
+        keys, ranks = keys[order], ranks[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, dtype=np.int64)
+        ranks = np.maximum.reduceat(ranks, starts) if len(keys) else ranks
+        keys = keys[starts]
+        self.groups = keys // self.m
+        self.registers = (keys % self.m).astype(np.int32)
+        self.ranks = ranks.astype(np.uint8)
+
+    def add_hashes(self, hashes, groups=None):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if groups is None:
+            groups = np.zeros(len(hashes), dtype=np.int64)
+        suffix_bits = 64 - self.precision
+        registers = (hashes >> np.uint64(suffix_bits)).astype(np.int32)
+        suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+        # Rank = position of the leftmost 1-bit in the suffix (suffix_bits + 1 if all zero)
+        ranks = (suffix_bits - _bit_length(suffix) + 1).astype(np.uint8)
+        self._compact(
+            np.concatenate([self.groups, np.asarray(groups, dtype=np.int64)]),
+            np.concatenate([self.registers, registers]),
+            np.concatenate([self.ranks, ranks]),
+        )
+
+    def add(self, keys, groups=None):
+        self.add_hashes(hash_keys(keys), groups)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("HyperLogLog sketches must share precision to be merged")
+        self._compact(
+            np.concatenate([self.groups, other.groups]),
+            np.concatenate([self.registers, other.registers]),
+            np.concatenate([self.ranks, other.ranks]),
+        )
+        return self
+
+    def regroup(self, mapping):
+        # Merge groups together: group g becomes mapping[g] (e.g. month partitions -> all time)
+        merged = HyperLogLog(self.precision)
+        merged._compact(np.asarray(mapping, dtype=np.int64)[self.groups], self.registers, self.ranks)
+        return merged
+
+    def estimate(self, n_groups=None):
+        if n_groups is None:
+            n_groups = int(self.groups.max()) + 1 if len(self.groups) else 0
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m) if m >= 128 else {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        touched = np.bincount(self.groups, minlength=n_groups)
+        zeros = m - touched
+        inverse_sum = np.bincount(self.groups, weights=np.ldexp(1.0, -self.ranks.astype(np.int64)), minlength=n_groups) + zeros
+        raw = alpha * m * m / inverse_sum
+        # Small-range correction (linear counting) while registers are still empty
+        with np.errstate(divide='ignore'):
+            linear = m * np.log(m / np.maximum(zeros, 1))
+        use_linear = (raw <= 2.5 * m) & (zeros > 0)
+        return np.where(use_linear, linear, raw)
+
+    def save(self, path, **labels):
+        np.savez_compressed(path, precision=self.precision, groups=self.groups,
+                            registers=self.registers, ranks=self.ranks, **labels)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=False)
+        sketch = cls(int(data['precision']))
+        sketch.groups = data['groups']
+        sketch.registers = data['registers']
+        sketch.ranks = data['ranks']
+        labels = {key: data[key] for key in data.files if key not in ('precision', 'groups', 'registers', 'ranks')}
+        return sketch, labels
+
+
+def minhash_signatures(doc_index, shingle_hashes, n_docs, num_perm=128, seed=42, chunk=32):
+    # MinHash signatures (Broder) for many documents at once.
+    # doc_index / shingle_hashes are flat parallel arrays, one row per
+    # (document, shingle). Each permutation is a multiply-add hash modulo 2^64
+    # keeping the top 32 bits; the per-document minimum comes from
+    # np.minimum.reduceat over the document-sorted rows. The fraction of equal
+    # signature positions is an unbiased estimate of the Jaccard similarity.
+    doc_index = np.asarray(doc_index, dtype=np.int64)
+    shingle_hashes = np.asarray(shingle_hashes, dtype=np.uint64)
+    order = np.argsort(doc_index, kind='stable')
+    doc_index, shingle_hashes = doc_index[order], shingle_hashes[order]
+    docs, starts = np.unique(doc_index, return_index=True)
+
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    offsets = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    # Documents without shingles keep the maximum value and never collide by chance
+    signatures = np.full((n_docs, num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+    if len(docs) == 0:
+        return signatures
+    for start in range(0, num_perm, chunk):
+        stop = min(start + chunk, num_perm)
+        with np.errstate(over='ignore'):
+            permuted = (multipliers[start:stop, None] * shingle_hashes[None, :] + offsets[start:stop, None]) >> np.uint64(32)
+        signatures[docs, start:stop] = np.minimum.reduceat(permuted.astype(np.uint32), starts, axis=1).T
+    return signatures
+
+
+def lsh_candidate_pairs(signatures, bands, max_bucket=1000):
+    # Banded LSH over MinHash signatures: documents agreeing on every row of
+    # at least one band become a candidate pair. With b bands of r rows a pair
+    # with Jaccard s collides with probability 1 - (1 - s^r)^b. Buckets larger
+    # than max_bucket (e.g. empty documents) are skipped to stay near-linear.
+    n_docs, num_perm = signatures.shape
+    rows = num_perm // bands
+    if rows == 0:
+        raise ValueError("more bands than signature positions")
+    rng = np.random.default_rng(0)
+    multipliers = rng.integers(1, 2**63, size=rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    pairs = set()
+    for band in range(bands):
+        block = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+        with np.errstate(over='ignore'):
+            keys = (block * multipliers[None, :]).sum(axis=1, dtype=np.uint64)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        boundaries = np.flatnonzero(np.diff(sorted_keys)) + 1
+        for bucket in np.split(order, boundaries):
+            if 2 <= len(bucket) <= max_bucket:
+                bucket = np.sort(bucket)
+                for i in range(len(bucket)):
+                    for j in range(i + 1, len(bucket)):
+                        pairs.add((int(bucket[i]), int(bucket[j])))
+    return pairs
@@ -2,10 +2,14 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+from output_io import read_output, output_exists
+from association_mining import CATEGORY_ITEMSET_FILES
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-INPUT_FILE = os.path.join(SCRIPT_DIR, "output", "frequent_category_itemsets.csv")
+# Match ITEMSET_MODE in the association script: 'all', 'closed' or 'maximal'
+ITEMSET_MODE = "all"
+INPUT_FILE = CATEGORY_ITEMSET_FILES[ITEMSET_MODE]
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "visualizations")
 
 # Colors
@@ -14,12 +18,12 @@ SECONDARY_COLOR = '#F59E0B' # Amber
 TERTIARY_COLOR = '#EC4899' # Pink
 
 def visualize_category_itemsets():
-    if not os.path.exists(INPUT_FILE):
+    if not output_exists(INPUT_FILE):
         print(f"File not found: {INPUT_FILE}")
         return
 
     # Load data
-    df = pd.read_csv(INPUT_FILE)
+    df = read_output(INPUT_FILE)
     
     # Ensure visualizations directory exists
     if not os.path.exists(OUTPUT_DIR):
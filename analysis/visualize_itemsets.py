@@ -2,11 +2,15 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+from output_io import read_output, output_exists
+from association_mining import BOOK_ITEMSET_FILES
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 # Updated to point to the new full file generated by analyze_book_association.py
-INPUT_FILE = os.path.join(SCRIPT_DIR, "output", "frequent_itemsets.csv") 
+# Match ITEMSET_MODE in the association script: 'all', 'closed' or 'maximal'
+ITEMSET_MODE = "all"
+INPUT_FILE = BOOK_ITEMSET_FILES[ITEMSET_MODE]
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "visualizations")
 
 # Colors
@@ -15,12 +19,12 @@ SECONDARY_COLOR = '#10B981' # Emerald
 TERTIARY_COLOR = '#F59E0B' # Amber
 
 def visualize_itemsets():
-    if not os.path.exists(INPUT_FILE):
+    if not output_exists(INPUT_FILE):
         print(f"File not found: {INPUT_FILE}")
         return
 
     # Load data
-    df = pd.read_csv(INPUT_FILE)
+    df = read_output(INPUT_FILE)
     
     # Map Count to Frequency if necessary (to keep variable naming consistent)
     if 'Frequency' not in df.columns and 'Count' in df.columns:
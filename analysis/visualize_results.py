@@ -3,22 +3,22 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 import networkx as nx
+from output_io import read_output, output_exists
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
 VIS_DIR = os.path.join(SCRIPT_DIR, "visualizations")
 
 if not os.path.exists(VIS_DIR):
     os.makedirs(VIS_DIR)
 
 def load_data():
-    book_analysis_path = os.path.join(OUTPUT_DIR, "book_analysis.csv")
-    association_analysis_path = os.path.join(OUTPUT_DIR, "association_analysis.csv")
-    category_popularity_path = os.path.join(OUTPUT_DIR, "category_popularity.csv")
-    category_association_path = os.path.join(OUTPUT_DIR, "category_association.csv")
-    top_books_path = os.path.join(OUTPUT_DIR, "top_books.csv")
-    dss_path = os.path.join(OUTPUT_DIR, "dss_recommendations.csv")
+    book_analysis_file = "book_analysis.csv"
+    association_analysis_file = "association_analysis.csv"
+    category_popularity_file = "category_popularity.csv"
+    category_association_file = "category_association.csv"
+    top_books_file = "top_books.csv"
+    dss_file = "dss_recommendations.csv"
     
     books_df = None
     assoc_df = None
@@ -27,23 +27,23 @@ def load_data():
     top_books_df = None
     dss_df = None
     
-    if os.path.exists(book_analysis_path):
-        books_df = pd.read_csv(book_analysis_path)
+    if output_exists(book_analysis_file):
+        books_df = read_output(book_analysis_file)
     
-    if os.path.exists(association_analysis_path):
-        assoc_df = pd.read_csv(association_analysis_path)
+    if output_exists(association_analysis_file):
+        assoc_df = read_output(association_analysis_file)
         
-    if os.path.exists(category_popularity_path):
-        cat_pop_df = pd.read_csv(category_popularity_path)
+    if output_exists(category_popularity_file):
+        cat_pop_df = read_output(category_popularity_file)
         
-    if os.path.exists(category_association_path):
-        cat_assoc_df = pd.read_csv(category_association_path)
+    if output_exists(category_association_file):
+        cat_assoc_df = read_output(category_association_file)
         
-    if os.path.exists(top_books_path):
-        top_books_df = pd.read_csv(top_books_path)
+    if output_exists(top_books_file):
+        top_books_df = read_output(top_books_file)
         
-    if os.path.exists(dss_path):
-        dss_df = pd.read_csv(dss_path)
+    if output_exists(dss_file):
+        dss_df = read_output(dss_file)
         
     return books_df, assoc_df, cat_pop_df, cat_assoc_df, top_books_df, dss_df
 